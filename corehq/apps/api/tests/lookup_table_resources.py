@@ -1,5 +1,7 @@
 import json
 
+from mock import patch
+
 from corehq.apps.api.tests.utils import APIResourceTest
 from corehq.apps.fixtures.models import (
     FieldList,
@@ -200,14 +202,17 @@ class TestLookupTableItemResource(APIResourceTest):
         fixture_data_type = json.loads(response.content)
         self.assertEqual(fixture_data_type, self._data_item_json(data_item._id, data_item.sort_key))
 
-    def test_delete(self):
+    @patch('corehq.apps.fixtures.resources.v0_1.invalidate_fixture_item_sets')
+    def test_delete(self, invalidate_fixture_item_sets):
         data_item = self._create_data_item(cleanup=False)
         self.assertEqual(1, len(FixtureDataItem.by_domain(self.domain.name)))
         response = self._assert_auth_post_resource(self.single_endpoint(data_item._id), '', method='DELETE')
         self.assertEqual(response.status_code, 204, response.content)
         self.assertEqual(0, len(FixtureDataItem.by_domain(self.domain.name)))
+        invalidate_fixture_item_sets.assert_called_once_with([self.data_type._id])
 
-    def test_create(self):
+    @patch('corehq.apps.fixtures.resources.v0_1.invalidate_fixture_item_sets')
+    def test_create(self, invalidate_fixture_item_sets):
         data_item_json = {
             "data_type_id": self.data_type._id,
             "fields": {
@@ -229,8 +234,10 @@ class TestLookupTableItemResource(APIResourceTest):
         self.assertEqual(len(data_item.fields), 1)
         self.assertEqual(data_item.fields['state_name'].field_list[0].field_value, 'Massachusetts')
         self.assertEqual(data_item.fields['state_name'].field_list[0].properties, {"lang": "en"})
+        invalidate_fixture_item_sets.assert_called_once_with([self.data_type._id])
 
-    def test_update(self):
+    @patch('corehq.apps.fixtures.resources.v0_1.invalidate_fixture_item_sets')
+    def test_update(self, invalidate_fixture_item_sets):
         data_item = self._create_data_item()
 
         data_item_update = {
@@ -257,3 +264,4 @@ class TestLookupTableItemResource(APIResourceTest):
         self.assertEqual(data_item.fields['state_name'].field_list[0].field_value, 'Massachusetts')
         self.assertEqual(data_item.fields['state_name'].field_list[0].properties, {"lang": "en"})
         self.assertEqual(data_item.item_attributes, {"attribute1": "cool_attr_value"})
+        invalidate_fixture_item_sets.assert_called_once_with([self.data_type._id])
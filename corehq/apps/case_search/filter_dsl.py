@@ -4,6 +4,7 @@ from django.utils.translation import ugettext as _
 
 from eulxml.xpath import parse as parse_xpath
 from eulxml.xpath.ast import FunctionCall, Step, UnaryExpression, serialize
+from memoized import memoized
 
 from corehq.apps.case_search.xpath_functions import (
     XPATH_FUNCTIONS,
@@ -17,6 +18,9 @@ from corehq.apps.es.case_search import (
     exact_case_property_text_query,
     reverse_index_case_query,
 )
+from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
+from corehq.form_processor.utils.general import should_use_sql_backend
+from corehq.toggles import CASE_SEARCH_SQL_RELATED_LOOKUPS
 
 
 class CaseFilterError(Exception):
@@ -134,8 +138,16 @@ def build_filter_from_ast(domain, node):
     def _child_case_lookup(case_ids, identifier):
         """returns a list of all case_ids who have parents `case_id` with the relationship `identifier`
         """
+        if _use_sql_related_case_lookups():
+            # only the index table is queried, instead of scrolling through
+            # every matching case in ES
+            return CaseAccessorSQL.get_reverse_indexed_case_ids(domain, list(case_ids), identifier)
         return CaseSearchES().domain(domain).get_child_cases(case_ids, identifier).scroll_ids()
 
+    @memoized
+    def _use_sql_related_case_lookups():
+        return CASE_SEARCH_SQL_RELATED_LOOKUPS.enabled(domain) and should_use_sql_backend(domain)
+
     def _is_related_case_lookup(node):
         """Returns whether a particular AST node is a related case lookup
 
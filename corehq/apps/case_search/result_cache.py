@@ -0,0 +1,128 @@
+"""
+Short-lived cache of case search results
+
+Results are cached by domain, case type and search criteria. Every key also
+includes a version for the domain and one for the case type. The case search
+pillow replaces the versions when it indexes changes to cases, which
+orphans all cached results for those case types; orphaned results expire
+after ``RESULT_CACHE_TIMEOUT``.
+
+Versions are read before the search runs, so results of a search that
+overlaps an invalidation are cached under the old versions and never served.
+Changes only become searchable when the case search index is refreshed, so
+results are not cached at all for searches that start soon after their
+versions are replaced: they may not include the changes yet.
+
+Searches that filter on related cases (e.g. on ``parent/name``) depend on
+cases of other case types, so they are not cached.
+"""
+import hashlib
+import json
+import time
+from collections import defaultdict
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from corehq.apps.case_search.models import CASE_SEARCH_XPATH_QUERY_KEY
+from corehq.toggles import CASE_SEARCH_RESULT_CACHE
+from corehq.util.metrics import metrics_counter, metrics_histogram
+
+RESULT_CACHE_TIMEOUT = 5 * 60
+# longer than RESULT_CACHE_TIMEOUT so that results aren't orphaned by versions expiring
+VERSION_TIMEOUT = 24 * 60 * 60
+# twice the case search index's refresh_interval (see INDEX_STANDARD_SETTINGS), to allow for slow refreshes
+INDEX_REFRESH_WAIT = 10
+
+
+def _get_version_key(domain, case_type=None):
+    if case_type is None:
+        return 'case-search-version-{}'.format(domain)
+    return 'case-search-version-{}-{}'.format(domain, case_type)
+
+
+def can_cache_search(criteria):
+    """
+    Related cases are searched with xpath queries and with criteria like
+    ``parent/name``
+    """
+    return CASE_SEARCH_XPATH_QUERY_KEY not in criteria and not any('/' in key for key in criteria)
+
+
+class CaseSearchResultCache(object):
+
+    def __init__(self, domain, case_type, criteria):
+        self.domain = domain
+        self.case_type = case_type
+        self.created_on = time.time()
+
+        version_keys = [_get_version_key(domain), _get_version_key(domain, case_type)]
+        versions = cache.get_many(version_keys)
+        self.invalidated_on = max((invalidated_on for version, invalidated_on in versions.values()), default=0)
+        criteria_hash = hashlib.md5(json.dumps(criteria, sort_keys=True).encode('utf-8')).hexdigest()
+        self.key = 'case-search-results-{}-{}-{}-{}'.format(
+            domain,
+            hashlib.md5(case_type.encode('utf-8')).hexdigest(),
+            '-'.join(str(versions.get(key, (None,))[0]) for key in version_keys),
+            criteria_hash,
+        )
+
+    def get(self):
+        """
+        :returns: the cached results, or ``None``
+        """
+        cached = cache.get(self.key)
+        if cached is None:
+            self._record('miss')
+            return None
+
+        cached_on, results = cached
+        self._record('hit')
+        metrics_histogram(
+            'commcare.case_search.result_cache.age', time.time() - cached_on,
+            bucket_tag='age', buckets=(1, 10, 30, 60, 120, RESULT_CACHE_TIMEOUT), bucket_unit='s',
+            tags={'domain': self.domain},
+        )
+        return results
+
+    def set(self, results):
+        if self.created_on - self.invalidated_on < INDEX_REFRESH_WAIT:
+            # the index may not have been refreshed with the changes when the search ran
+            return
+        cache.set(self.key, (time.time(), results), RESULT_CACHE_TIMEOUT)
+
+    def _record(self, result):
+        metrics_counter('commcare.case_search.result_cache', tags={
+            'domain': self.domain,
+            'result': result,
+        })
+
+
+def invalidate_search_results(domain, case_types):
+    """
+    :param case_types: case types whose results should no longer be
+    served. ``None`` invalidates the results of every case type.
+    """
+    invalidated_on = time.time()
+    cache.set_many({
+        _get_version_key(domain, case_type): (uuid4().hex, invalidated_on)
+        for case_type in case_types
+    }, VERSION_TIMEOUT)
+    metrics_counter('commcare.case_search.result_cache.invalidations', len(case_types), tags={
+        'domain': domain,
+    })
+
+
+def invalidate_search_results_for_changes(changes):
+    """Invalidate cached results for the case types of the changes' cases"""
+    case_types_by_domain = defaultdict(set)
+    for change in changes:
+        if change.metadata is None or not change.metadata.domain:
+            continue
+        # the case type of changes without one isn't known, so all
+        # of the domain's results are invalidated
+        case_types_by_domain[change.metadata.domain].add(change.metadata.document_subtype or None)
+
+    for domain, case_types in case_types_by_domain.items():
+        if CASE_SEARCH_RESULT_CACHE.enabled(domain):
+            invalidate_search_results(domain, case_types)
@@ -1,5 +1,7 @@
 from django.test import SimpleTestCase, TestCase
 
+from mock import call, patch
+
 from corehq.util.es.elasticsearch import ConnectionError
 from eulxml.xpath import parse as parse_xpath
 
@@ -11,13 +13,18 @@ from corehq.apps.case_search.filter_dsl import (
     build_filter_from_ast,
 )
 from corehq.apps.es import CaseSearchES
+from corehq.apps.es.case_search import reverse_index_case_query
 from corehq.apps.es.tests.utils import ElasticTestMixin, es_test
 from corehq.elastic import get_es_new, send_to_elasticsearch
 from corehq.form_processor.tests.utils import FormProcessorTestUtils
 from corehq.pillows.case_search import transform_case_for_elasticsearch
 from corehq.pillows.mappings.case_search_mapping import CASE_SEARCH_INDEX_INFO
 from corehq.util.elastic import ensure_index_deleted
-from corehq.util.test_utils import generate_cases, trap_extra_setup
+from corehq.util.test_utils import (
+    flag_enabled,
+    generate_cases,
+    trap_extra_setup,
+)
 
 
 @es_test
@@ -354,6 +361,25 @@ class TestFilterDsl(ElasticTestMixin, SimpleTestCase):
         with self.assertRaises(CaseFilterError):
             build_filter_from_ast(None, parse_xpath("parent/name > other_property"))
 
+    @flag_enabled('CASE_SEARCH_SQL_RELATED_LOOKUPS')
+    @patch('corehq.apps.case_search.filter_dsl.should_use_sql_backend', return_value=True)
+    @patch('corehq.apps.case_search.filter_dsl.CaseAccessorSQL.get_reverse_indexed_case_ids')
+    @patch('corehq.apps.case_search.filter_dsl.CaseSearchES')
+    def test_sql_related_case_lookups(self, case_search_es, get_reverse_indexed_case_ids, _):
+        es_query = case_search_es.return_value.domain.return_value.xpath_query.return_value
+        es_query.count.return_value = 2
+        es_query.scroll_ids.return_value = iter(['olenna', 'luthor'])
+        get_reverse_indexed_case_ids.side_effect = [['mace'], ['margaery']]
+
+        built_filter = build_filter_from_ast("domain", parse_xpath("father/mother/grandmother/house = 'Tyrell'"))
+
+        self.assertEqual(built_filter, reverse_index_case_query(['margaery'], 'father'))
+        self.assertEqual(get_reverse_indexed_case_ids.call_args_list, [
+            call("domain", ['olenna', 'luthor'], 'grandmother'),
+            call("domain", ['mace'], 'mother'),
+        ])
+        case_search_es.return_value.domain.return_value.get_child_cases.assert_not_called()
+
 
 @es_test
 class TestFilterDslLookups(ElasticTestMixin, TestCase):
@@ -0,0 +1,95 @@
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from mock import patch
+
+from pillowtop.feed.interface import Change, ChangeMeta
+
+from corehq.apps.case_search.result_cache import (
+    INDEX_REFRESH_WAIT,
+    CaseSearchResultCache,
+    can_cache_search,
+    invalidate_search_results,
+    invalidate_search_results_for_changes,
+)
+from corehq.util.test_utils import flag_enabled
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+def _change(domain, case_type):
+    return Change(
+        id='abc',
+        sequence_id=None,
+        metadata=ChangeMeta(
+            document_id='abc',
+            data_source_type='sql',
+            data_source_name='case-sql',
+            domain=domain,
+            document_subtype=case_type,
+        ),
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CaseSearchResultCacheTest(SimpleTestCase):
+    domain = 'case-search-cache'
+
+    def _cache(self, case_type='person', criteria=None):
+        return CaseSearchResultCache(self.domain, case_type, criteria or {'name': 'Jon', 'owner_id': 'abc'})
+
+    def test_hit(self):
+        self.assertIsNone(self._cache().get())
+        self._cache().set(b'<results/>')
+        self.assertEqual(self._cache().get(), b'<results/>')
+        self.assertEqual(self._cache(criteria={'owner_id': 'abc', 'name': 'Jon'}).get(), b'<results/>')
+        self.assertIsNone(self._cache(criteria={'name': 'Jon'}).get())
+        self.assertIsNone(self._cache(case_type='household').get())
+
+    def test_invalidate_case_type(self):
+        self._cache().set(b'<person/>')
+        self._cache(case_type='household').set(b'<household/>')
+        invalidate_search_results(self.domain, ['person'])
+        self.assertIsNone(self._cache().get())
+        self.assertEqual(self._cache(case_type='household').get(), b'<household/>')
+
+    def test_invalidate_domain(self):
+        self._cache().set(b'<person/>')
+        self._cache(case_type='household').set(b'<household/>')
+        invalidate_search_results(self.domain, [None])
+        self.assertIsNone(self._cache().get())
+        self.assertIsNone(self._cache(case_type='household').get())
+
+    def test_search_during_invalidation_is_not_served(self):
+        result_cache = self._cache()
+        invalidate_search_results(self.domain, ['person'])
+        result_cache.set(b'<stale/>')
+        self.assertIsNone(self._cache().get())
+
+    def test_search_before_index_refresh_is_not_cached(self):
+        invalidate_search_results(self.domain, ['person'])
+        self._cache().set(b'<maybe-stale/>')
+        self.assertIsNone(self._cache().get())
+
+        with patch('corehq.apps.case_search.result_cache.time.time',
+                   return_value=time.time() + INDEX_REFRESH_WAIT):
+            self._cache().set(b'<person/>')
+        self.assertEqual(self._cache().get(), b'<person/>')
+
+    def test_can_cache_search(self):
+        self.assertTrue(can_cache_search({'name': 'Jon'}))
+        self.assertFalse(can_cache_search({'parent/name': 'Jon'}))
+        self.assertFalse(can_cache_search({'_xpath_query': 'name = "Jon"'}))
+
+    @flag_enabled('CASE_SEARCH_RESULT_CACHE')
+    def test_invalidate_for_changes(self):
+        self._cache().set(b'<person/>')
+        self._cache(case_type='household').set(b'<household/>')
+        invalidate_search_results_for_changes([_change(self.domain, 'household'), _change('other', 'person')])
+        self.assertEqual(self._cache().get(), b'<person/>')
+        self.assertIsNone(self._cache(case_type='household').get())
@@ -96,12 +96,18 @@ class KafkaChangeFeed(ChangeFeed):
             assert not forever, 'Kafka pillow should not timeout when waiting forever!'
             # no need to do anything since this is just telling us we've reached the end of the feed
 
-    def get_current_checkpoint_offsets(self):
+    def get_current_checkpoint_offsets(self, processed_offsets=None):
+        """
+        :param processed_offsets: offsets of the last change processed in each
+        partition. Defaults to the offsets of the last changes read from the feed.
+        """
         # the way kafka works, the checkpoint should increment by 1 because
         # querying the feed is inclusive of the value passed in.
         latest_offsets = self.get_latest_offsets()
+        if processed_offsets is None:
+            processed_offsets = self.get_processed_offsets()
         ret = {}
-        for topic_partition, sequence in self.get_processed_offsets().items():
+        for topic_partition, sequence in processed_offsets.items():
             if sequence == latest_offsets[topic_partition]:
                 # this topic and partition is totally up to date and if we add 1
                 # then kafka will give us an offset out of range error.
@@ -190,8 +196,15 @@ class KafkaCheckpointEventHandler(PillowCheckpointEventHandler):
         super(KafkaCheckpointEventHandler, self).__init__(checkpoint, checkpoint_frequency, checkpoint_callback)
         assert isinstance(change_feed, KafkaChangeFeed)
         self.change_feed = change_feed
+        self.processed_offsets_getter = None
+
+    def set_processed_offsets_getter(self, getter):
+        self.processed_offsets_getter = getter
 
     def get_new_seq(self, change):
+        if self.processed_offsets_getter is not None:
+            # per-partition low-water marks when processing changes in parallel
+            return self.change_feed.get_current_checkpoint_offsets(self.processed_offsets_getter())
         return self.change_feed.get_current_checkpoint_offsets()
 
 
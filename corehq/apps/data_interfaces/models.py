@@ -5,8 +5,10 @@ from datetime import date, datetime, time, timedelta
 
 from django.conf import settings
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
 from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.functions import Substr
 from django.utils.translation import ugettext_lazy
 
 import jsonfield
@@ -77,6 +79,27 @@ from corehq.util.test_utils import unit_testing_only
 ALLOWED_DATE_REGEX = re.compile(r'^\d{4}-\d{2}-\d{2}')
 AUTO_UPDATE_XMLNS = 'http://commcarehq.org/hq_case_update_rule'
 
+# Postgres regex for case_json values that are compared to dates in the
+# database. Other values that start with a date may be parsed as a different
+# date, so they are left for MatchPropertyDefinition to check.
+ISO_DATETIME_SQL_REGEX = (
+    r'^[0-9]{4}-[0-9]{2}-[0-9]{2}'
+    r'([T ][0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]+)?)?(Z|[+-][0-9]{2}(:?[0-9]{2})?)?)?$'
+)
+# UTC offsets and times of day can move a datetime's date by a day either way
+DATE_PREFILTER_SLACK = timedelta(days=2)
+
+
+def _is_case_json_property(property_name):
+    # CommCareCaseSQL.get_case_property() falls back to the model's fields
+    # for properties that aren't in case_json, and parent/ and host/ are
+    # resolved on other cases
+    return (
+        '/' not in property_name and
+        property_name != '_id' and
+        property_name not in {field.name for field in CommCareCaseSQL._meta.fields}
+    )
+
 
 def _try_date_conversion(date_or_string):
     if isinstance(date_or_string, bytes):
@@ -215,29 +238,76 @@ class AutomaticUpdateRule(models.Model):
         return date
 
     @classmethod
-    def iter_cases(cls, domain, case_type, boundary_date=None, db=None):
+    def get_case_prefilter(cls, rules, now):
+        """
+        Returns a filter that every case that matches any of the rules
+        passes, for ``iter_cases``. Cases that don't pass it can be skipped
+        because they wouldn't match any rule.
+
+        :return: ``(q_expression, annotations)``, or None if no cases can
+        be skipped. Cases are never skipped if a rule has actions for cases
+        that don't match it.
+        """
+        prefilter = None
+        annotations = {}
+        for index, rule in enumerate(rules):
+            if not rule.only_acts_on_matching_cases:
+                return None
+
+            q_expression, rule_annotations = rule._get_case_prefilter(now, 'rule_prefilter_{}'.format(index))
+            if not q_expression:
+                # nothing to filter on, so any case could match this rule
+                return None
+
+            prefilter = q_expression if prefilter is None else prefilter | q_expression
+            annotations.update(rule_annotations)
+
+        if prefilter is None:
+            return None
+
+        return prefilter, annotations
+
+    @classmethod
+    def iter_cases(cls, domain, case_type, boundary_date=None, db=None, start_after_pk=None, prefilter=None):
+        """
+        :param start_after_pk: (optional) only return cases with a greater
+        primary key, to resume iterating a single db. Ignored for couch domains.
+        :param prefilter: (optional) the result of ``get_case_prefilter``.
+        Ignored for couch domains.
+        """
         if should_use_sql_backend(domain):
-            return cls._iter_cases_from_postgres(domain, case_type, boundary_date=boundary_date, db=db)
+            return cls._iter_cases_from_postgres(domain, case_type, boundary_date=boundary_date, db=db,
+                                                 start_after_pk=start_after_pk, prefilter=prefilter)
         else:
             return cls._iter_cases_from_es(domain, case_type, boundary_date=boundary_date)
 
     @classmethod
-    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None):
+    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None, start_after_pk=None,
+                                  prefilter=None):
         q_expression = Q(
             domain=domain,
             type=case_type,
             closed=False,
             deleted=False,
         )
+        annotate = None
 
         if boundary_date:
             q_expression = q_expression & Q(server_modified_on__lte=boundary_date)
 
+        if start_after_pk is not None:
+            q_expression = q_expression & Q(pk__gt=start_after_pk)
+
+        if prefilter:
+            prefilter_expression, annotate = prefilter
+            q_expression = q_expression & prefilter_expression
+
         if db:
-            return paginate_query(db, CommCareCaseSQL, q_expression, load_source='auto_update_rule')
+            return paginate_query(db, CommCareCaseSQL, q_expression, annotate=annotate,
+                                  load_source='auto_update_rule')
         else:
             return paginate_query_across_partitioned_databases(
-                CommCareCaseSQL, q_expression, load_source='auto_update_rule'
+                CommCareCaseSQL, q_expression, annotate=annotate, load_source='auto_update_rule'
             )
 
     @classmethod
@@ -307,6 +377,28 @@ class AutomaticUpdateRule(models.Model):
             'create_schedule_instance_definition',
         ))
 
+    @property
+    def only_acts_on_matching_cases(self):
+        return all(
+            type(action.definition).when_case_does_not_match is CaseRuleActionDefinition.when_case_does_not_match
+            for action in self.memoized_actions
+        )
+
+    def _get_case_prefilter(self, now, annotation_prefix):
+        q_expression = Q()
+        annotations = {}
+        if self.filter_on_server_modified and self.server_modified_boundary is not None:
+            q_expression &= Q(server_modified_on__lte=now - timedelta(days=self.server_modified_boundary))
+
+        for index, criteria in enumerate(self.memoized_criteria):
+            prefilter = criteria.definition.get_case_prefilter(now, '{}_{}'.format(annotation_prefix, index))
+            if prefilter:
+                criteria_expression, criteria_annotations = prefilter
+                q_expression &= criteria_expression
+                annotations.update(criteria_annotations)
+
+        return q_expression, annotations
+
     def run_rule(self, case, now):
         """
         :return: CaseRuleActionResult object aggregating the results from all actions.
@@ -478,6 +570,14 @@ class CaseRuleCriteriaDefinition(models.Model):
     def matches(self, case, now):
         raise NotImplementedError()
 
+    def get_case_prefilter(self, now, annotation_name):
+        """
+        Optionally returns a filter on CommCareCaseSQL that every case that
+        matches this definition passes, as ``(q_expression, annotations)``.
+        Annotation names must start with ``annotation_name``.
+        """
+        return None
+
 
 class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
     # True when today < (the date in property_name + property_value days)
@@ -592,6 +692,48 @@ class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def get_case_prefilter(self, now, annotation_name):
+        if not _is_case_json_property(self.property_name):
+            return None
+
+        name = self.property_name
+        if self.match_type == self.MATCH_EQUAL and self.property_value is not None:
+            return Q(case_json__contains={name: self.property_value}), {}
+        elif self.match_type == self.MATCH_NOT_EQUAL and self.property_value is not None:
+            return ~Q(case_json__contains={name: self.property_value}), {}
+        elif self.match_type == self.MATCH_HAS_VALUE:
+            q_expression = (
+                Q(case_json__has_key=name) &
+                ~Q(case_json__contains={name: None}) &
+                ~Q(case_json__contains={name: ''})
+            )
+            return q_expression, {}
+        elif self.match_type in (self.MATCH_DAYS_BEFORE, self.MATCH_DAYS_AFTER):
+            return self._get_date_prefilter(now, annotation_name)
+
+        return None
+
+    def _get_date_prefilter(self, now, annotation_name):
+        try:
+            boundary = (now - timedelta(days=int(self.property_value))).date()
+            if self.match_type == self.MATCH_DAYS_BEFORE:
+                date_lookup = {'{}_date__gte'.format(annotation_name): boundary - DATE_PREFILTER_SLACK}
+            else:
+                date_lookup = {'{}_date__lte'.format(annotation_name): boundary + DATE_PREFILTER_SLACK}
+        except (TypeError, ValueError, OverflowError):
+            return None
+        date_lookup = {key: value.isoformat() for key, value in date_lookup.items()}
+
+        value = KeyTextTransform(self.property_name, 'case_json')
+        annotations = {
+            annotation_name: value,
+            '{}_date'.format(annotation_name): Substr(value, 1, 10),
+        }
+        q_expression = Q(case_json__has_key=self.property_name) & (
+            ~Q(**{'{}__regex'.format(annotation_name): ISO_DATETIME_SQL_REGEX}) | Q(**date_lookup)
+        )
+        return q_expression, annotations
+
     def matches(self, case, now):
         return {
             self.MATCH_DAYS_BEFORE: self.check_days_before,
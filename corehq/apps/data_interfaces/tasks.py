@@ -9,11 +9,13 @@ from celery.schedules import crontab
 from celery.task import periodic_task, task
 from celery.utils.log import get_task_logger
 
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import CriticalSection
 from dimagi.utils.logging import notify_error
 
 from corehq.apps.domain.models import Domain
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
+from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
 from corehq.form_processor.interfaces.dbaccessors import (
     CaseAccessors,
     FormAccessors,
@@ -24,7 +26,10 @@ from corehq.motech.repeaters.dbaccessors import (
     iter_repeat_records_by_repeater,
 )
 from corehq.sql_db.util import get_db_aliases_for_partitioned_query
-from corehq.toggles import DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK
+from corehq.toggles import (
+    CASE_UPDATE_RULE_SQL_PREFILTER,
+    DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK,
+)
 from corehq.util.decorators import serial_task
 
 from .interfaces import FormManagementMode
@@ -44,6 +49,8 @@ from .utils import (
 logger = get_task_logger('data_interfaces')
 ONE_HOUR = 60 * 60
 HALT_AFTER = 23 * 60 * 60
+CASE_RULE_CHUNK_SIZE = 100
+CASE_RULE_CHECKPOINT_TIMEOUT = 7 * 24 * ONE_HOUR
 
 
 def _get_upload_progress_tracker(upload_id):
@@ -123,6 +130,14 @@ def run_rules_for_case(case, rules, now):
     return aggregated_result
 
 
+def get_case_rule_checkpoint_key(domain, case_type, db):
+    """
+    The key of the primary key of the last case that rules were run on for
+    the db, so that a run that halts or fails can resume where it stopped.
+    """
+    return 'case-rule-checkpoint-{}-{}-{}'.format(domain, case_type, db)
+
+
 def check_data_migration_in_progress(domain, last_migration_check_time):
     utcnow = datetime.utcnow()
     if last_migration_check_time is None or (utcnow - last_migration_check_time) > timedelta(minutes=1):
@@ -173,25 +188,57 @@ def run_case_update_rules_for_domain_and_db(domain, now, run_id, case_type, db=N
     rules = list(all_rules.filter(case_type=case_type))
 
     boundary_date = AutomaticUpdateRule.get_boundary_date(rules, now)
-    for case in AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db):
-        migration_in_progress, last_migration_check_time = check_data_migration_in_progress(
-            domain,
-            last_migration_check_time
-        )
-
-        time_elapsed = datetime.utcnow() - start_run
-        if (
-            time_elapsed.seconds > HALT_AFTER or
-            case_update_result.total_updates >= max_allowed_updates or
-            migration_in_progress
-        ):
-            DomainCaseRuleRun.done(run_id, DomainCaseRuleRun.STATUS_HALTED, cases_checked, case_update_result,
-                                   db=db)
-            notify_error("Halting rule run for domain %s and case type %s." % (domain, case_type))
-            return
-
-        case_update_result.add_result(run_rules_for_case(case, rules, now))
-        cases_checked += 1
+    prefetch_related_cases = (
+        any(rule.references_parent_case for rule in rules) and
+        should_use_sql_backend(domain)
+    )
+    # cases are only ordered by primary key within a single db
+    checkpoint_key = get_case_rule_checkpoint_key(domain, case_type, db) if db else None
+    start_after_pk = cache.get(checkpoint_key) if checkpoint_key else None
+
+    prefilter = None
+    if CASE_UPDATE_RULE_SQL_PREFILTER.enabled(domain):
+        prefilter = AutomaticUpdateRule.get_case_prefilter(rules, now)
+
+    cases = AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db,
+                                           start_after_pk=start_after_pk, prefilter=prefilter)
+    for chunk in chunked(cases, CASE_RULE_CHUNK_SIZE):
+        if prefetch_related_cases:
+            CaseAccessorSQL.prefetch_indices_and_referenced_cases(domain, chunk)
+
+        for i, case in enumerate(chunk):
+            migration_in_progress, last_migration_check_time = check_data_migration_in_progress(
+                domain,
+                last_migration_check_time
+            )
+
+            time_elapsed = datetime.utcnow() - start_run
+            if (
+                time_elapsed.seconds > HALT_AFTER or
+                case_update_result.total_updates >= max_allowed_updates or
+                migration_in_progress
+            ):
+                if checkpoint_key and start_after_pk is not None:
+                    cache.set(checkpoint_key, start_after_pk, CASE_RULE_CHECKPOINT_TIMEOUT)
+                DomainCaseRuleRun.done(run_id, DomainCaseRuleRun.STATUS_HALTED, cases_checked, case_update_result,
+                                       db=db)
+                notify_error("Halting rule run for domain %s and case type %s." % (domain, case_type))
+                return
+
+            result = run_rules_for_case(case, rules, now)
+            case_update_result.add_result(result)
+            cases_checked += 1
+            if prefetch_related_cases and (result.num_related_updates or result.num_related_closes):
+                # the rest of the chunk may reference the cases that were just updated
+                CaseAccessorSQL.prefetch_indices_and_referenced_cases(domain, chunk[i + 1:])
+            if checkpoint_key:
+                start_after_pk = case.pk
+
+        if checkpoint_key:
+            cache.set(checkpoint_key, start_after_pk, CASE_RULE_CHECKPOINT_TIMEOUT)
+
+    if checkpoint_key:
+        cache.delete(checkpoint_key)
 
     run = DomainCaseRuleRun.done(run_id, DomainCaseRuleRun.STATUS_FINISHED, cases_checked, case_update_result,
                                  db=db)
@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from django.test import TestCase
+
+from corehq.apps.data_interfaces.models import (
+    AutomaticUpdateRule,
+    CustomMatchDefinition,
+    MatchPropertyDefinition,
+    UpdateCaseDefinition,
+)
+from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
+from corehq.form_processor.models import CommCareCaseSQL
+from corehq.form_processor.tests.utils import (
+    FormProcessorTestUtils,
+    create_case,
+    use_sql_backend,
+)
+
+MISSING = object()
+VALUES = [
+    MISSING,
+    None,
+    '',
+    '   ',
+    'Y',
+    'y',
+    'N',
+    5,
+    'not a date',
+    '2019-12-01',
+    '2019-12-31',
+    '2020-01-01',
+    '2020-01-01T23:30:00-05:00',
+    '2020-01-02T01:00:00+14:00',
+    '2020-01-02T10:00:00.000000Z',
+    '2020-01-0112',
+    '2020-01-01 extra',
+    '2020-01-30',
+    '2020-02-15',
+]
+
+
+@use_sql_backend
+class CaseRulePrefilterTest(TestCase):
+    domain = 'case-rule-prefilter'
+    case_type = 'person'
+    now = datetime(2020, 1, 31, 12)
+
+    @classmethod
+    def setUpClass(cls):
+        super(CaseRulePrefilterTest, cls).setUpClass()
+        for index, value in enumerate(VALUES):
+            for days_old in (10, 40):
+                case_json = {'other': VALUES[-index - 1]}
+                if value is not MISSING:
+                    case_json['status'] = value
+                    case_json['visit_date'] = value
+                case_json = {key: value for key, value in case_json.items() if value is not MISSING}
+                create_case(CommCareCaseSQL(
+                    case_id=uuid4().hex,
+                    domain=cls.domain,
+                    type=cls.case_type,
+                    name='Y',
+                    owner_id='owner',
+                    modified_on=cls.now,
+                    server_modified_on=cls.now - timedelta(days=days_old),
+                    case_json=case_json,
+                ))
+        cls.case_ids = set(CaseAccessorSQL.get_case_ids_in_domain(cls.domain, cls.case_type))
+
+    @classmethod
+    def tearDownClass(cls):
+        FormProcessorTestUtils.delete_all_cases_forms_ledgers(cls.domain)
+        super(CaseRulePrefilterTest, cls).tearDownClass()
+
+    def tearDown(self):
+        for rule in AutomaticUpdateRule.objects.filter(domain=self.domain):
+            rule.hard_delete()
+
+    def _rule(self, *criteria, **kwargs):
+        rule = AutomaticUpdateRule.objects.create(
+            domain=self.domain,
+            name='test',
+            case_type=self.case_type,
+            active=True,
+            filter_on_server_modified=kwargs.get('server_modified_boundary') is not None,
+            server_modified_boundary=kwargs.get('server_modified_boundary'),
+            workflow=AutomaticUpdateRule.WORKFLOW_CASE_UPDATE,
+        )
+        for property_name, property_value, match_type in criteria:
+            rule.add_criteria(
+                MatchPropertyDefinition,
+                property_name=property_name,
+                property_value=property_value,
+                match_type=match_type,
+            )
+        rule.add_action(UpdateCaseDefinition, close_case=True)
+        return rule
+
+    def assertSameMatches(self, rules, prefiltered=True):
+        prefilter = AutomaticUpdateRule.get_case_prefilter(rules, self.now)
+        if not prefiltered:
+            self.assertIsNone(prefilter)
+            return
+        self.assertIsNotNone(prefilter)
+
+        cases = CaseAccessorSQL.get_cases(list(self.case_ids))
+        expected = {case.case_id for case in cases if any(rule.criteria_match(case, self.now) for rule in rules)}
+        loaded = {
+            case.case_id
+            for case in AutomaticUpdateRule.iter_cases(self.domain, self.case_type, prefilter=prefilter)
+        }
+        self.assertLessEqual(expected, loaded)
+        self.assertLess(loaded, self.case_ids)
+
+    def test_equal(self):
+        self.assertSameMatches([self._rule(('status', 'Y', MatchPropertyDefinition.MATCH_EQUAL))])
+
+    def test_not_equal(self):
+        self.assertSameMatches([self._rule(('status', 'Y', MatchPropertyDefinition.MATCH_NOT_EQUAL))])
+
+    def test_has_value(self):
+        self.assertSameMatches([self._rule(('status', None, MatchPropertyDefinition.MATCH_HAS_VALUE))])
+
+    def test_days_after(self):
+        for days in ('-10', '0', '1', '29', '30', '31', '60'):
+            self.assertSameMatches([self._rule(('visit_date', days, MatchPropertyDefinition.MATCH_DAYS_AFTER))])
+
+    def test_days_before(self):
+        for days in ('-10', '0', '1', '29', '30', '31', '60'):
+            self.assertSameMatches([self._rule(('visit_date', days, MatchPropertyDefinition.MATCH_DAYS_BEFORE))])
+
+    def test_server_modified_boundary(self):
+        self.assertSameMatches([self._rule(server_modified_boundary=30)])
+
+    def test_any_rule(self):
+        self.assertSameMatches([
+            self._rule(
+                ('status', 'Y', MatchPropertyDefinition.MATCH_EQUAL),
+                ('visit_date', '30', MatchPropertyDefinition.MATCH_DAYS_AFTER),
+                server_modified_boundary=30,
+            ),
+            self._rule(
+                ('other', 'N', MatchPropertyDefinition.MATCH_EQUAL),
+                ('name', 'Y', MatchPropertyDefinition.MATCH_EQUAL),
+            ),
+        ])
+
+    def test_not_pushed_down(self):
+        self.assertSameMatches([
+            self._rule(('name', 'Y', MatchPropertyDefinition.MATCH_EQUAL)),
+        ], prefiltered=False)
+        self.assertSameMatches([
+            self._rule(('parent/status', 'Y', MatchPropertyDefinition.MATCH_EQUAL)),
+        ], prefiltered=False)
+        self.assertSameMatches([
+            self._rule(('status', None, MatchPropertyDefinition.MATCH_HAS_NO_VALUE)),
+        ], prefiltered=False)
+
+    def test_rule_without_filters(self):
+        rule = self._rule()
+        rule.add_criteria(CustomMatchDefinition, name='COVID_US_ASSOCIATED_USER_CASES')
+        self.assertSameMatches([
+            self._rule(('status', 'Y', MatchPropertyDefinition.MATCH_EQUAL)),
+            rule,
+        ], prefiltered=False)
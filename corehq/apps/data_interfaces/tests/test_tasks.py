@@ -1,10 +1,22 @@
+from datetime import datetime
 from unittest.case import TestCase
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
+from django.core.cache import cache
+
+from corehq.apps.data_interfaces.models import (
+    AutomaticUpdateRule,
+    CaseRuleActionResult,
+    DomainCaseRuleRun,
+)
 from corehq.apps.data_interfaces.tasks import (
+    get_case_rule_checkpoint_key,
+    run_case_update_rules_for_domain_and_db,
     task_generate_ids_and_operate_on_payloads,
     task_operate_on_payloads,
 )
+from corehq.apps.domain.models import Domain
+from corehq.util.test_utils import flag_disabled
 
 
 class TestTasks(TestCase):
@@ -51,3 +63,73 @@ class TestTasks(TestCase):
         )
         self.assertEqual(response,
                          {'messages': {'errors': ['No payloads specified']}})
+
+
+class TestCaseUpdateRuleCheckpoint(TestCase):
+    domain = 'case-rule-checkpoint'
+    case_type = 'person'
+    db = 'p1'
+
+    def setUp(self):
+        self.cases = [Mock(pk=pk) for pk in range(1, 6)]
+        self.processed = []
+        for patcher in [
+            patch.object(Domain, 'get_by_name', return_value=Mock(auto_case_update_limit=3)),
+            patch.object(AutomaticUpdateRule, 'by_domain'),
+            patch.object(AutomaticUpdateRule, 'get_boundary_date', return_value=None),
+            patch.object(AutomaticUpdateRule, 'iter_cases', side_effect=self._iter_cases),
+            patch('corehq.apps.data_interfaces.tasks.run_rules_for_case', side_effect=self._run_rules),
+            patch('corehq.apps.data_interfaces.tasks.check_data_migration_in_progress',
+                  return_value=(False, None)),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        done_patcher = patch.object(DomainCaseRuleRun, 'done')
+        self.done = done_patcher.start()
+        self.addCleanup(done_patcher.stop)
+        self.addCleanup(cache.delete, self.checkpoint_key)
+
+    @property
+    def checkpoint_key(self):
+        return get_case_rule_checkpoint_key(self.domain, self.case_type, self.db)
+
+    def _iter_cases(self, domain, case_type, boundary_date, db=None, start_after_pk=None, prefilter=None):
+        return [case for case in self.cases if start_after_pk is None or case.pk > start_after_pk]
+
+    def _run_rules(self, case, rules, now):
+        self.processed.append(case.pk)
+        return CaseRuleActionResult(num_updates=1)
+
+    def _run(self):
+        run_case_update_rules_for_domain_and_db(self.domain, datetime.utcnow(), 1, self.case_type, db=self.db)
+
+    @flag_disabled('CASE_UPDATE_RULE_SQL_PREFILTER')
+    def test_halted_run_resumes(self):
+        self._run()
+        self.assertEqual(self.processed, [1, 2, 3])
+        self.assertEqual(self.done.call_args[0][1], DomainCaseRuleRun.STATUS_HALTED)
+        self.assertEqual(cache.get(self.checkpoint_key), 3)
+
+        self._run()
+        self.assertEqual(self.processed, [1, 2, 3, 4, 5])
+        self.assertEqual(self.done.call_args[0][1], DomainCaseRuleRun.STATUS_FINISHED)
+        self.assertIsNone(cache.get(self.checkpoint_key))
+
+    @flag_disabled('CASE_UPDATE_RULE_SQL_PREFILTER')
+    @patch('corehq.apps.data_interfaces.tasks.should_use_sql_backend', return_value=True)
+    @patch('corehq.apps.data_interfaces.tasks.CaseAccessorSQL.prefetch_indices_and_referenced_cases')
+    def test_related_cases_prefetched_again_after_related_update(self, prefetch, _):
+        AutomaticUpdateRule.by_domain.return_value.filter.return_value = [Mock(references_parent_case=True)]
+
+        def run_rules(case, rules, now):
+            self.processed.append(case.pk)
+            return CaseRuleActionResult(num_related_updates=1 if case.pk == 2 else 0)
+
+        with patch('corehq.apps.data_interfaces.tasks.run_rules_for_case', side_effect=run_rules):
+            self._run()
+
+        self.assertEqual(self.processed, [1, 2, 3, 4, 5])
+        self.assertEqual(
+            [[case.pk for case in call[0][1]] for call in prefetch.call_args_list],
+            [[1, 2, 3, 4, 5], [3, 4, 5]],
+        )
@@ -55,13 +55,25 @@ class DataLoader(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
-    def load_from_path(self, extracted_dump_path, dump_meta, force=False, dry_run=False):
+    def load_from_path(self, extracted_dump_path, dump_meta, force=False, dry_run=False, progress=None):
+        """
+        Load the loader's files in name order
+
+        :param progress: Optional ``ProgressFile``. Files that it records
+        as loaded are skipped, and files are recorded in it once loaded.
+        """
         loaded_object_count = {}
-        for file in os.listdir(extracted_dump_path):
+        for file in sorted(os.listdir(extracted_dump_path)):
             path = os.path.join(extracted_dump_path, file)
             if file.startswith(self.slug) and file.endswith('.gz') and os.path.isfile(path):
+                if progress is not None and file in progress:
+                    self.stdout.write(f"\nSkipping {file}, which has already been loaded.")
+                    loaded_object_count.update(progress[file])
+                    continue
                 counts = self.load_from_file(path, dump_meta, force, dry_run)
                 loaded_object_count.update(counts)
+                if progress is not None and not dry_run:
+                    progress[file] = counts
         return loaded_object_count
 
     def load_from_file(self, file_path, dump_meta, force=False, dry_run=False):
@@ -1,6 +1,7 @@
 import gzip
 import json
 import os
+import shutil
 import zipfile
 from datetime import datetime
 
@@ -10,6 +11,7 @@ from corehq.apps.dump_reload.const import DATETIME_FORMAT
 from corehq.apps.dump_reload.couch import CouchDataDumper
 from corehq.apps.dump_reload.couch.dump import DomainDumper, ToggleDumper
 from corehq.apps.dump_reload.sql import SqlDataDumper
+from corehq.apps.dump_reload.sql.parallel_dump import dump_sql_data_in_parallel
 
 
 class Command(BaseCommand):
@@ -34,6 +36,11 @@ class Command(BaseCommand):
         )
         parser.add_argument('--dumper', dest='dumpers', action='append', default=[],
                             help='Dumper slug to run (use multiple --dumper to run multiple dumpers).')
+        parser.add_argument('--parallel', type=int, default=0, metavar='WORKERS',
+                            help='Dump SQL data with this many worker processes, to a file per '
+                                 'model and database.')
+        parser.add_argument('--resume-sql-dump', dest='resume_sql_dump', metavar='DIRECTORY',
+                            help='Resume an interrupted parallel SQL dump from its output directory.')
 
     def handle(self, domain_name, **options):
         excludes = options.get('exclude')
@@ -41,6 +48,12 @@ class Command(BaseCommand):
         console = options.get('console')
         show_traceback = options.get('traceback')
         requested_dumpers = options.get('dumpers')
+        parallel = options.get('parallel')
+        resume_sql_dump = options.get('resume_sql_dump')
+        if resume_sql_dump and not parallel:
+            raise CommandError("--resume-sql-dump requires --parallel")
+        if parallel and console:
+            raise CommandError("--parallel can not be used with --console")
 
         self.utcnow = datetime.utcnow().strftime(DATETIME_FORMAT)
         zipname = 'data-dump-{}-{}.zip'.format(domain_name, self.utcnow)
@@ -52,6 +65,12 @@ class Command(BaseCommand):
             if requested_dumpers and dumper.slug not in requested_dumpers:
                 continue
 
+            if dumper is SqlDataDumper and parallel:
+                meta.update(self._dump_sql_in_parallel(
+                    domain_name, excludes, includes, parallel, resume_sql_dump, zipname, show_traceback
+                ))
+                continue
+
             filename = _get_dump_stream_filename(dumper.slug, domain_name, self.utcnow)
             stream = self.stdout if console else gzip.open(filename, 'wt')
             try:
@@ -77,6 +96,34 @@ class Command(BaseCommand):
         self._print_stats(meta)
         self.stdout.write('\nData dumped to file: {}'.format(zipname))
 
+    def _dump_sql_in_parallel(self, domain_name, excludes, includes, max_workers, output_dir, zipname,
+                              show_traceback):
+        """
+        :return: Dict of ``{file slug: {model label: count}}``
+        """
+        if not output_dir:
+            output_dir = 'dump-sql-{}-{}'.format(domain_name, self.utcnow)
+            os.makedirs(output_dir)
+        try:
+            dumped = dump_sql_data_in_parallel(
+                domain_name, excludes, includes, output_dir, max_workers, self.stdout
+            )
+        except Exception as e:
+            if show_traceback:
+                raise
+            raise CommandError("Unable to serialize database: %s\nResume with --resume-sql-dump %s" % (
+                e, output_dir
+            ))
+
+        meta = {}
+        with zipfile.ZipFile(zipname, mode='a', allowZip64=True) as z:
+            for slug, counts in sorted(dumped.items()):
+                if counts:
+                    z.write(os.path.join(output_dir, '{}.gz'.format(slug)), '{}.gz'.format(slug))
+                    meta[slug] = counts
+        shutil.rmtree(output_dir)
+        return meta
+
     def _print_stats(self, meta):
         self.stdout.ending = '\n'
         self.stdout.write('{0} Dump Stats {0}'.format('-' * 32))
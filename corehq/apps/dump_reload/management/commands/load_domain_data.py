@@ -12,10 +12,13 @@ from corehq.apps.dump_reload.couch.load import (
 )
 from corehq.apps.dump_reload.exceptions import DataExistsException
 from corehq.apps.dump_reload.sql import SqlDataLoader
+from corehq.apps.dump_reload.util import ProgressFile
 
 # Domain loader should be first
 LOADERS = [DomainLoader, SqlDataLoader, CouchDataLoader, ToggleLoader]
 
+LOAD_PROGRESS_FILENAME = 'load-progress.json'
+
 
 class Command(BaseCommand):
     """This command expects a ZIP file containing one or more
@@ -32,6 +35,8 @@ class Command(BaseCommand):
         -  <slug> is one of 'sql', 'couch', 'domain', 'toggle'
         -  <suffix> can be anything
 
+    Each loader loads its files in name order.
+
     meta.json:
         Must contain a single JSON object with properties for each of the filnames
         in the zip file. The value of the properties must be a dict of
@@ -58,6 +63,12 @@ class Command(BaseCommand):
                             help="Load data for domain that already exists.")
         parser.add_argument('--dry-run', action='store_true', default=False, dest='dry_run',
                             help="Skip saving data to the DB")
+        parser.add_argument('--resume', action='store_true', default=False,
+                            help="Skip files that were loaded by a previous run from the same "
+                                 "extracted dump. Implies --use-extracted.")
+        parser.add_argument('--bulk', action='store_true', default=False,
+                            help="Insert SQL data in batches, using COPY where possible, instead of "
+                                 "saving objects one at a time. Model signals are not sent.")
         parser.add_argument('--loader', dest='loaders', action='append', default=[],
                             help='loader slug to run (use multiple --loader to run multiple loaders).'
                                  'domain should always be the first loader to be invoked in case of '
@@ -72,7 +83,9 @@ class Command(BaseCommand):
     def handle(self, dump_file_path, **options):
         self.force = options.get('force')
         self.dry_run = options.get('dry_run')
-        self.use_extracted = options.get('use_extracted')
+        self.resume = options.get('resume')
+        self.use_extracted = options.get('use_extracted') or self.resume
+        self.bulk = options.get('bulk')
 
         if not os.path.isfile(dump_file_path):
             raise CommandError("Dump file not found: {}".format(dump_file_path))
@@ -89,9 +102,13 @@ class Command(BaseCommand):
             loaders = LOADERS
 
         dump_meta = _get_dump_meta(extracted_dir)
+        progress_path = os.path.join(extracted_dir, LOAD_PROGRESS_FILENAME)
+        if not self.resume and os.path.exists(progress_path):
+            os.remove(progress_path)
+        progress = ProgressFile(progress_path)
         for loader in loaders:
             loaded_meta.update(self._load_data(
-                loader, extracted_dir, object_filter, dump_meta
+                loader, extracted_dir, object_filter, dump_meta, progress
             ))
 
         if options.get("json_output"):
@@ -122,10 +139,15 @@ class Command(BaseCommand):
                 "Extracted dump already exists at {}. Delete it or use --use-extracted".format(target_dir))
         return target_dir
 
-    def _load_data(self, loader_class, extracted_dump_path, object_filter, dump_meta):
+    def _load_data(self, loader_class, extracted_dump_path, object_filter, dump_meta, progress):
         try:
-            loader = loader_class(object_filter, self.stdout, self.stderr)
-            return loader.load_from_path(extracted_dump_path, dump_meta, force=self.force, dry_run=self.dry_run)
+            if loader_class is SqlDataLoader:
+                loader = loader_class(object_filter, self.stdout, self.stderr, bulk=self.bulk)
+            else:
+                loader = loader_class(object_filter, self.stdout, self.stderr)
+            return loader.load_from_path(
+                extracted_dump_path, dump_meta, force=self.force, dry_run=self.dry_run, progress=progress
+            )
         except DataExistsException as e:
             raise CommandError('Some data already exists. Use --force to load anyway: {}'.format(str(e)))
         except Exception as e:
@@ -23,6 +23,7 @@ APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP = defaultdict(list)
 [APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP[iterator.model_label].append(iterator) for iterator in [
     FilteredModelIteratorBuilder('locations.LocationType', SimpleFilter('domain')),
     FilteredModelIteratorBuilder('locations.SQLLocation', SimpleFilter('domain')),
+    FilteredModelIteratorBuilder('locations.LocationClosure', SimpleFilter('domain')),
     FilteredModelIteratorBuilder('blobs.BlobMeta', SimpleFilter('domain')),
 
     FilteredModelIteratorBuilder('form_processor.XFormInstanceSQL', SimpleFilter('domain')),
@@ -204,6 +205,20 @@ def get_model_iterator_builders_to_dump(domain, excludes, includes, limit_to_db=
     :param excluded_models: List of model_class classes to exclude
     :return: generator yielding query sets
     """
+    for model_class in get_models_to_dump(excludes, includes):
+        iterator_builders = APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP[get_model_label(model_class)]
+        for model_class, builder in get_all_model_iterators_builders_for_domain(
+            model_class, domain, iterator_builders, limit_to_db=limit_to_db
+        ):
+            yield model_class, builder
+
+
+def get_models_to_dump(excludes, includes):
+    """
+    :param excludes: List of app labels ("app_label.model_name" or "app_label") to exclude
+    :param includes: List of app labels ("app_label.model_name" or "app_label") to include
+    :return: generator yielding model classes in the order they should be dumped
+    """
     excluded_apps, excluded_models = get_apps_and_models(excludes)
     included_apps, included_models = get_apps_and_models(includes)
     app_config_models = _get_app_list(excluded_apps, included_apps)
@@ -214,15 +229,19 @@ def get_model_iterator_builders_to_dump(domain, excludes, includes, limit_to_db=
             continue
         if model_class in excluded_models:
             continue
-
-        iterator_builders = APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP[get_model_label(model_class)]
-        for model_class, builder in get_all_model_iterators_builders_for_domain(
-            model_class, domain, iterator_builders, limit_to_db=limit_to_db
-        ):
-            yield model_class, builder
+        yield model_class
 
 
 def get_all_model_iterators_builders_for_domain(model_class, domain, builders, limit_to_db=None):
+    for db_alias in get_db_aliases_for_model(model_class, limit_to_db):
+        for builder in builders:
+            yield model_class, builder.build(domain, model_class, db_alias)
+
+
+def get_db_aliases_for_model(model_class, limit_to_db=None):
+    """
+    :return: List of the aliases of the databases to dump ``model_class`` from
+    """
     if settings.USE_PARTITIONED_DATABASE and hasattr(model_class, 'partition_attr'):
         using = plproxy_config.form_processing_dbs
     else:
@@ -234,16 +253,15 @@ def get_all_model_iterators_builders_for_domain(model_class, domain, builders, l
                                   'model class: {} not in {}'.format(limit_to_db, using))
         using = [limit_to_db]
 
-    for db_alias in using:
-        if model_class._meta.proxy:
-            continue
+    if model_class._meta.proxy:
+        return []
 
+    db_aliases = []
+    for db_alias in using:
         master_db = settings.DATABASES[db_alias].get('STANDBY', {}).get('MASTER')
-        if not router.allow_migrate_model(master_db or db_alias, model_class):
-            continue
-
-        for builder in builders:
-            yield model_class, builder.build(domain, model_class, db_alias)
+        if router.allow_migrate_model(master_db or db_alias, model_class):
+            db_aliases.append(db_alias)
+    return db_aliases
 
 
 def get_apps_and_models(app_or_model_label):
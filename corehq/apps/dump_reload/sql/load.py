@@ -1,3 +1,4 @@
+import csv
 import json
 import logging
 import multiprocessing as mp
@@ -5,6 +6,7 @@ from collections import Counter, defaultdict
 from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from functools import partial
+from io import StringIO
 from queue import Full
 from typing import Tuple
 
@@ -24,11 +26,42 @@ logger = logging.getLogger("load_sql")
 
 CHUNK_SIZE = 200
 ENQUEUE_TIMEOUT = 10
+BULK_INSERT_SIZE = 5000
+
+# Internal types of fields whose database values can be written as CSV for COPY
+COPY_FIELD_TYPES = {
+    'AutoField',
+    'BigAutoField',
+    'BigIntegerField',
+    'BooleanField',
+    'CharField',
+    'DateField',
+    'DateTimeField',
+    'DecimalField',
+    'FloatField',
+    'IntegerField',
+    'NullBooleanField',
+    'PositiveIntegerField',
+    'PositiveSmallIntegerField',
+    'SlugField',
+    'SmallIntegerField',
+    'TextField',
+    'TimeField',
+    'UUIDField',
+}
 
 
 class SqlDataLoader(DataLoader):
+    """
+    :param bulk: Insert objects in batches, using ``COPY`` where possible,
+    instead of saving them one at a time. Model signals are not sent.
+    """
     slug = 'sql'
 
+    def __init__(self, object_filter=None, stdout=None, stderr=None, bulk=False):
+        super().__init__(object_filter, stdout, stderr)
+        self.bulk = bulk
+
     def load_objects(self, object_strings, force=False, dry_run=False):
         if dry_run:
             dry_run_stats = Counter()
@@ -68,7 +101,7 @@ class SqlDataLoader(DataLoader):
         manager = mp.Manager()
         with ProcessPoolExecutor(max_workers=num_aliases) as executor:
             # Map each db_alias to a queue + a worker task to consume the queue
-            worker_queue_factory = partial(get_worker_queue, executor, manager)
+            worker_queue_factory = partial(get_worker_queue, executor, manager, self.bulk)
             # DefaultDictWithKey passes the key to its factory function so that
             # the worker knows its db_alias without having to figure it out
             dbalias_to_workerqueue = DefaultDictWithKey(worker_queue_factory)
@@ -111,20 +144,20 @@ class SqlDataLoader(DataLoader):
         return self.object_filter.findall(model_label)
 
 
-def get_worker_queue(process_pool_executor, manager, db_alias):
+def get_worker_queue(process_pool_executor, manager, bulk, db_alias):
     """
     Instantiates a queue, and starts a worker task in its own process
     """
     queue = manager.JoinableQueue(maxsize=CHUNK_SIZE)
-    worker_task = process_pool_executor.submit(worker, queue, db_alias)
+    worker_task = process_pool_executor.submit(worker, queue, db_alias, bulk)
     return worker_task, queue
 
 
-def worker(queue, db_alias):
+def worker(queue, db_alias, bulk=False):
     """
     Pulls objects from queue and loads them into their DB.
     """
-    coro = load_data_for_db(db_alias)
+    coro = bulk_load_data_for_db(db_alias) if bulk else load_data_for_db(db_alias)
     next(coro)
     while True:
         obj = queue.get()
@@ -187,6 +220,100 @@ def load_data_for_db(db_alias):
     yield LoadStat(db_alias, model_counter)
 
 
+def bulk_load_data_for_db(db_alias):
+    """
+    A coroutine like ``load_data_for_db`` that collects objects by model
+    and inserts them in batches. Constraints are deferred until the
+    transaction commits, so batches may be inserted in any order.
+    """
+    model_counter = Counter()
+    pending = defaultdict(list)
+    with transaction.atomic(using=db_alias), \
+         constraint_checks_deferred(db_alias):
+        while True:
+            obj_dict = yield
+            if obj_dict is None:
+                break
+            for obj in PythonDeserializer([obj_dict], using=db_alias):
+                Model = type(obj.object)
+                if not router.allow_migrate_model(db_alias, Model):
+                    continue
+                model_counter.update([Model])
+                pending[Model].append(obj)
+                if len(pending[Model]) >= BULK_INSERT_SIZE:
+                    bulk_insert(db_alias, Model, pending.pop(Model))
+        for Model, objects in pending.items():
+            bulk_insert(db_alias, Model, objects)
+    print(f'Loading DB {db_alias!r} complete')
+    yield LoadStat(db_alias, model_counter)
+
+
+def bulk_insert(db_alias, Model, deserialized_objects):
+    """
+    Insert deserialized objects of one model like ``DeserializedObject.save``
+    does, i.e. raw, with field values as they were dumped.
+
+    Objects are copied with ``COPY`` if all of the model's fields can be
+    written as CSV, and are otherwise inserted with a multi-row
+    ``INSERT``, like ``bulk_create``. Objects without a primary key (models
+    dumped with natural keys) need their primary key to be set on insert,
+    so they are saved one at a time.
+    """
+    m = Model._meta
+    connection = connections[db_alias]
+    objects = [obj.object for obj in deserialized_objects if obj.object.pk is not None]
+    try:
+        if objects:
+            fields = m.local_concrete_fields
+            if connection.vendor == 'postgresql' and all(_can_copy(field) for field in fields):
+                _copy_insert(connection, Model, fields, objects)
+            else:
+                Model._base_manager.using(db_alias)._insert(objects, fields=fields, using=db_alias, raw=True)
+        for obj in deserialized_objects:
+            if obj.object.pk is None:
+                obj.save(using=db_alias, force_insert=True)
+            elif obj.m2m_data:
+                for accessor_name, object_list in obj.m2m_data.items():
+                    getattr(obj.object, accessor_name).set(object_list)
+    except DatabaseError as err:
+        logger.exception("Error saving data")
+        raise type(err)(
+            f'Could not load {len(deserialized_objects)} {m.app_label}.{m.object_name} '
+            f'objects in DB {db_alias!r}'
+        ) from err
+
+
+def _can_copy(field):
+    if field.is_relation:
+        field = field.target_field
+    return field.get_internal_type() in COPY_FIELD_TYPES
+
+
+def _copy_insert(connection, Model, fields, objects):
+    data = StringIO()
+    # Strings are quoted, so that empty strings are distinguished from NULL
+    writer = csv.writer(data, quoting=csv.QUOTE_NONNUMERIC)
+    for obj in objects:
+        writer.writerow([
+            _to_csv_value(field.get_db_prep_save(getattr(obj, field.attname), connection))
+            for field in fields
+        ])
+    data.seek(0)
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {qn(Model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)',
+            data
+        )
+
+
+def _to_csv_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
 @contextmanager
 def constraint_checks_deferred(db_alias):
     """
@@ -0,0 +1,117 @@
+"""
+Dump SQL data with a worker process per model and database
+
+Each model is dumped from each of its databases to its own gzipped file of
+JSON lines named ``sql-<index>-<model label>-<db alias>.gz``. The index
+orders the files so that models are loaded after the models they
+reference with foreign keys. Completed files are recorded in a progress
+file in the output directory, so an interrupted dump can be resumed by
+running it again with the same output directory.
+"""
+import gzip
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.db import connections
+
+from corehq.apps.dump_reload.sql.dump import (
+    APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP,
+    get_all_model_iterators_builders_for_domain,
+    get_db_aliases_for_model,
+    get_models_to_dump,
+    get_objects_to_dump_from_builders,
+)
+from corehq.apps.dump_reload.sql.serialization import JsonLinesSerializer
+from corehq.apps.dump_reload.util import ProgressFile, get_model_label
+
+PROGRESS_FILENAME = 'progress.json'
+
+DumpJob = namedtuple('DumpJob', 'slug model_label db_alias')
+
+
+def dump_sql_data_in_parallel(domain, excludes, includes, output_dir, max_workers, stdout):
+    """
+    :param output_dir: Directory to write dump files to. Files that are
+    recorded as complete in its progress file are not dumped again.
+    :return: Dict of ``{file slug: {model label: count}}`` for all the
+    files dumped to ``output_dir``. Files with no objects are deleted.
+    """
+    progress = ProgressFile(os.path.join(output_dir, PROGRESS_FILENAME))
+    jobs = [job for job in get_dump_jobs(excludes, includes) if job.slug not in progress]
+
+    # forked worker processes must not share the parent's connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(dump_model_from_db, domain, job, output_dir): job for job in jobs}
+        try:
+            for future in as_completed(futures):
+                job = futures[future]
+                progress[job.slug] = counts = future.result()
+                stdout.write('Dumped {} {} from {}\n'.format(
+                    sum(counts.values()), job.model_label, job.db_alias))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return dict(progress.items())
+
+
+def get_dump_jobs(excludes, includes):
+    jobs = []
+    models = sort_models_by_foreign_keys(list(get_models_to_dump(excludes, includes)))
+    for index, model_class in enumerate(models):
+        model_label = get_model_label(model_class)
+        for db_alias in get_db_aliases_for_model(model_class):
+            jobs.append(DumpJob(f'sql-{index:04d}-{model_label}-{db_alias}', model_label, db_alias))
+    return jobs
+
+
+def dump_model_from_db(domain, job, output_dir):
+    model_class = apps.get_model(job.model_label)
+    builders = get_all_model_iterators_builders_for_domain(
+        model_class, domain, APP_LABELS_WITH_FILTER_KWARGS_TO_DUMP[job.model_label], limit_to_db=job.db_alias
+    )
+    stats = Counter()
+    path = os.path.join(output_dir, f'{job.slug}.gz')
+    partial_path = f'{path}.partial'
+    with gzip.open(partial_path, 'wt') as stream:
+        JsonLinesSerializer().serialize(
+            get_objects_to_dump_from_builders(builders, stats),
+            use_natural_foreign_keys=False,
+            use_natural_primary_keys=True,
+            stream=stream
+        )
+    if stats:
+        os.replace(partial_path, path)
+    else:
+        os.remove(partial_path)
+    return dict(stats)
+
+
+def sort_models_by_foreign_keys(models):
+    """
+    Sort models so that each model comes after the models it references
+    with foreign keys. The order of ``models`` is kept where possible,
+    and is used to break dependency cycles.
+    """
+    def get_dependencies(model):
+        return {
+            field.related_model._meta.concrete_model
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not None
+        } - {model}
+
+    remaining = list(models)
+    dependencies = {model: get_dependencies(model) for model in remaining}
+    sorted_models = []
+    while remaining:
+        for model in remaining:
+            if not dependencies[model].intersection(remaining):
+                break
+        else:
+            model = remaining[0]
+        remaining.remove(model)
+        sorted_models.append(model)
+    return sorted_models
@@ -29,6 +29,7 @@ from corehq.apps.dump_reload.sql.load import (
     DefaultDictWithKey,
     constraint_checks_deferred,
 )
+from corehq.apps.dump_reload.sql.parallel_dump import sort_models_by_foreign_keys
 from corehq.apps.hqcase.utils import submit_case_blocks
 from corehq.apps.products.models import SQLProduct
 from corehq.apps.zapier.consts import EventTypes
@@ -58,9 +59,12 @@ from corehq.form_processor.tests.utils import (
 from corehq.messaging.scheduling.scheduling_partitioned.models import (
     AlertScheduleInstance,
 )
+from corehq.util.test_utils import flag_enabled
 
 
 class BaseDumpLoadTest(TestCase):
+    bulk_load = False
+
     @classmethod
     def setUpClass(cls):
         post_delete.disconnect(zapier_subscription_post_delete, sender=ZapierSubscription)
@@ -114,7 +118,7 @@ class BaseDumpLoadTest(TestCase):
         self.assertDictEqual(dict(expected_model_counts), dict(actual_model_counts))
 
         # Load
-        loader = SqlDataLoader(object_filter=load_filter)
+        loader = SqlDataLoader(object_filter=load_filter, bulk=self.bulk_load)
         loaded_model_counts = loader.load_objects(dump_lines)
 
         normalized_expected_loaded_counts = _normalize_object_counter(expected_load_counts, for_loaded=True)
@@ -267,6 +271,10 @@ class TestSQLDumpLoadShardedModels(BaseDumpLoadTest):
             self.assertEqual(str(pre), str(post))
 
 
+class TestSQLDumpBulkLoadShardedModels(TestSQLDumpLoadShardedModels):
+    bulk_load = True
+
+
 class TestSQLDumpLoad(BaseDumpLoadTest):
     def test_case_search_config(self):
         from corehq.apps.case_search.models import CaseSearchConfig, FuzzyProperties
@@ -450,9 +458,10 @@ class TestSQLDumpLoad(BaseDumpLoadTest):
         self.assertEqual(hierarchy, desired_hierarchy)
 
     def test_location(self):
-        from corehq.apps.locations.models import LocationType, SQLLocation
+        from corehq.apps.locations.models import LocationClosure, LocationType, SQLLocation
         from corehq.apps.locations.tests.util import setup_locations_and_types
-        expected_object_counts = Counter({LocationType: 3, SQLLocation: 11})
+        # a closure row for each location and each of its ancestors
+        expected_object_counts = Counter({LocationType: 3, SQLLocation: 11, LocationClosure: 26})
 
         location_type_names = ['province', 'district', 'city']
         location_structure = [
@@ -497,6 +506,14 @@ class TestSQLDumpLoad(BaseDumpLoadTest):
             ['Gauteng', 'Ekurhuleni ', 'Alberton', 'Benoni', 'Springs']
         )
 
+        with flag_enabled('LOCATION_CLOSURE_TABLE'):
+            result = SQLLocation.objects.get_locations_and_children(
+                [locations['Gauteng'].location_id], domain=self.domain_name)
+            self.assertItemsEqual(
+                [loc.name for loc in result],
+                ['Gauteng', 'Ekurhuleni ', 'Alberton', 'Benoni', 'Springs']
+            )
+
     def test_sms(self):
         from corehq.apps.sms.models import PhoneNumber, MessagingEvent, MessagingSubEvent
         expected_object_counts = Counter({PhoneNumber: 1, MessagingEvent: 1, MessagingSubEvent: 1})
@@ -707,6 +724,23 @@ class TestSqlLoadWithError(BaseDumpLoadTest):
             loader.load_objects(dump_lines)
 
 
+class TestSQLDumpBulkLoad(TestSQLDumpLoad):
+    bulk_load = True
+
+
+class TestSortModelsByForeignKeys(SimpleTestCase):
+
+    def test_referenced_models_first(self):
+        self.assertEqual(
+            sort_models_by_foreign_keys([CaseTransaction, CommCareCaseIndexSQL, CommCareCaseSQL, SQLProduct]),
+            [CommCareCaseSQL, CaseTransaction, CommCareCaseIndexSQL, SQLProduct],
+        )
+
+    def test_order_kept(self):
+        models = [SQLProduct, CommCareCaseSQL, XFormInstanceSQL]
+        self.assertEqual(sort_models_by_foreign_keys(models), models)
+
+
 class DefaultDictWithKeyTests(SimpleTestCase):
 
     def test_intended_use_case(self):
@@ -1,3 +1,6 @@
+import json
+import os
+
 from django.apps import apps
 
 from corehq.apps.dump_reload.exceptions import DomainDumpError
@@ -20,3 +23,33 @@ def get_model_class(model_label):
         raise DomainDumpError("Unknown model: %s.%s" % (app_label, model_label))
 
     return app_config, model
+
+
+class ProgressFile:
+    """
+    A dict of progress that is saved to a JSON file whenever it changes,
+    so that a long running dump or load can be resumed.
+    """
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as f:
+                self._progress = json.load(f)
+        else:
+            self._progress = {}
+
+    def __contains__(self, key):
+        return key in self._progress
+
+    def __getitem__(self, key):
+        return self._progress[key]
+
+    def __setitem__(self, key, value):
+        self._progress[key] = value
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._progress, f)
+        os.replace(tmp_path, self.path)
+
+    def items(self):
+        return self._progress.items()
@@ -99,6 +99,8 @@ FORM_EXPORT = 'form'
 CASE_EXPORT = 'case'
 SMS_EXPORT = 'sms'
 MAX_EXPORTABLE_ROWS = 100000
+# number of rows buffered per table before they are passed to the file writer
+EXPORT_WRITE_BATCH_SIZE = 1000
 CASE_SCROLL_SIZE = 10000
 
 # When a question is missing completely from a form/case this should be the value
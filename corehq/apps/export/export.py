@@ -12,7 +12,7 @@ from couchexport.models import Format
 from dimagi.utils.logging import notify_exception
 from soil import DownloadBase
 
-from corehq.apps.export.const import MAX_EXPORTABLE_ROWS
+from corehq.apps.export.const import EXPORT_WRITE_BATCH_SIZE, MAX_EXPORTABLE_ROWS
 from corehq.apps.export.dbaccessors import get_properly_wrapped_export_instance
 from corehq.apps.export.esaccessors import (
     get_case_export_base_query,
@@ -25,7 +25,8 @@ from corehq.apps.export.models.new import (
     SMSExportInstance,
 )
 from corehq.elastic import iter_es_docs_from_query
-from corehq.toggles import PAGINATED_EXPORTS
+from corehq.apps.export.row_plan import ExportRowPlan
+from corehq.toggles import EXPORT_ROW_PLAN, PAGINATED_EXPORTS
 from corehq.util.metrics.load_counters import load_counter
 from corehq.util.files import TransientTempfile, safe_filename
 from soil.progress import TaskProgressManager
@@ -46,7 +47,47 @@ class ExportFile(object):
         self.file.close()
 
 
-class _ExportWriter(object):
+class _BatchedWriterMixin(object):
+    """
+    Buffers rows for each table and passes them to the couchexport.ExportWriter
+    in blocks of ``batch_size`` rows. Buffered rows are flushed when the
+    writer is closed.
+    """
+    batch_size = EXPORT_WRITE_BATCH_SIZE
+
+    def write(self, table, row):
+        """
+        Write the given row to the given table of the export.
+        :param table: A TableConfiguration
+        :param row: An ExportRow
+        """
+        self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        buffer = self._buffers.setdefault(table, [])
+        buffer.extend(rows)
+        if len(buffer) >= self.batch_size:
+            self._flush_table(table)
+
+    def flush(self):
+        for table in list(self._buffers):
+            self._flush_table(table)
+
+    def _flush_table(self, table):
+        rows = self._buffers.pop(table, None)
+        if rows:
+            self._write_batch(table, rows)
+
+    def _write_batch(self, table, rows):
+        raise NotImplementedError
+
+
+class _ExportWriter(_BatchedWriterMixin):
     """
     An object that provides a friendlier interface to couchexport.ExportWriters.
     """
@@ -56,6 +97,7 @@ class _ExportWriter(object):
         self.writer = writer
         self.format = writer.format
         self.path = temp_path
+        self._buffers = {}
 
     @contextlib.contextmanager
     def open(self, export_instances):
@@ -97,30 +139,28 @@ class _ExportWriter(object):
             self.writer.open(headers, file, table_titles=table_titles, archive_basepath=name)
             try:
                 yield
+                self.flush()
             finally:
                 self.writer.close()
 
-    def write(self, table, row):
-        """
-        Write the given row to the given table of the export.
-        _Writer must be opened first.
-        :param table: A TableConfiguration
-        :param row: An ExportRow
-        """
-        return self.writer.write([
-            (table, [FormattedRow(
-                data=row.data,
-                hyperlink_column_indices=row.hyperlink_column_indices,
-                skip_excel_formatting=row.skip_excel_formatting
-                if hasattr(row, 'skip_excel_formatting') else ()
-            )])
+    def _write_batch(self, table, rows):
+        self.writer.write([
+            (table, [
+                FormattedRow(
+                    data=row.data,
+                    hyperlink_column_indices=row.hyperlink_column_indices,
+                    skip_excel_formatting=row.skip_excel_formatting
+                    if hasattr(row, 'skip_excel_formatting') else ()
+                )
+                for row in rows
+            ])
         ])
 
     def get_preview(self):
         return self.writer.get_preview()
 
 
-class _PaginatedExportWriter(object):
+class _PaginatedExportWriter(_BatchedWriterMixin):
 
     def __init__(self, writer, temp_path):
         self.format = writer.format
@@ -130,6 +170,7 @@ class _PaginatedExportWriter(object):
         # An instance of a couchexport.ExportWriter
         self.writer = writer
         self.file_handle = None
+        self._buffers = {}
 
     @contextlib.contextmanager
     def open(self, export_instances):
@@ -151,6 +192,7 @@ class _PaginatedExportWriter(object):
             )
             try:
                 yield
+                self.flush()
             finally:
                 self.writer.close()
 
@@ -248,24 +290,27 @@ class _PaginatedExportWriter(object):
             )
         return paginated_table_titles
 
-    def write(self, table, row):
+    def _write_batch(self, table, rows):
         """
-        Write the given row to the given table of the export.
+        Write the given rows to the given table of the export.
         Will automatically open a new table and write to that if it
         has exceeded the number of rows written in the first table.
-        :param table: A TableConfiguration
-        :param row: An ExportRow
         """
-        if self.rows_written[table] >= MAX_EXPORTABLE_ROWS * (self.pages[table] + 1):
-            self.pages[table] += 1
-            self.writer.add_table(
-                self._paged_table_index(table),
-                self._get_paginated_headers()[self._paged_table_index(table)][0],
-                table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
-            )
+        while rows:
+            if self.rows_written[table] >= MAX_EXPORTABLE_ROWS * (self.pages[table] + 1):
+                self.pages[table] += 1
+                self.writer.add_table(
+                    self._paged_table_index(table),
+                    self._get_paginated_headers()[self._paged_table_index(table)][0],
+                    table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                )
 
-        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
-        self.rows_written[table] += 1
+            page_space = MAX_EXPORTABLE_ROWS * (self.pages[table] + 1) - self.rows_written[table]
+            page_rows, rows = rows[:page_space], rows[page_space:]
+            self.writer.write([
+                (self._paged_table_index(table), [FormattedRow(data=row.data) for row in page_rows])
+            ])
+            self.rows_written[table] += len(page_rows)
 
 
 def get_export_writer(export_instances, temp_path, allow_pagination=True):
@@ -355,6 +400,9 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
         total_bytes = 0
         total_rows = 0
         track_load = load_counter(export_instance.type, "export", export_instance.domain)
+        row_plan = None
+        if EXPORT_ROW_PLAN.enabled(export_instance.domain):
+            row_plan = ExportRowPlan(export_instance.selected_tables)
 
         for row_number, doc in enumerate(documents):
             total_bytes += sys.getsizeof(doc)
@@ -365,6 +413,7 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
                         row_number,
                         split_columns=export_instance.split_multiselects,
                         transform_dates=export_instance.transform_dates,
+                        row_plan=row_plan,
                     )
                 except Exception as e:
                     notify_exception(None, "Error exporting doc", details={
@@ -376,11 +425,7 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
                     e.sentry_capture = False
                     raise
 
-                for row in rows:
-                    # It might be bad to write one row at a time from a performance perspective.
-                    # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                    writer.write(table, row)
-
+                writer.write_rows(table, rows)
                 total_rows += len(rows)
 
             track_load()
@@ -0,0 +1,106 @@
+import time
+
+from django.core.management import BaseCommand
+
+from corehq.apps.export.models import (
+    ExportColumn,
+    MultipleChoiceItem,
+    Option,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    SplitExportColumn,
+    TableConfiguration,
+)
+from corehq.apps.export.row_plan import ExportRowPlan
+
+
+class Command(BaseCommand):
+    """Compare generating export rows with and without an ExportRowPlan
+
+    No database access is needed: forms and tables are built in memory.
+    The rows from both are checked to be identical.
+
+    Usage: ./manage.py benchmark_export_rows --forms 10000 --questions 100 --repeats 5
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forms', type=int, default=10000)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--repeats', type=int, default=5)
+        parser.add_argument('--split-multiselects', action='store_true')
+        parser.add_argument('--transform-dates', action='store_true')
+
+    def handle(self, forms, questions, repeats, split_multiselects, transform_dates, **options):
+        print("Building {} forms with {} questions and {} repeat iterations".format(forms, questions, repeats))
+        tables = _get_tables(questions)
+        docs = [_get_form(num, questions, repeats) for num in range(forms)]
+        kwargs = {'split_columns': split_multiselects, 'transform_dates': transform_dates}
+
+        current_rows, current_time = _get_rows(tables, docs, kwargs)
+        plan_rows, plan_time = _get_rows(tables, docs, dict(kwargs, row_plan=ExportRowPlan(tables)))
+
+        print("current:   {:.2f}s".format(current_time))
+        print("row plan:  {:.2f}s".format(plan_time))
+        print("speedup:   {:.2f}x".format(current_time / plan_time))
+        print("rows:      {}, identical: {}".format(len(plan_rows), current_rows == plan_rows))
+
+
+def _get_rows(tables, docs, kwargs):
+    rows = []
+    start = time.time()
+    for row_number, doc in enumerate(docs):
+        for table in tables:
+            rows.extend(row.data for row in table.get_rows(doc, row_number, **kwargs))
+    return rows, time.time() - start
+
+
+def _get_tables(questions):
+    form = PathNode(name='form')
+    repeat = PathNode(name='repeat', is_repeat=True)
+    nested = PathNode(name='nested', is_repeat=True)
+
+    def columns(base_path):
+        yield RowNumberColumn(selected=True, repeat=len(base_path) - 1 if base_path else 0)
+        for num in range(questions):
+            path = base_path + [PathNode(name='group{}'.format(num % 10)), PathNode(name='q{}'.format(num))]
+            yield ExportColumn(item=ScalarItem(path=path), selected=True)
+        yield SplitExportColumn(
+            item=MultipleChoiceItem(
+                path=base_path + [PathNode(name='choices')],
+                options=[Option(value='a'), Option(value='b'), Option(value='c')],
+            ),
+            selected=True,
+        )
+
+    return [
+        TableConfiguration(path=[], selected=True, columns=list(columns([form]))),
+        TableConfiguration(path=[form, repeat], selected=True, columns=list(columns([form, repeat]))),
+        TableConfiguration(
+            path=[form, repeat, nested], selected=True, columns=list(columns([form, repeat, nested]))
+        ),
+    ]
+
+
+def _get_group_values(questions, prefix):
+    groups = {}
+    for num in range(questions):
+        if num % 3:
+            groups.setdefault('group{}'.format(num % 10), {})['q{}'.format(num)] = '{} {}'.format(prefix, num)
+    groups['choices'] = 'a c other'
+    return groups
+
+
+def _get_form(num, questions, repeats):
+    form = _get_group_values(questions, 'form')
+    form['repeat'] = []
+    for _ in range(repeats):
+        repeat = _get_group_values(questions, 'repeat')
+        repeat['nested'] = [_get_group_values(questions, 'nested') for _ in range(2)]
+        form['repeat'].append(repeat)
+    return {
+        '_id': 'form-{}'.format(num),
+        'domain': 'benchmark',
+        'received_on': '2020-01-01T10:00:00.000000Z',
+        'form': form,
+    }
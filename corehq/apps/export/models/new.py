@@ -240,6 +240,10 @@ class ExportItem(DocumentSchema, ReadablePathMixin):
         return item
 
 
+# default for ExportColumn.get_value's raw_value, which may be None
+NOT_LOOKED_UP = object()
+
+
 class ExportColumn(DocumentSchema):
     """
     The model that represents a column in an export. Each column has a one-to-one
@@ -258,7 +262,8 @@ class ExportColumn(DocumentSchema):
     # A transforms that deidentifies the value
     deid_transform = StringProperty(choices=list(DEID_TRANSFORM_FUNCTIONS))
 
-    def get_value(self, domain, doc_id, doc, base_path, transform_dates=False, row_index=None, split_column=False):
+    def get_value(self, domain, doc_id, doc, base_path, transform_dates=False, row_index=None, split_column=False,
+                  raw_value=NOT_LOOKED_UP):
         """
         Get the value of self.item of the given doc.
         When base_path is [], doc is a form submission or case,
@@ -271,12 +276,16 @@ class ExportColumn(DocumentSchema):
         :param row_index: This is used for the RowExportColumn to determine what index the row is on
         :param split_column: When True will split SplitExportColumn into multiple columns, when False, it will
             not split the column
+        :param raw_value: The value at the item's path in doc, if it has already been
+            looked up (see corehq.apps.export.row_plan)
         :return:
         """
         assert base_path == self.item.path[:len(base_path)], "ExportItem's path doesn't start with the base_path"
-        # Get the path from the doc root to the desired ExportItem
-        path = [x.name for x in self.item.path[len(base_path):]]
-        return self._transform(NestedDictGetter(path)(doc), doc, transform_dates)
+        if raw_value is NOT_LOOKED_UP:
+            # Get the path from the doc root to the desired ExportItem
+            path = [x.name for x in self.item.path[len(base_path):]]
+            raw_value = NestedDictGetter(path)(doc)
+        return self._transform(raw_value, doc, transform_dates)
 
     def _transform(self, value, doc, transform_dates):
         """
@@ -483,18 +492,25 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
         return headers
 
     def get_rows(self, document, row_number, split_columns=False,
-                 transform_dates=False, as_json=False):
+                 transform_dates=False, as_json=False, row_plan=None):
         """
         Return a list of ExportRows generated for the given document.
         :param document: dictionary representation of a form submission or case
         :param row_number: number indicating this documents index in the sequence of all documents in the export
         :param as_json: optional parameter, mainly used in APIs, to spit out
                         the data as a json-ready dict
+        :param row_plan: optional ExportRowPlan including this table, used to expand
+                        repeat groups and look up column values for all tables at once
         :return: List of ExportRows
         """
         document_id = document.get('_id')
 
-        sub_documents = self._get_sub_documents(document, row_number, document_id=document_id)
+        sub_documents = None
+        if row_plan is not None:
+            sub_documents = row_plan.get_sub_documents(self, document, row_number)
+        if sub_documents is None:
+            row_plan = None
+            sub_documents = self._get_sub_documents(document, row_number, document_id=document_id)
 
         domain = document.get('domain')
 
@@ -508,7 +524,11 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
             row_data = {} if as_json else []
             col_index = 0
             skip_excel_formatting = []
-            for col in self.selected_columns:
+            raw_values = row_plan.get_raw_values(self, doc) if row_plan is not None else None
+            for column_number, col in enumerate(self.selected_columns):
+                kwargs = {}
+                if raw_values is not None and column_number in raw_values:
+                    kwargs['raw_value'] = raw_values[column_number]
                 val = col.get_value(
                     domain,
                     document_id,
@@ -517,6 +537,7 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
                     row_index=row_index,
                     split_column=split_columns,
                     transform_dates=transform_dates,
+                    **kwargs
                 )
                 if as_json:
                     for index, header in enumerate(col.get_headers(split_column=split_columns)):
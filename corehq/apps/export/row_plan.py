@@ -0,0 +1,156 @@
+"""
+Precompiled path plan for generating the rows of all of an export's tables.
+
+``TableConfiguration.get_rows`` expands the repeat groups on its table's
+path and looks up the path of every column separately, for every document
+and every table. ``ExportRowPlan`` builds two kinds of trie once per export
+instead:
+
+- a trie of the paths of all the tables. It is walked once per document
+  and expands each repeat group once, however many tables are below it.
+- a trie of the paths of each table's columns, relative to the table. It
+  is walked once per row and looks up the value of every column in one pass.
+
+The values are then passed to the columns, which transform them as usual,
+so rows are the same as those generated without a plan.
+"""
+from corehq.apps.export.models.new import (
+    DocRow,
+    ExportColumn,
+    MultiMediaExportColumn,
+    SplitExportColumn,
+    SplitGPSExportColumn,
+)
+
+# column types whose value is the value at their item's path, transformed
+PLANNED_COLUMN_TYPES = (
+    ExportColumn,
+    MultiMediaExportColumn,
+    SplitExportColumn,
+    SplitGPSExportColumn,
+)
+
+
+class ExportRowPlan(object):
+
+    def __init__(self, tables):
+        self._root = _TableNode()
+        self._column_tries = {}
+        for table in tables:
+            node = self._root
+            for path_node in table.path:
+                node = node.children.setdefault((path_node.name, path_node.is_repeat), _TableNode())
+            node.tables.append(table)
+            self._column_tries[id(table)] = _ColumnTrie(table)
+
+        self._document = None
+        self._row_number = None
+        self._sub_documents = {}
+
+    def get_sub_documents(self, table, document, row_number):
+        """
+        :returns: list of ``DocRow`` for the table, like
+        ``TableConfiguration._get_sub_documents``, or ``None`` if the table
+        is not part of this plan. All tables' sub documents are expanded
+        together the first time this is called for a document.
+        """
+        if id(table) not in self._column_tries:
+            return None
+        if document is not self._document or row_number != self._row_number:
+            self._sub_documents = self._expand(document, row_number)
+            self._document = document
+            self._row_number = row_number
+        return self._sub_documents.get(id(table), [])
+
+    def get_raw_values(self, table, doc):
+        """
+        :returns: dict of the value at each of the table's selected columns'
+        paths in ``doc`` by column index. Columns that look up their own
+        values are not included.
+        """
+        return self._column_tries[id(table)].get_values(doc)
+
+    def _expand(self, document, row_number):
+        sub_documents = {}
+        stack = [(self._root, [DocRow(row=(row_number,), doc=document)])]
+        while stack:
+            node, row_docs = stack.pop()
+            for table in node.tables:
+                sub_documents[id(table)] = row_docs
+            if not row_docs:
+                continue
+            for (name, is_repeat), child in node.children.items():
+                stack.append((child, _get_child_doc_rows(row_docs, name, is_repeat)))
+        return sub_documents
+
+
+class _TableNode(object):
+    __slots__ = ('children', 'tables')
+
+    def __init__(self):
+        self.children = {}
+        self.tables = []
+
+
+def _get_child_doc_rows(row_docs, name, is_repeat):
+    # one step of TableConfiguration._get_sub_documents_helper
+    new_docs = []
+    for row_doc in row_docs:
+        doc = row_doc.doc
+        if isinstance(doc, dict):
+            next_doc = doc.get(name, {})
+        else:
+            next_doc = {}
+        if is_repeat:
+            if type(next_doc) != list:
+                # This happens when a repeat group has a single repeat iteration
+                next_doc = [next_doc]
+            new_docs.extend(
+                DocRow(row=row_doc.row + (new_doc_index,), doc=new_doc)
+                for new_doc_index, new_doc in enumerate(next_doc)
+            )
+        elif next_doc:
+            new_docs.append(DocRow(row=row_doc.row, doc=next_doc))
+    return new_docs
+
+
+class _ColumnNode(object):
+    __slots__ = ('children', 'column_indices')
+
+    def __init__(self):
+        self.children = {}
+        self.column_indices = []
+
+
+class _ColumnTrie(object):
+
+    def __init__(self, table):
+        self._root = _ColumnNode()
+        self._template = {}
+        base_path = table.path
+        for index, column in enumerate(table.selected_columns):
+            path = column.item.path if column.item else None
+            if type(column) not in PLANNED_COLUMN_TYPES or not path or path[:len(base_path)] != base_path:
+                continue
+            # same as NestedDictGetter, which returns None for an empty path
+            self._template[index] = None
+            names = [path_node.name for path_node in path[len(base_path):]]
+            if not names:
+                continue
+            node = self._root
+            for name in names:
+                node = node.children.setdefault(name, _ColumnNode())
+            node.column_indices.append(index)
+
+    def get_values(self, doc):
+        values = dict(self._template)
+        stack = [(self._root, doc)]
+        while stack:
+            node, value = stack.pop()
+            for index in node.column_indices:
+                values[index] = value
+            if isinstance(value, dict):
+                for name, child in node.children.items():
+                    if name in value:
+                        stack.append((child, value[name]))
+        return values
@@ -136,6 +136,45 @@ class WriterTest(SimpleTestCase):
         })
         self.assertTrue(export_save.called)
 
+    @patch('corehq.apps.export.models.FormExportInstance.save')
+    @patch.object(_ExportWriter, 'batch_size', 4)
+    def test_batched_writes(self, export_save):
+        export_instance = FormExportInstance(
+            export_format=Format.JSON,
+            tables=[
+                TableConfiguration(
+                    label="My table",
+                    selected=True,
+                    columns=[
+                        ExportColumn(
+                            label="Q3",
+                            item=ScalarItem(
+                                path=[PathNode(name='form'), PathNode(name='q3')],
+                            ),
+                            selected=True
+                        ),
+                    ]
+                )
+            ]
+        )
+
+        with TransientTempfile() as temp_path:
+            writer = _ExportWriter(get_writer(Format.JSON), temp_path)
+            with patch.object(writer.writer, 'write', wraps=writer.writer.write) as write:
+                with writer.open([export_instance]):
+                    write_export_instance(writer, export_instance, self.docs * 3)
+                    # the last two rows are still buffered
+                    self.assertEqual(write.call_count, 1)
+                self.assertEqual(write.call_count, 2)
+
+            with ExportFile(writer.path, writer.format) as export:
+                self.assertEqual(json.loads(export.read()), {
+                    'My table': {
+                        'headers': ['Q3'],
+                        'rows': [['baz'], ['bop']] * 3,
+                    }
+                })
+
     @patch('corehq.apps.export.models.FormExportInstance.save')
     @patch('corehq.apps.export.export.MAX_EXPORTABLE_ROWS', 2)
     @flag_enabled('PAGINATED_EXPORTS')
@@ -0,0 +1,170 @@
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.export.const import CASE_CLOSE_TO_BOOLEAN
+from corehq.apps.export.models import (
+    CaseIndexExportColumn,
+    CaseIndexItem,
+    ExportColumn,
+    GeopointItem,
+    MultipleChoiceItem,
+    Option,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    SplitExportColumn,
+    SplitGPSExportColumn,
+    TableConfiguration,
+)
+from corehq.apps.export.row_plan import ExportRowPlan
+
+FORM = PathNode(name='form')
+REPEAT = PathNode(name='repeat', is_repeat=True)
+GROUP = PathNode(name='group')
+NESTED = PathNode(name='nested', is_repeat=True)
+
+
+def _column(*path, **kwargs):
+    return ExportColumn(item=ScalarItem(path=list(path), **kwargs), selected=True)
+
+
+def _tables():
+    main_table = TableConfiguration(
+        path=[],
+        selected=True,
+        columns=[
+            RowNumberColumn(selected=True),
+            _column(FORM, PathNode(name='name')),
+            _column(FORM, PathNode(name='name'), transform=CASE_CLOSE_TO_BOOLEAN),
+            _column(FORM, GROUP, PathNode(name='date')),
+            _column(FORM, GROUP, PathNode(name='text')),
+            _column(FORM, GROUP),
+            _column(PathNode(name='received_on')),
+            ExportColumn(item=ScalarItem(path=[FORM, PathNode(name='unselected')]), selected=False),
+            SplitExportColumn(
+                item=MultipleChoiceItem(
+                    path=[FORM, PathNode(name='choices')],
+                    options=[Option(value='a'), Option(value='b')],
+                ),
+                selected=True,
+            ),
+            SplitGPSExportColumn(item=GeopointItem(path=[FORM, PathNode(name='gps')]), selected=True),
+            CaseIndexExportColumn(
+                item=CaseIndexItem(path=[PathNode(name='indices')], case_type='parent'),
+                selected=True,
+            ),
+        ]
+    )
+    repeat_table = TableConfiguration(
+        path=[FORM, REPEAT],
+        selected=True,
+        columns=[
+            RowNumberColumn(selected=True, repeat=1),
+            _column(FORM, REPEAT, PathNode(name='q1')),
+            _column(FORM, REPEAT, GROUP, PathNode(name='q2')),
+            _column(FORM, REPEAT),
+        ]
+    )
+    nested_table = TableConfiguration(
+        path=[FORM, REPEAT, GROUP, NESTED],
+        selected=True,
+        columns=[
+            RowNumberColumn(selected=True, repeat=2),
+            _column(FORM, REPEAT, GROUP, NESTED, PathNode(name='q3')),
+        ]
+    )
+    group_table = TableConfiguration(
+        path=[FORM, GROUP],
+        selected=True,
+        columns=[_column(FORM, GROUP, PathNode(name='text'))],
+    )
+    return [main_table, repeat_table, nested_table, group_table]
+
+
+def _docs():
+    base = {'domain': 'row-plan', 'received_on': '2020-01-01T10:00:00.000000Z'}
+    forms = [
+        {
+            'name': 'one',
+            'group': {'date': '2020-02-03', 'text': {'#text': 'hello', '@id': '1'}},
+            'choices': 'a c',
+            'gps': '1.0 2.0 3.0 4.0',
+            'repeat': [
+                {'q1': 'r1', 'group': {'q2': 'g1', 'nested': [{'q3': 'n1'}, {'q3': 'n2'}]}},
+                {'q1': 'r2', 'group': {'nested': {'q3': 'n3'}}},
+                {'q1': ['x', {'a': 1}]},
+            ],
+        },
+        {
+            'name': None,
+            'group': {'text': {'no_text': 'x'}},
+            'choices': '',
+            'gps': None,
+            'repeat': {'q1': 'single', 'group': 'not a dict'},
+        },
+        {
+            'group': 'not a dict',
+            'repeat': [],
+        },
+        {
+            'name': {'#text': 'attrs'},
+            'repeat': ['not a dict', {'group': {'nested': []}}],
+        },
+    ]
+    docs = []
+    for index, form in enumerate(forms):
+        doc = dict(base, _id='doc-{}'.format(index), form=form)
+        docs.append(doc)
+    docs.append(dict(base, _id='no-form', indices=[
+        {'referenced_type': 'parent', 'referenced_id': 'p1'},
+        {'referenced_type': 'other', 'referenced_id': 'o1'},
+    ]))
+    docs.append(dict(base, _id='form-not-a-dict', form='text'))
+    return docs
+
+
+class ExportRowPlanTest(SimpleTestCase):
+
+    def assertSameRows(self, split_columns, transform_dates):
+        tables = _tables()
+        row_plan = ExportRowPlan(tables)
+        for row_number, doc in enumerate(_docs()):
+            for table in tables:
+                kwargs = dict(split_columns=split_columns, transform_dates=transform_dates)
+                expected = table.get_rows(doc, row_number, **kwargs)
+                actual = table.get_rows(doc, row_number, row_plan=row_plan, **kwargs)
+                self.assertEqual(
+                    [(row.data, row.skip_excel_formatting) for row in actual],
+                    [(row.data, row.skip_excel_formatting) for row in expected],
+                    '{} {}'.format(doc['_id'], table.path),
+                )
+
+    def test_same_rows(self):
+        self.assertSameRows(split_columns=False, transform_dates=False)
+
+    def test_same_rows_split_columns(self):
+        self.assertSameRows(split_columns=True, transform_dates=False)
+
+    def test_same_rows_transform_dates(self):
+        self.assertSameRows(split_columns=True, transform_dates=True)
+
+    def test_repeat_expanded_once(self):
+        tables = _tables()
+        row_plan = ExportRowPlan(tables)
+        doc = _docs()[0]
+        with patch.object(row_plan, '_expand', wraps=row_plan._expand) as expand:
+            sub_documents = row_plan.get_sub_documents(tables[2], doc, 0)
+            for table in tables:
+                row_plan.get_sub_documents(table, doc, 0)
+        self.assertEqual([doc_row.row for doc_row in sub_documents], [(0, 0, 0), (0, 0, 1), (0, 1, 0)])
+        self.assertEqual(expand.call_count, 1)
+
+    def test_table_not_in_plan(self):
+        tables = _tables()
+        row_plan = ExportRowPlan(tables[:1])
+        self.assertIsNone(row_plan.get_sub_documents(tables[1], _docs()[0], 0))
+        self.assertEqual(
+            [row.data for row in tables[1].get_rows(_docs()[0], 0, row_plan=row_plan)],
+            [row.data for row in tables[1].get_rows(_docs()[0], 0)],
+        )
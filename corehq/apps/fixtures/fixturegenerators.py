@@ -7,10 +7,17 @@ from casexml.apps.phone.fixtures import FixtureProvider
 from casexml.apps.phone.utils import (
     GLOBAL_USER_ID,
     get_or_cache_global_fixture,
+    write_fixture_items_to_io,
 )
 
+from corehq import toggles
 from corehq.apps.fixtures.dbaccessors import iter_fixture_items_for_data_type
-from corehq.apps.fixtures.models import FIXTURE_BUCKET, FixtureDataType
+from corehq.apps.fixtures.item_set_cache import FixtureItemSetCache
+from corehq.apps.fixtures.models import (
+    FIXTURE_BUCKET,
+    FixtureDataItem,
+    FixtureDataType,
+)
 from corehq.apps.products.fixtures import product_fixture_generator_json
 from corehq.apps.programs.fixtures import program_fixture_generator_json
 
@@ -65,7 +72,10 @@ class ItemListsProvider(FixtureProvider):
         if global_types:
             items.extend(self.get_global_items(global_types, restore_state))
         if user_types:
-            items.extend(self.get_user_items(user_types, restore_user))
+            if toggles.FIXTURE_ITEM_SET_CACHE.enabled(restore_user.domain):
+                items.extend(self.get_cached_user_items(user_types, restore_state))
+            else:
+                items.extend(self.get_user_items(user_types, restore_user))
         return items
 
     def get_global_items(self, global_types, restore_state):
@@ -82,8 +92,30 @@ class ItemListsProvider(FixtureProvider):
         return self._get_fixtures(global_types, get_items_by_type, GLOBAL_USER_ID)
 
     def get_user_items(self, user_types, restore_user):
+        return self._get_user_fixtures(user_types, restore_user.get_fixture_data_items(), restore_user.user_id)
+
+    def get_cached_user_items(self, user_types, restore_state):
+        """Get user items, sharing the serialized fixtures between users
+        that own the same items
+        """
+        restore_user = restore_state.restore_user
+        item_ids = restore_user.get_fixture_data_item_ids()
+        item_set_cache = FixtureItemSetCache(restore_user.domain, list(user_types), item_ids)
+
+        data = None if restore_state.overwrite_cache else item_set_cache.get()
+        if data is None:
+            items = FixtureDataItem.by_ids(restore_user.domain, item_ids)
+            fixtures = self._get_user_fixtures(user_types, items, GLOBAL_USER_ID)
+            data = write_fixture_items_to_io(fixtures).read()
+            item_set_cache.set(data)
+
+        global_id = GLOBAL_USER_ID.encode('utf-8')
+        b_user_id = restore_user.user_id.encode('utf-8')
+        return [data.replace(global_id, b_user_id)]
+
+    def _get_user_fixtures(self, user_types, user_items, user_id):
         items_by_type = defaultdict(list)
-        for item in restore_user.get_fixture_data_items():
+        for item in user_items:
             data_type = user_types.get(item.data_type_id)
             if data_type:
                 self._set_cached_type(item, data_type)
@@ -93,7 +125,7 @@ class ItemListsProvider(FixtureProvider):
             return sorted(items_by_type.get(data_type, []),
                           key=attrgetter('sort_key'))
 
-        return self._get_fixtures(user_types, get_items_by_type, restore_user.user_id)
+        return self._get_fixtures(user_types, get_items_by_type, user_id)
 
     def _set_cached_type(self, item, data_type):
         # set the cached version used by the object so that it doesn't
@@ -0,0 +1,73 @@
+"""
+Cache of serialized user lookup table fixtures
+
+Users that own the same lookup table items, through groups or locations,
+get the same user (non-global) lookup table fixtures, except for the user
+id attribute. Fixtures are cached with a placeholder user id under a key
+made from a hash of the item ids and a version for each data type. A data
+type's version is replaced when the lookup table is changed, which
+orphans all cached fixtures that include that table.
+"""
+import hashlib
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from corehq.util.metrics import metrics_counter
+
+ITEM_SET_CACHE_TIMEOUT = 24 * 60 * 60
+# longer than ITEM_SET_CACHE_TIMEOUT so that fixtures aren't orphaned by versions expiring
+VERSION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _get_version_key(data_type_id):
+    return 'fixture-data-type-version-{}'.format(data_type_id)
+
+
+def get_data_type_versions(data_type_ids):
+    """
+    :returns: A dict of `{data_type_id: version}`
+    """
+    keys = {_get_version_key(data_type_id): data_type_id for data_type_id in data_type_ids}
+    versions = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid4().hex, VERSION_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return {data_type_id: versions.get(key) for key, data_type_id in keys.items()}
+
+
+def invalidate_fixture_item_sets(data_type_ids):
+    cache.set_many({
+        _get_version_key(data_type_id): uuid4().hex
+        for data_type_id in data_type_ids
+    }, VERSION_TIMEOUT)
+
+
+class FixtureItemSetCache(object):
+
+    def __init__(self, domain, data_type_ids, item_ids):
+        """
+        :param data_type_ids: Ids of the domain's user data types.
+        :param item_ids: Ids of the items owned by the user.
+        """
+        self.domain = domain
+        versions = get_data_type_versions(data_type_ids)
+        item_set_hash = hashlib.md5()
+        for data_type_id in sorted(versions):
+            item_set_hash.update('{}:{};'.format(data_type_id, versions[data_type_id]).encode('utf-8'))
+        for item_id in sorted(item_ids):
+            item_set_hash.update('{};'.format(item_id).encode('utf-8'))
+        self.key = 'fixture-item-set-{}-{}'.format(domain, item_set_hash.hexdigest())
+
+    def get(self):
+        data = cache.get(self.key)
+        metrics_counter('commcare.fixtures.item_set_cache', tags={
+            'domain': self.domain,
+            'result': 'miss' if data is None else 'hit',
+        })
+        return data
+
+    def set(self, data):
+        cache.set(self.key, data, ITEM_SET_CACHE_TIMEOUT)
@@ -30,6 +30,7 @@ from corehq.apps.fixtures.exceptions import (
     FixtureTypeCheckError,
     FixtureVersionError,
 )
+from corehq.apps.fixtures.item_set_cache import invalidate_fixture_item_sets
 from corehq.apps.fixtures.utils import (
     clean_fixture_field_name,
     get_fields_without_attributes,
@@ -120,6 +121,8 @@ class FixtureDataType(QuickCachedDocumentMixin, Document):
     def clear_caches(self):
         super(FixtureDataType, self).clear_caches()
         get_fixture_data_types.clear(self.domain)
+        if getattr(self, '_id', False):
+            invalidate_fixture_item_sets([self._id])
 
 
 class FixtureItemField(DocumentSchema):
@@ -392,30 +395,34 @@ class FixtureDataItem(Document):
             )
         )
         if wrap:
-            results = cls.get_db().view('_all_docs', keys=list(fixture_ids), include_docs=True)
-
-            # sort the results into those corresponding to real documents
-            # and those corresponding to deleted or non-existent documents
-            docs = []
-            deleted_fixture_ids = set()
-
-            for result in results:
-                if result.get('doc'):
-                    docs.append(cls.wrap(result['doc']))
-                elif result.get('error'):
-                    assert result['error'] == 'not_found'
-                    deleted_fixture_ids.add(result['key'])
-                else:
-                    assert result['value']['deleted'] is True
-                    deleted_fixture_ids.add(result['id'])
-            if deleted_fixture_ids:
-                # delete ownership documents pointing deleted/non-existent fixture documents
-                # this cleanup is necessary since we used to not do this
-                remove_deleted_ownerships.delay(list(deleted_fixture_ids), user.domain)
-            return docs
+            return cls.by_ids(user.domain, fixture_ids)
         else:
             return fixture_ids
 
+    @classmethod
+    def by_ids(cls, domain, fixture_ids):
+        results = cls.get_db().view('_all_docs', keys=list(fixture_ids), include_docs=True)
+
+        # sort the results into those corresponding to real documents
+        # and those corresponding to deleted or non-existent documents
+        docs = []
+        deleted_fixture_ids = set()
+
+        for result in results:
+            if result.get('doc'):
+                docs.append(cls.wrap(result['doc']))
+            elif result.get('error'):
+                assert result['error'] == 'not_found'
+                deleted_fixture_ids.add(result['key'])
+            else:
+                assert result['value']['deleted'] is True
+                deleted_fixture_ids.add(result['id'])
+        if deleted_fixture_ids:
+            # delete ownership documents pointing deleted/non-existent fixture documents
+            # this cleanup is necessary since we used to not do this
+            remove_deleted_ownerships.delay(list(deleted_fixture_ids), domain)
+        return docs
+
     @classmethod
     def by_group(cls, group, wrap=True):
         fixture_ids = cls.get_db().view('fixtures/ownership',
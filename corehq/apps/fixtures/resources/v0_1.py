@@ -10,6 +10,7 @@ from corehq.apps.api.resources import CouchResourceMixin, HqBaseResource
 from corehq.apps.api.resources.auth import RequirePermissionAuthentication
 from corehq.apps.api.resources.meta import CustomResourceMeta
 from corehq.apps.api.util import get_object_or_not_exist
+from corehq.apps.fixtures.item_set_cache import invalidate_fixture_item_sets
 from corehq.apps.fixtures.models import (
     FieldList,
     FixtureDataItem,
@@ -199,6 +200,7 @@ class LookupTableItemResource(CouchResourceMixin, HqBaseResource):
             raise NotFound('Lookup table item not found')
         with CouchTransaction() as transaction:
             data_item.recursive_delete(transaction)
+        invalidate_fixture_item_sets([data_item.data_type_id])
         return ImmediateHttpResponse(response=HttpAccepted())
 
     def obj_create(self, bundle, request=None, **kwargs):
@@ -217,6 +219,7 @@ class LookupTableItemResource(CouchResourceMixin, HqBaseResource):
         bundle.obj.domain = kwargs['domain']
         bundle.obj.sort_key = number_items + 1
         bundle.obj.save()
+        invalidate_fixture_item_sets([data_type_id])
         return bundle
 
     def obj_update(self, bundle, **kwargs):
@@ -245,6 +248,7 @@ class LookupTableItemResource(CouchResourceMixin, HqBaseResource):
 
         if save:
             bundle.obj.save()
+            invalidate_fixture_item_sets([bundle.obj.data_type_id])
 
         return bundle
 
@@ -1,10 +1,13 @@
 from xml.etree import cElementTree as ElementTree
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+import mock
 
 from casexml.apps.case.tests.util import check_xml_line_by_line
 from casexml.apps.phone.tests.utils import \
     call_fixture_generator as call_fixture_generator_raw
+from casexml.apps.phone.utils import get_cached_items_with_count
 
 from corehq.apps.fixtures import fixturegenerators
 from corehq.apps.fixtures.dbaccessors import (
@@ -24,6 +27,7 @@ from corehq.apps.fixtures.models import (
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from corehq.apps.users.models import CommCareUser
 from corehq.blobs import get_blob_db
+from corehq.util.test_utils import flag_disabled, flag_enabled
 
 
 def call_fixture_generator(user):
@@ -310,6 +314,42 @@ class FixtureDataTest(TestCase):
         fixtures = call_fixture_generator(sammy)
         self.assertEqual({item.attrib['user_id'] for item in fixtures}, {sammy.user_id})
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    @flag_enabled('FIXTURE_ITEM_SET_CACHE')
+    def test_cached_user_fixture(self):
+        frank = self.user.to_ota_restore_user()
+        sammy_user = CommCareUser.create(self.domain, 'sammy', '***', None, None)
+        self.addCleanup(sammy_user.delete, deleted_by=None)
+        sammy_ownership = FixtureOwnership(
+            domain=self.domain,
+            owner_id=sammy_user.get_id,
+            owner_type='user',
+            data_item_id=self.data_item.get_id
+        )
+        sammy_ownership.save()
+        self.addCleanup(sammy_ownership.delete)
+        sammy = sammy_user.to_ota_restore_user()
+
+        def get_cached_fixture(restore_user):
+            fixture, = call_fixture_generator_raw(fixturegenerators.item_lists, restore_user)
+            xml, num_items = get_cached_items_with_count(fixture)
+            self.assertEqual(num_items, 1)
+            return xml
+
+        with flag_disabled('FIXTURE_ITEM_SET_CACHE'):
+            fixture, = call_fixture_generator(frank)
+        self.assertEqual(get_cached_fixture(frank), ElementTree.tostring(fixture, encoding='utf-8'))
+
+        with mock.patch.object(FixtureDataItem, 'by_ids') as by_ids:
+            sammy_fixture = get_cached_fixture(sammy)
+        by_ids.assert_not_called()
+        self.assertEqual(ElementTree.fromstring(sammy_fixture).attrib['user_id'], sammy.user_id)
+
+        self.data_item.fields['district_id'].field_list[0].field_value = 'New_Delhi_id'
+        self.data_item.save()
+        self.data_type.save()
+        self.assertIn(b'New_Delhi_id', get_cached_fixture(sammy))
+
     def make_data_type(self, name, is_global):
         data_type = FixtureDataType(
             domain=self.domain,
@@ -236,6 +236,7 @@ def clear_fixture_quickcache(domain, data_types):
     type_ids = set()
     for data_type in data_types:
         type_ids.add(data_type.get_id)
+        # also invalidates cached user fixtures that include the data type
         data_type.clear_caches()
 
     from corehq.apps.fixtures.dbaccessors import get_fixture_items_for_data_type
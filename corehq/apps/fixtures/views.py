@@ -42,6 +42,7 @@ from corehq.apps.fixtures.exceptions import (
     FixtureUploadError,
 )
 from corehq.apps.fixtures.fixturegenerators import item_lists_by_domain
+from corehq.apps.fixtures.item_set_cache import invalidate_fixture_item_sets
 from corehq.apps.fixtures.models import (
     FieldList,
     FixtureDataItem,
@@ -168,6 +169,8 @@ def update_tables(request, domain, data_type_id):
                     data_type = _create_types(
                         fields_patches, domain, data_tag, is_global, description, transaction)
         clear_fixture_cache(domain)
+        if data_type_id:
+            invalidate_fixture_item_sets([data_type_id])
         return json_response(strip_json(data_type))
 
 
@@ -1,5 +1,12 @@
 from django.db import models
-from django.db.models.expressions import Exists, F, Func, OuterRef, Value
+from django.db.models.expressions import (
+    Exists,
+    F,
+    Func,
+    OuterRef,
+    Subquery,
+    Value,
+)
 from django.db.models.query import EmptyResultSet, Q, QuerySet
 
 from django_cte import With
@@ -26,6 +33,11 @@ class array_length(Func):
     output_field = field
 
 
+class ArraySubquery(Subquery):
+    template = "ARRAY(%(subquery)s)"
+    output_field = field
+
+
 class AdjListManager(models.Manager):
 
     def get_ancestors(self, node, ascending=False, include_self=False):
@@ -0,0 +1,79 @@
+"""
+Cache of serialized location fixtures
+
+Location fixtures only depend on the user's assigned locations, except
+for the user id attribute, so users with the same assigned locations are
+served the same fixtures. Fixtures are cached with a placeholder user id
+under a key that includes a domain-wide version. The version is replaced
+whenever a location or location type in the domain changes, which orphans
+all of the domain's cached fixtures.
+"""
+import hashlib
+import json
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from corehq.util.metrics import metrics_counter
+
+FIXTURE_CACHE_TIMEOUT = 24 * 60 * 60
+# longer than FIXTURE_CACHE_TIMEOUT so that fixtures aren't orphaned by versions expiring
+VERSION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _get_version_key(domain):
+    return 'location-fixture-version-{}'.format(domain)
+
+
+def get_location_fixture_version(domain):
+    key = _get_version_key(domain)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_location_fixtures(domain):
+    def _invalidate():
+        cache.set(_get_version_key(domain), uuid4().hex, VERSION_TIMEOUT)
+
+    _invalidate()
+    # and again once the change is committed, since fixtures may be
+    # generated from data read before the commit in the meantime
+    transaction.on_commit(_invalidate)
+
+
+class LocationFixtureCache(object):
+
+    def __init__(self, domain, fixture_id, location_ids, data_fields):
+        """
+        :param location_ids: The user's assigned location ids, or `None`
+        if the user syncs all of the domain's locations.
+        :param data_fields: The location data fields included in the fixture.
+        """
+        self.domain = domain
+        self.fixture_id = fixture_id
+        key_data = [
+            sorted(location_ids) if location_ids is not None else None,
+            [field.slug for field in data_fields],
+        ]
+        self.key = 'location-fixture-{}-{}-{}-{}'.format(
+            domain,
+            fixture_id,
+            get_location_fixture_version(domain),
+            hashlib.md5(json.dumps(key_data).encode('utf-8')).hexdigest(),
+        )
+
+    def get(self):
+        data = cache.get(self.key)
+        metrics_counter('commcare.location_fixture.cache', tags={
+            'domain': self.domain,
+            'fixture': self.fixture_id,
+            'result': 'miss' if data is None else 'hit',
+        })
+        return data
+
+    def set(self, data):
+        cache.set(self.key, data, FIXTURE_CACHE_TIMEOUT)
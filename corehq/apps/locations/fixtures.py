@@ -9,6 +9,7 @@ from django_cte import With
 from django_cte.raw import raw_cte_sql
 
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.utils import GLOBAL_USER_ID, write_fixture_items_to_io
 
 from corehq import toggles
 from corehq.apps.app_manager.const import (
@@ -18,6 +19,7 @@ from corehq.apps.app_manager.const import (
 )
 from corehq.apps.custom_data_fields.models import CustomDataFieldsDefinition
 from corehq.apps.fixtures.utils import get_index_schema_node
+from corehq.apps.locations.fixture_cache import LocationFixtureCache
 from corehq.apps.locations.models import (
     LocationFixtureConfiguration,
     LocationType,
@@ -114,8 +116,29 @@ class LocationFixtureProvider(FixtureProvider):
             return []
 
         data_fields = _get_location_data_fields(restore_user.domain)
+        if toggles.LOCATION_FIXTURE_CACHE.enabled(restore_user.domain):
+            return self._get_cached_xml_nodes(restore_state, locations_queryset, data_fields)
         return self.serializer.get_xml_nodes(self.id, restore_user, locations_queryset, data_fields)
 
+    def _get_cached_xml_nodes(self, restore_state, locations_queryset, data_fields):
+        restore_user = restore_state.restore_user
+        if toggles.SYNC_ALL_LOCATIONS.enabled(restore_user.domain):
+            location_ids = None
+        else:
+            location_ids = restore_user.get_location_ids(restore_user.domain)
+        fixture_cache = LocationFixtureCache(restore_user.domain, self.id, location_ids, data_fields)
+
+        data = None if restore_state.overwrite_cache else fixture_cache.get()
+        if data is None:
+            nodes = self.serializer.get_xml_nodes(self.id, restore_user, locations_queryset, data_fields)
+            for node in nodes:
+                if node.get('user_id') is not None:
+                    node.set('user_id', GLOBAL_USER_ID)
+            data = write_fixture_items_to_io(nodes).read()
+            fixture_cache.set(data)
+
+        return [data.replace(GLOBAL_USER_ID.encode('utf-8'), restore_user.user_id.encode('utf-8'))]
+
 
 class HierarchicalLocationSerializer(object):
 
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from corehq.apps.locations.models import LocationClosure, SQLLocation
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the location closure table for the given domains, or "
+            "for all domains with locations. Run this before enabling the "
+            "LOCATION_CLOSURE_TABLE feature flag for a domain.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('domains', nargs='*')
+
+    def handle(self, domains, **options):
+        if not domains:
+            domains = (SQLLocation.objects.order_by('domain')
+                       .values_list('domain', flat=True).distinct())
+        for domain in domains:
+            count = LocationClosure.objects.rebuild_domain(domain)
+            print("{}: {} closure rows".format(domain, count))
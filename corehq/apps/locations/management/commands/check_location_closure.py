@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from corehq.apps.locations.models import LocationClosure, SQLLocation
+
+
+class Command(BaseCommand):
+    help = ("Check that the location closure table matches the location "
+            "hierarchy for the given domains, or for all domains with "
+            "locations.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('domains', nargs='*')
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help="Rebuild the closure table of inconsistent domains",
+        )
+        parser.add_argument('--verbose', action='store_true')
+
+    def handle(self, domains, fix=False, verbose=False, **options):
+        if not domains:
+            domains = (SQLLocation.objects.order_by('domain')
+                       .values_list('domain', flat=True).distinct())
+        inconsistent = []
+        for domain in domains:
+            missing, extra = LocationClosure.objects.get_inconsistencies(domain)
+            if not missing and not extra:
+                continue
+            inconsistent.append(domain)
+            print("{}: {} missing rows, {} extra rows".format(domain, len(missing), len(extra)))
+            if verbose:
+                for kind, rows in [('missing', missing), ('extra', extra)]:
+                    for ancestor_id, descendant_id, depth in rows:
+                        print("  {} ancestor={} descendant={} depth={}".format(
+                            kind, ancestor_id, descendant_id, depth))
+            if fix:
+                LocationClosure.objects.rebuild_domain(domain)
+                print("  rebuilt")
+
+        if inconsistent and not fix:
+            raise CommandError("{} inconsistent domain(s)".format(len(inconsistent)))
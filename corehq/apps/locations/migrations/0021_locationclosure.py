@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0020_delete_locationrelation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationClosure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('domain', models.CharField(db_index=True, max_length=255)),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='+',
+                    to='locations.SQLLocation',
+                )),
+                ('descendant', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='+',
+                    to='locations.SQLLocation',
+                )),
+            ],
+            options={
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+    ]
@@ -3,16 +3,22 @@ from collections import defaultdict
 from datetime import datetime
 from functools import partial
 
-from django.db import models, transaction
-from django.db.models import Q
+from django.db import connection, models, transaction
+from django.db.models import OuterRef, Q, Subquery
 
 import jsonfield
 from django_bulk_update.helper import bulk_update as bulk_update_helper
 from django_cte import CTEQuerySet
 from memoized import memoized
 
+from corehq import toggles
 from corehq.apps.domain.models import Domain
-from corehq.apps.locations.adjacencylist import AdjListManager, AdjListModel
+from corehq.apps.locations.adjacencylist import (
+    AdjListManager,
+    AdjListModel,
+    ArraySubquery,
+)
+from corehq.apps.locations.fixture_cache import invalidate_location_fixtures
 from corehq.apps.products.models import SQLProduct
 from corehq.form_processor.exceptions import CaseNotFound
 from corehq.form_processor.interfaces.supply import SupplyInterface
@@ -171,6 +177,7 @@ class LocationType(models.Model):
 
         is_not_first_save = self.pk is not None
         super(LocationType, self).save(*args, **kwargs)
+        invalidate_location_fixtures(self.domain)
 
         if is_not_first_save:
             self.sync_administrative_status()
@@ -220,6 +227,7 @@ class LocationType(models.Model):
 
         cls._pre_bulk_save(objects)
         cls.objects.bulk_create(objects)
+        invalidate_location_fixtures(objects[0].domain)
         return list(objects)
 
     @classmethod
@@ -233,6 +241,8 @@ class LocationType(models.Model):
             o.last_modified = now
         # the caller should call 'sync_administrative_status' for individual objects
         bulk_update_helper(objects)
+        if objects:
+            invalidate_location_fixtures(objects[0].domain)
 
     @classmethod
     def bulk_delete(cls, objects):
@@ -241,6 +251,7 @@ class LocationType(models.Model):
             return
         ids = [o.id for o in objects]
         cls.objects.filter(id__in=ids).delete()
+        invalidate_location_fixtures(objects[0].domain)
 
 
 class LocationQueriesMixin(object):
@@ -256,13 +267,18 @@ class LocationQueriesMixin(object):
         if not assigned_location_ids:
             return self.none()  # No locations are assigned to this user
 
-        return SQLLocation.objects.get_locations_and_children(assigned_location_ids)
+        return SQLLocation.objects.get_locations_and_children(assigned_location_ids, domain=domain)
 
     def delete(self, *args, **kwargs):
         from .document_store import publish_location_saved
+        domains = set()
         for domain, location_id in self.values_list('domain', 'location_id'):
             publish_location_saved(domain, location_id, is_deletion=True)
-        return super(LocationQueriesMixin, self).delete(*args, **kwargs)
+            domains.add(domain)
+        result = super(LocationQueriesMixin, self).delete(*args, **kwargs)
+        for domain in domains:
+            invalidate_location_fixtures(domain)
+        return result
 
 
 class LocationQuerySet(LocationQueriesMixin, CTEQuerySet):
@@ -317,11 +333,19 @@ class LocationManager(LocationQueriesMixin, AdjListManager):
     def get_locations(self, location_ids):
         return self.filter(location_id__in=location_ids)
 
-    def get_locations_and_children(self, location_ids):
+    def get_locations_and_children(self, location_ids, domain=None):
         """
         Takes a set of location ids and returns a django queryset of those
         locations and their children.
+
+        :param domain: The domain of the locations, if known. Used to
+        query the location closure table if it is enabled for the domain.
         """
+        if domain and toggles.LOCATION_CLOSURE_TABLE.enabled(domain):
+            return self.get_closure_descendants(
+                self.filter(location_id__in=location_ids),
+                include_self=True
+            )
         return self.get_queryset_descendants(
             self.filter(location_id__in=location_ids),
             include_self=True
@@ -330,6 +354,60 @@ class LocationManager(LocationQueriesMixin, AdjListManager):
     def get_locations_and_children_ids(self, location_ids):
         return list(self.get_locations_and_children(location_ids).location_ids())
 
+    def get_closure_descendants(self, ancestors, include_self=False):
+        """Query descendants using the location closure table
+
+        Results are ordered like those of `get_descendants`, by the
+        names of each location's ancestors below the highest of
+        `ancestors` that it descends from (or from that ancestor itself
+        if `include_self`).
+
+        :param ancestors: A `QuerySet` of locations or a list of
+        location primary keys.
+        """
+        links = LocationClosure.objects.filter(
+            ancestor_id__in=ancestors,
+            depth__gte=0 if include_self else 1,
+        )
+        root_depth = (
+            LocationClosure.objects
+            .filter(descendant_id=OuterRef('descendant_id'), ancestor_id__in=ancestors)
+            .order_by('-depth')
+            .values('depth')[:1]
+        )
+        path_depth = 'depth__lte' if include_self else 'depth__lt'
+        path = (
+            LocationClosure.objects
+            .filter(descendant_id=OuterRef('id'), **{path_depth: Subquery(root_depth)})
+            .order_by('-depth')
+            .values('ancestor__' + self.model.ordering_col_attr)
+        )
+        return (
+            self.filter(id__in=links.values('descendant_id'))
+            .annotate(_closure_path=ArraySubquery(path))
+            .order_by('_closure_path')
+        )
+
+    def get_closure_ancestors(self, location, ascending=False, include_self=False):
+        """Query ancestors using the location closure table
+
+        :param location: A location instance.
+        :param ascending: Order of results. The default (`False`) gets
+        results in descending order (root ancestor first, immediate
+        parent last).
+        """
+        # start from the parent so that the ancestors of a location can
+        # be queried after it has been deleted, like `get_ancestors`
+        links = LocationClosure.objects.filter(
+            descendant_id=location.id if include_self else location.parent_id,
+        )
+        depth = links.filter(ancestor_id=OuterRef('id')).values('depth')
+        return (
+            self.filter(id__in=links.values('ancestor_id'))
+            .annotate(_closure_depth=Subquery(depth))
+            .order_by(('' if ascending else '-') + '_closure_depth')
+        )
+
 
 class OnlyUnarchivedLocationManager(LocationManager):
 
@@ -373,6 +451,11 @@ class SQLLocation(AdjListModel):
     # This should really be the default location manager
     active_objects = OnlyUnarchivedLocationManager()
 
+    def __init__(self, *args, **kwargs):
+        super(SQLLocation, self).__init__(*args, **kwargs)
+        # 'parent_id' is missing if it was deferred
+        self._parent_id_old = self.__dict__.get('parent_id', _UNKNOWN_PARENT)
+
     def get_ancestor_of_type(self, type_code):
         """
         Returns the ancestor of given location_type_code of the location
@@ -394,12 +477,17 @@ class SQLLocation(AdjListModel):
         if not self.location_id:
             self.location_id = uuid.uuid4().hex
 
+        is_new = self._state.adding
         with transaction.atomic():
             set_site_code_if_needed(self)
             sync_supply_point(self)
             super(SQLLocation, self).save(*args, **kwargs)
+            if is_new or self.parent_id != self._parent_id_old:
+                LocationClosure.objects.sync_location(self)
+        self._parent_id_old = self.parent_id
 
         publish_location_saved(self.domain, self.location_id)
+        invalidate_location_fixtures(self.domain)
 
     def delete(self, *args, **kwargs):
         """Delete this location and all descentants
@@ -422,10 +510,13 @@ class SQLLocation(AdjListModel):
         )
         for loc in to_delete:
             publish_location_saved(loc.domain, loc.location_id, is_deletion=True)
+        invalidate_location_fixtures(self.domain)
 
     full_delete = delete
 
     def get_descendants(self, include_self=False, **kwargs):
+        if toggles.LOCATION_CLOSURE_TABLE.enabled(self.domain):
+            return SQLLocation.objects.get_closure_descendants([self.id], include_self=include_self)
         if include_self:
             where = Q(domain=self.domain, id=self.id)
         else:
@@ -435,6 +526,8 @@ class SQLLocation(AdjListModel):
         )
 
     def get_ancestors(self, include_self=False, **kwargs):
+        if toggles.LOCATION_CLOSURE_TABLE.enabled(self.domain):
+            return SQLLocation.objects.get_closure_ancestors(self, include_self=include_self, **kwargs)
         where = Q(domain=self.domain, id=self.id if include_self else self.parent_id)
         return SQLLocation.objects.get_ancestors(
             where, **kwargs
@@ -475,6 +568,7 @@ class SQLLocation(AdjListModel):
         )
         for loc in locations:
             publish_location_saved(loc.domain, loc.location_id, is_deletion=True)
+        invalidate_location_fixtures(locations[0].domain)
 
     def to_json(self, include_lineage=True):
         json_dict = {
@@ -700,6 +794,120 @@ class SQLLocation(AdjListModel):
         return self
 
 
+_UNKNOWN_PARENT = object()
+
+
+class LocationClosureManager(models.Manager):
+
+    def sync_location(self, location):
+        """Update the closure of a location that was created or moved
+
+        Rows linking the location's subtree to its previous ancestors
+        are replaced with rows linking it to its current ancestors.
+        """
+        params = {
+            'domain': location.domain,
+            'id': location.id,
+            'parent_id': location.parent_id,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM locations_locationclosure
+                WHERE descendant_id IN (
+                    SELECT descendant_id FROM locations_locationclosure WHERE ancestor_id = %(id)s
+                ) AND ancestor_id NOT IN (
+                    SELECT descendant_id FROM locations_locationclosure WHERE ancestor_id = %(id)s
+                )
+            """, params)
+            cursor.execute("""
+                INSERT INTO locations_locationclosure (domain, ancestor_id, descendant_id, depth)
+                SELECT %(domain)s, %(id)s, %(id)s, 0
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM locations_locationclosure
+                    WHERE ancestor_id = %(id)s AND descendant_id = %(id)s
+                )
+            """, params)
+            cursor.execute("""
+                INSERT INTO locations_locationclosure (domain, ancestor_id, descendant_id, depth)
+                SELECT %(domain)s, a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+                FROM locations_locationclosure a, locations_locationclosure d
+                WHERE a.descendant_id = %(parent_id)s AND d.ancestor_id = %(id)s
+            """, params)
+
+    def rebuild_domain(self, domain):
+        """Replace the closure of all locations in the domain
+
+        :returns: The number of rows inserted.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.filter(domain=domain).delete()
+            cursor.execute("""
+                INSERT INTO locations_locationclosure (domain, ancestor_id, descendant_id, depth)
+                {expected}
+                SELECT %(domain)s, ancestor_id, descendant_id, depth FROM expected
+            """.format(expected=_EXPECTED_CLOSURE_CTE), {'domain': domain})
+            return cursor.rowcount
+
+    def get_inconsistencies(self, domain):
+        """Compare the domain's closure with its adjacency list
+
+        :returns: A tuple of lists of `(ancestor_id, descendant_id, depth)`
+        tuples: rows missing from the closure table and rows in the
+        closure table that should not be there.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                {expected},
+                actual AS (
+                    SELECT ancestor_id, descendant_id, depth
+                    FROM locations_locationclosure
+                    WHERE domain = %(domain)s
+                )
+                SELECT 'missing', * FROM (
+                    SELECT * FROM expected EXCEPT SELECT * FROM actual
+                ) missing
+                UNION ALL
+                SELECT 'extra', * FROM (
+                    SELECT * FROM actual EXCEPT SELECT * FROM expected
+                ) extra
+            """.format(expected=_EXPECTED_CLOSURE_CTE), {'domain': domain})
+            rows = cursor.fetchall()
+        missing = [tuple(row[1:]) for row in rows if row[0] == 'missing']
+        extra = [tuple(row[1:]) for row in rows if row[0] == 'extra']
+        return missing, extra
+
+
+# closure of the domain's locations, computed from the adjacency list
+_EXPECTED_CLOSURE_CTE = """
+    WITH RECURSIVE expected (ancestor_id, descendant_id, depth) AS (
+        SELECT id, id, 0 FROM locations_sqllocation WHERE domain = %(domain)s
+        UNION ALL
+        SELECT expected.ancestor_id, loc.id, expected.depth + 1
+        FROM expected
+        INNER JOIN locations_sqllocation loc ON loc.parent_id = expected.descendant_id
+    )
+"""
+
+
+class LocationClosure(models.Model):
+    """Ancestor/descendant pairs of the location hierarchy
+
+    Each location has a row for each of its ancestors, and a row with
+    depth 0 for itself. Rows are maintained by `SQLLocation.save()` and
+    are deleted along with their locations.
+    """
+    domain = models.CharField(max_length=255, db_index=True)
+    ancestor = models.ForeignKey(SQLLocation, related_name='+', on_delete=models.CASCADE)
+    descendant = models.ForeignKey(SQLLocation, related_name='+', on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField()
+
+    objects = LocationClosureManager()
+
+    class Meta(object):
+        app_label = 'locations'
+        unique_together = ('ancestor', 'descendant')
+
+
 def filter_for_archived(locations, include_archive_ancestors):
     """
     Perform filtering on a location queryset.
@@ -783,8 +991,12 @@ def get_case_sharing_groups_for_locations(locations, for_user_id=None):
     location_ids = [l.pk for l in locations if l.location_type.view_descendants]
     descendants = []
     if location_ids:
-        where = Q(domain=locations[0].domain, parent_id__in=location_ids)
-        descendants = SQLLocation.objects.get_queryset_descendants(where).filter(
-            location_type__shares_cases=True, is_archived=False)
+        domain = locations[0].domain
+        if toggles.LOCATION_CLOSURE_TABLE.enabled(domain):
+            descendants = SQLLocation.objects.get_closure_descendants(location_ids)
+        else:
+            where = Q(domain=domain, parent_id__in=location_ids)
+            descendants = SQLLocation.objects.get_queryset_descendants(where)
+        descendants = descendants.filter(location_type__shares_cases=True, is_archived=False)
     for loc in descendants:
         yield loc.case_sharing_group_object(for_user_id)
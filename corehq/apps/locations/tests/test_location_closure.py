@@ -0,0 +1,93 @@
+from corehq.util.test_utils import flag_enabled
+
+from ..models import LocationClosure, SQLLocation
+from .util import LocationHierarchyPerTest
+
+
+class TestLocationClosure(LocationHierarchyPerTest):
+    location_type_names = ['state', 'county', 'city']
+    location_structure = [
+        ('Massachusetts', [
+            ('Middlesex', [
+                ('Cambridge', []),
+                ('Somerville', []),
+            ]),
+            ('Suffolk', [
+                ('Boston', []),
+            ])
+        ]),
+        ('California', [
+            ('Los Angeles', []),
+        ])
+    ]
+
+    def assertConsistent(self):
+        self.assertEqual(LocationClosure.objects.get_inconsistencies(self.domain), ([], []))
+
+    def assertSameResults(self, get_query):
+        with flag_enabled('LOCATION_CLOSURE_TABLE'):
+            from_closure = [loc.name for loc in get_query()]
+        self.assertEqual(from_closure, [loc.name for loc in get_query()])
+
+    def test_maintained_on_save(self):
+        self.assertConsistent()
+        self.assertEqual(
+            LocationClosure.objects.filter(descendant=self.locations['Boston']).count(),
+            3
+        )
+
+    def test_move_location(self):
+        suffolk = self.locations['Suffolk']
+        suffolk.parent = self.locations['California']
+        suffolk.save()
+        self.assertConsistent()
+        self.assertEqual(
+            set(self.locations['California'].get_descendants().values_list('name', flat=True)),
+            {'Los Angeles', 'Suffolk', 'Boston'}
+        )
+
+    def test_delete_location(self):
+        self.locations['Middlesex'].delete()
+        self.assertConsistent()
+
+    def test_bulk_delete(self):
+        locations = [self.locations[name] for name in ['Cambridge', 'Somerville', 'Middlesex']]
+        SQLLocation.bulk_delete(locations, [self.locations['Massachusetts'].location_id])
+        self.assertConsistent()
+
+    def test_rebuild_domain(self):
+        LocationClosure.objects.filter(domain=self.domain).delete()
+        missing, extra = LocationClosure.objects.get_inconsistencies(self.domain)
+        self.assertEqual((len(missing), len(extra)), (17, 0))
+
+        self.assertEqual(LocationClosure.objects.rebuild_domain(self.domain), 17)
+        self.assertConsistent()
+
+    def test_queries(self):
+        massachusetts = self.locations['Massachusetts']
+        boston = self.locations['Boston']
+        self.assertSameResults(lambda: massachusetts.get_descendants())
+        self.assertSameResults(lambda: massachusetts.get_descendants(include_self=True))
+        self.assertSameResults(lambda: boston.get_ancestors())
+        self.assertSameResults(lambda: boston.get_ancestors(include_self=True))
+        self.assertSameResults(lambda: boston.get_ancestors(ascending=True))
+        self.assertSameResults(lambda: SQLLocation.objects.get_locations_and_children(
+            [self.locations['Suffolk'].location_id, self.locations['California'].location_id],
+            domain=self.domain,
+        ))
+
+    def test_queries_with_several_ancestors(self):
+        # ordered by the path from the given locations, not from the root
+        self.assertSameResults(lambda: SQLLocation.objects.get_locations_and_children(
+            [self.locations['Boston'].location_id, self.locations['Los Angeles'].location_id],
+            domain=self.domain,
+        ))
+        for names in [['Boston', 'Los Angeles'], ['Massachusetts', 'Suffolk', 'California']]:
+            locations = SQLLocation.objects.filter(domain=self.domain, name__in=names)
+            for include_self in [True, False]:
+                self.assertEqual(
+                    [loc.name for loc in SQLLocation.objects.get_closure_descendants(
+                        locations, include_self=include_self)],
+                    [loc.name for loc in SQLLocation.objects.get_queryset_descendants(
+                        locations, include_self=include_self)],
+                )
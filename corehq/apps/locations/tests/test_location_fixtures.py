@@ -4,7 +4,7 @@ from collections import namedtuple
 from datetime import datetime, timedelta
 from xml.etree import cElementTree as ElementTree
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 import mock
 
@@ -14,6 +14,7 @@ from casexml.apps.phone.tests.utils import (
     call_fixture_generator,
     create_restore_user,
 )
+from casexml.apps.phone.utils import get_cached_items_with_count
 
 from corehq.apps.app_manager.tests.util import (
     TestXmlMixin,
@@ -29,7 +30,7 @@ from corehq.apps.domain.shortcuts import create_domain
 from corehq.apps.locations.views import LocationFieldsView
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from corehq.apps.users.models import CommCareUser
-from corehq.util.test_utils import flag_enabled, generate_cases
+from corehq.util.test_utils import flag_disabled, flag_enabled, generate_cases
 
 from ..fixtures import (
     LocationSet,
@@ -332,6 +333,62 @@ class LocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
         )
 
 
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+@flag_enabled('LOCATION_FIXTURE_CACHE')
+@mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
+class LocationFixtureCacheTest(LocationHierarchyTestCase):
+    location_type_names = ['state', 'county', 'city']
+    location_structure = TEST_LOCATION_STRUCTURE
+
+    def setUp(self):
+        super(LocationFixtureCacheTest, self).setUp()
+        self.user = create_restore_user(self.domain, 'user', '123')
+        self.other_user = create_restore_user(self.domain, 'other-user', '123')
+        self.user._couch_user.set_location(self.locations['Suffolk'])
+        self.other_user._couch_user.set_location(self.locations['Suffolk'])
+
+    def tearDown(self):
+        self.user._couch_user.delete(deleted_by=None)
+        self.other_user._couch_user.delete(deleted_by=None)
+        super(LocationFixtureCacheTest, self).tearDown()
+
+    def _get_fixture(self, user):
+        fixture, = call_fixture_generator(flat_location_fixture_generator, user)
+        xml, num_items = get_cached_items_with_count(fixture)
+        self.assertEqual(num_items, 2)
+        return xml
+
+    def test_matches_uncached_fixture(self):
+        with flag_disabled('LOCATION_FIXTURE_CACHE'):
+            expected = b''.join(
+                ElementTree.tostring(node, encoding='utf-8')
+                for node in call_fixture_generator(flat_location_fixture_generator, self.user)
+            )
+        self.assertEqual(self._get_fixture(self.user), expected)
+
+    def test_shared_between_users(self):
+        serializer = flat_location_fixture_generator.serializer
+        with mock.patch.object(serializer, 'get_xml_nodes', wraps=serializer.get_xml_nodes) as get_xml_nodes:
+            fixture = self._get_fixture(self.user)
+            other_fixture = self._get_fixture(self.other_user)
+        self.assertEqual(get_xml_nodes.call_count, 1)
+        self.assertEqual(
+            other_fixture,
+            fixture.replace(self.user.user_id.encode('utf-8'), self.other_user.user_id.encode('utf-8'))
+        )
+
+    def test_invalidated_when_location_saved(self):
+        self.assertNotIn(b'Revere Beach', self._get_fixture(self.user))
+        revere = self.locations['Revere']
+        revere.name = 'Revere Beach'
+        revere.save()
+        try:
+            self.assertIn(b'Revere Beach', self._get_fixture(self.other_user))
+        finally:
+            revere.name = 'Revere'
+            revere.save()
+
+
 @mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
 class ForkedHierarchiesTest(TestCase, FixtureHasLocationsMixin):
     def setUp(self):
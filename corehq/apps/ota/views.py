@@ -38,6 +38,7 @@ from corehq.apps.app_manager.dbaccessors import (
 from corehq.apps.app_manager.models import GlobalAppConfig
 from corehq.apps.builds.utils import get_default_build_spec
 from corehq.apps.case_search.filter_dsl import TooManyRelatedCasesError
+from corehq.apps.case_search.result_cache import CaseSearchResultCache, can_cache_search
 from corehq.apps.case_search.utils import CaseSearchCriteria
 from corehq.apps.domain.decorators import (
     check_domain_migration,
@@ -102,6 +103,13 @@ def search(request, domain):
     except KeyError:
         return HttpResponse('Search request must specify case type', status=400)
 
+    result_cache = None
+    if toggles.CASE_SEARCH_RESULT_CACHE.enabled(domain) and can_cache_search(criteria):
+        result_cache = CaseSearchResultCache(domain, case_type, criteria)
+        fixtures = result_cache.get()
+        if fixtures is not None:
+            return HttpResponse(fixtures, content_type="text/xml; charset=utf-8")
+
     try:
         case_search_criteria = CaseSearchCriteria(domain, case_type, criteria)
     except TooManyRelatedCasesError:
@@ -119,6 +127,8 @@ def search(request, domain):
     # Even if it's a SQL domain, we just need to render the hits as cases, so CommCareCase.wrap will be fine
     cases = [CommCareCase.wrap(flatten_result(result, include_score=True)) for result in hits]
     fixtures = CaseDBFixture(cases).fixture
+    if result_cache is not None:
+        result_cache.set(fixtures)
     return HttpResponse(fixtures, content_type="text/xml; charset=utf-8")
 
 
@@ -0,0 +1,81 @@
+import json
+import uuid
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from mock import patch
+
+from corehq.apps.domain.shortcuts import create_domain
+from corehq.apps.users.models import HQApiKey, WebUser
+from corehq.form_processor.tests.utils import FormProcessorTestUtils, use_sql_backend
+from corehq.form_processor.utils.xform import get_simple_form_xml
+from corehq.util.test_utils import flag_disabled, flag_enabled
+
+
+@use_sql_backend
+class BatchPostTest(TestCase):
+    domain = 'batch-post-test'
+
+    @classmethod
+    def setUpClass(cls):
+        super(BatchPostTest, cls).setUpClass()
+        cls.domain_obj = create_domain(cls.domain)
+        cls.user = WebUser.create(cls.domain, 'batch-post-user', '***', None, None, is_admin=True)
+        api_key, _ = HQApiKey.objects.get_or_create(user=cls.user.get_django_user())
+        cls.auth_header = 'ApiKey {}:{}'.format(cls.user.username, api_key.key)
+        cls.url = reverse('receiver_batch_post', args=[cls.domain])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.user.delete(deleted_by=None)
+        cls.domain_obj.delete()
+        super(BatchPostTest, cls).tearDownClass()
+
+    def tearDown(self):
+        FormProcessorTestUtils.delete_all_sql_forms(self.domain)
+        super(BatchPostTest, self).tearDown()
+
+    def _post(self, form_ids, **extra):
+        files = [
+            SimpleUploadedFile('form{}.xml'.format(i), get_simple_form_xml(form_id).encode('utf-8'))
+            for i, form_id in enumerate(form_ids)
+        ]
+        extra.setdefault('HTTP_AUTHORIZATION', self.auth_header)
+        return self.client.post(self.url, {'xml_submission_file': files}, **extra)
+
+    @flag_enabled('BATCH_FORM_SUBMISSIONS')
+    def test_batch_post(self):
+        form_ids = [uuid.uuid4().hex for i in range(3)]
+        response = self._post(form_ids + form_ids[:1])
+
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)['results']
+        self.assertEqual([result['form_id'] for result in results[:3]], form_ids)
+        # duplicates are saved with a new id, as they are when submitted on their own
+        self.assertNotIn(results[3]['form_id'], form_ids)
+        self.assertEqual([result['status_code'] for result in results], [201] * 4)
+        for result in results:
+            self.assertIn('<OpenRosaResponse', result['response'])
+
+    @flag_enabled('BATCH_FORM_SUBMISSIONS')
+    def test_unauthenticated(self):
+        response = self._post([uuid.uuid4().hex], HTTP_AUTHORIZATION='ApiKey {}:wrong'.format(self.user.username))
+        self.assertEqual(response.status_code, 401)
+
+    @flag_disabled('BATCH_FORM_SUBMISSIONS')
+    def test_toggle_disabled(self):
+        response = self._post([uuid.uuid4().hex])
+        self.assertEqual(response.status_code, 404)
+
+    @flag_enabled('BATCH_FORM_SUBMISSIONS')
+    @patch('corehq.apps.receiverwrapper.views.MAX_BATCH_SIZE', 2)
+    def test_too_many_forms(self):
+        response = self._post([uuid.uuid4().hex for i in range(3)])
+        self.assertEqual(response.status_code, 400)
+
+    @flag_enabled('BATCH_FORM_SUBMISSIONS')
+    def test_no_forms(self):
+        response = self.client.post(self.url, {}, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(response.status_code, 400)
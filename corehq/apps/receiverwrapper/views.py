@@ -1,7 +1,7 @@
 import os
 import logging
 
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
@@ -48,6 +48,7 @@ from corehq.apps.receiverwrapper.util import (
 )
 from corehq.form_processor.exceptions import XFormLockError
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.form_processor.submission_batch import MAX_BATCH_SIZE, process_submission_batch
 from corehq.form_processor.submission_post import SubmissionPost
 from corehq.form_processor.utils import (
     convert_xform_to_json,
@@ -373,3 +374,81 @@ def secure_post(request, domain, app_id=None):
         )
 
     return decorated_view(request, domain, app_id=app_id)
+
+
+@waf_allow('XSS_BODY')
+@location_safe
+@csrf_exempt
+@require_POST
+@check_domain_migration
+@login_or_api_key_ex()
+@require_permission(Permissions.edit_data)
+@require_permission(Permissions.access_api)
+@toggles.BATCH_FORM_SUBMISSIONS.required_decorator()
+@set_request_duration_reporting_threshold(60)
+def batch_post(request, domain):
+    """
+    Process the forms in a multipart request, which has a file field named
+    xml_submission_file for each form, in the order they are given. The
+    response is a list of the forms' ids and OpenRosa responses.
+    """
+    if rate_limit_submission(domain):
+        return HttpTooManyRequests()
+
+    instance_files = request.FILES.getlist(MAGIC_PROPERTY)
+    if not instance_files:
+        return HttpResponseBadRequest('No forms submitted in "{}"'.format(MAGIC_PROPERTY))
+    if len(instance_files) > MAX_BATCH_SIZE:
+        return HttpResponseBadRequest('A batch can not have more than {} forms'.format(MAX_BATCH_SIZE))
+    instances = [instance_file.read() for instance_file in instance_files]
+    if not all(instances):
+        return HttpResponseBadRequest('Empty form submission')
+
+    metric_tags = {
+        'backend': 'sql' if should_use_sql_backend(domain) else 'couch',
+        'domain': domain
+    }
+    if toggles.FORM_SUBMISSION_BLACKLIST.enabled(domain):
+        response = openrosa_response.BLACKLISTED_RESPONSE
+        _record_metrics(metric_tags, 'blacklisted', response)
+        return response
+
+    user_id = request.couch_user.get_id
+    try:
+        results = process_submission_batch(
+            domain,
+            instances,
+            auth_context=AuthContext(
+                domain=domain,
+                user_id=user_id,
+                authenticated=True,
+            ),
+            location=couchforms.get_location(request),
+            received_on=couchforms.get_received_on(request),
+            date_header=couchforms.get_date_header(request),
+            path=couchforms.get_path(request),
+            submit_ip=couchforms.get_submit_ip(request),
+            last_sync_token=couchforms.get_last_sync_token(request),
+            openrosa_headers=couchforms.get_openrosa_headers(request),
+        )
+    except XFormLockError as err:
+        logging.warning('Unable to get lock for form %s', err)
+        metrics_counter('commcare.xformlocked.count', tags={
+            'domain': domain, 'authenticated': True
+        })
+        return _submission_error(
+            request, "XFormLockError: %s" % err,
+            metric_tags, domain, None, user_id, True, status=423,
+            notify=False,
+        )
+
+    for result in results:
+        _record_metrics(dict(metric_tags), result.submission_type, result.response, xform=result.xform)
+    return JsonResponse({'results': [
+        {
+            'form_id': result.xform.form_id if result.xform else None,
+            'status_code': result.response.status_code,
+            'response': result.response.content.decode('utf-8'),
+        }
+        for result in results
+    ]})
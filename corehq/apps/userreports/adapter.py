@@ -52,6 +52,24 @@ class IndicatorAdapter(object):
         """
         raise NotImplementedError
 
+    def best_effort_bulk_save(self, docs):
+        """
+        Like ``best_effort_save`` but saves the rows of all the documents
+        together. If they can't be saved together, each document's rows
+        are saved on their own so that errors are handled per document.
+        """
+        rows_by_doc = []
+        for doc in docs:
+            try:
+                rows_by_doc.append((doc, self.get_all_values(doc)))
+            except Exception as e:
+                self.handle_exception(doc, e)
+        try:
+            self.save_rows([row for doc, rows in rows_by_doc for row in rows])
+        except Exception:
+            for doc, rows in rows_by_doc:
+                self._best_effort_save_rows(rows, doc)
+
     def handle_exception(self, doc, exception):
         from corehq.util.cache_utils import is_rate_limited
         ex_clss = exception.__class__
@@ -92,6 +110,19 @@ class IndicatorAdapter(object):
         "Gets all the values from a document to save"
         return self.config.get_all_values(doc, eval_context)
 
+    def get_column_values(self, docs, eval_contexts):
+        """
+        Gets all the values to save from documents that pass the data source
+        filter, as a list of ``(column, values)`` pairs
+        """
+        return self.config.get_column_values(docs, eval_contexts)
+
+    def save_column_values(self, column_values, use_shard_col=True):
+        """
+        Like ``save_rows`` but takes the output of ``get_column_values``
+        """
+        raise NotImplementedError
+
     def bulk_delete(self, docs, use_shard_col=True):
         for doc in docs:
             self.delete(doc, use_shard_col)
@@ -182,6 +213,10 @@ class IndicatorAdapterLoadTracker(object):
         self._track_load(len(rows))
         self.adapter.save_rows(rows, use_shard_col)
 
+    def save_column_values(self, column_values, use_shard_col=True):
+        self._track_load(len(column_values[0][1]) if column_values else 0)
+        self.adapter.save_column_values(column_values, use_shard_col)
+
     def delete(self, doc, use_shard_col=True):
         self._track_load()
         self.adapter.delete(doc, use_shard_col)
@@ -0,0 +1,380 @@
+"""
+Compiles a data source's filter, named expressions and indicators into closures.
+
+The interpreter evaluates a data source by walking the objects built by
+``ExpressionFactory``, ``FilterFactory`` and ``IndicatorFactory``, calling
+each node (and often a jsonobject property or two) for every document.
+``compile_data_source`` walks those objects once and replaces the node types
+that make up most data sources with plain closures:
+
+- identity, constant, property_name, property_path, root_doc, named,
+  conditional, coalesce and switch expressions
+- property and transformed getters used by raw and choice_list indicators
+- and, or, not, named and boolean_expression filters
+- boolean, raw and compound indicators
+
+Any other node is called as-is, so compiled results always match the
+interpreter. Property lookups (with their datatype transforms) that appear
+more than once in a data source are evaluated once per item and shared by
+every filter and column that uses them.
+"""
+import functools
+import threading
+from collections import Counter
+
+from corehq.apps.userreports.expressions.getters import (
+    DictGetter,
+    NestedDictGetter,
+    TransformedGetter,
+    evaluate_lazy_args,
+    safe_recursive_lookup,
+    transform_from_datatype,
+)
+from corehq.apps.userreports.expressions.specs import (
+    CoalesceExpressionSpec,
+    ConditionalExpressionSpec,
+    ConstantGetterSpec,
+    IdentityExpressionSpec,
+    NamedExpressionSpec,
+    PropertyNameGetterSpec,
+    PropertyPathGetterSpec,
+    RootDocExpressionSpec,
+    SwitchExpressionSpec,
+)
+from corehq.apps.userreports.filters import (
+    ANDFilter,
+    NamedFilter,
+    NOTFilter,
+    ORFilter,
+    SinglePropertyValueFilter,
+)
+from corehq.apps.userreports.indicators import (
+    BooleanIndicator,
+    ColumnValue,
+    CompoundIndicator,
+    RawIndicator,
+    SmallBooleanIndicator,
+)
+from corehq.util import eval_lazy
+
+# items a compiled node can be evaluated against; memoized values are
+# only shared between nodes evaluated against the same kind of item
+ITEM = 'item'
+ROOT_DOC = 'root_doc'
+
+
+class CompiledDataSource(object):
+    """Compiled equivalent of a data source's ``filter`` and ``indicators``"""
+
+    def __init__(self, config):
+        self._memo = threading.local()
+        compiler = _Compiler(self._memo)
+        # the first pass only counts shared subexpressions
+        compiler.build(config)
+        compiler.counting = False
+        self._filter, self._indicators = compiler.build(config)
+        self.shared_subexpressions = compiler.num_shared
+
+    def filter(self, document, eval_context):
+        self._memo.values = {}
+        return self._filter(document, eval_context)
+
+    def get_values(self, item, eval_context):
+        """Same as ``config.indicators.get_values(item, eval_context)``"""
+        self._memo.values = {}
+        values = []
+        for column, get_value, get_values in self._indicators:
+            if get_values is not None:
+                values.extend(get_values(item, eval_context))
+            else:
+                values.append(ColumnValue(column, get_value(item, eval_context)))
+        return values
+
+
+def compile_data_source(config):
+    return CompiledDataSource(config)
+
+
+class _Compiler(object):
+
+    def __init__(self, memo):
+        self.memo = memo
+        self.counting = True
+        self.counts = Counter()
+        self.num_shared = 0
+        self._compiled = {}
+
+    def build(self, config):
+        self._compiled = {}
+        filter_fn = self.filter(config._get_main_filter(), ITEM)
+        indicators = []
+        for indicator in self._flatten(config.indicators):
+            indicators.append(self.indicator(indicator))
+        return filter_fn, indicators
+
+    def _flatten(self, indicator):
+        if isinstance(indicator, CompoundIndicator):
+            for sub_indicator in indicator.indicators:
+                for flat in self._flatten(sub_indicator):
+                    yield flat
+        else:
+            yield indicator
+
+    def _cached(self, obj, kind, build):
+        # compile shared objects (named expressions, named filters) once
+        key = (id(obj), kind)
+        if key not in self._compiled:
+            self._compiled[key] = (obj, build())
+        return self._compiled[key][1]
+
+    def _shared(self, key, kind, fn):
+        """Evaluate fn once per item if the same subexpression is used elsewhere"""
+        slot = (key, kind)
+        if self.counting:
+            self.counts[slot] += 1
+            return fn
+        if self.counts[slot] < 2:
+            return fn
+        self.num_shared += 1
+        memo = self.memo
+
+        def shared_fn(item, context):
+            values = memo.values
+            try:
+                return values[slot]
+            except KeyError:
+                value = values[slot] = fn(item, context)
+                return value
+        return shared_fn
+
+    def indicator(self, indicator):
+        """
+        :returns: ``(column, get_value, get_values)`` where ``get_values`` is
+        only set for indicators that are not compiled.
+        """
+        if type(indicator) in _BOOLEAN_INDICATOR_TYPES:
+            test = self.filter(indicator.filter, ITEM)
+
+            def get_value(item, context):
+                return 1 if test(item, context) else 0
+            return indicator.column, get_value, None
+        if type(indicator) is RawIndicator:
+            return indicator.column, self.expression(indicator.getter, ITEM), None
+        return None, None, indicator.get_values
+
+    def filter(self, filter_, kind):
+        filter_type = type(filter_)
+        if filter_type is ANDFilter:
+            filters = [self.filter(f, kind) for f in filter_.filters]
+
+            def and_filter(item, context):
+                for fn in filters:
+                    if not fn(item, context):
+                        return False
+                return True
+            return and_filter
+        if filter_type is ORFilter:
+            filters = [self.filter(f, kind) for f in filter_.filters]
+
+            def or_filter(item, context):
+                for fn in filters:
+                    if fn(item, context):
+                        return True
+                return False
+            return or_filter
+        if filter_type is NOTFilter:
+            inner = self.filter(filter_._filter, kind)
+            return lambda item, context: not inner(item, context)
+        if filter_type is NamedFilter:
+            return self._cached(filter_.filter, kind, lambda: self.filter(filter_.filter, kind))
+        if filter_type is SinglePropertyValueFilter:
+            return self._single_property_value_filter(filter_, kind)
+        return filter_
+
+    def _single_property_value_filter(self, filter_, kind):
+        expression = self.expression(filter_.expression, kind)
+        operator = filter_.operator
+        reference = filter_.reference_expression
+        if type(reference) is ConstantGetterSpec:
+            value = reference.constant
+            return lambda item, context: operator(expression(item, context), value)
+        reference = self.expression(reference, kind)
+        return lambda item, context: operator(expression(item, context), reference(item, context))
+
+    def expression(self, expression, kind):
+        builder = _EXPRESSION_BUILDERS.get(type(expression))
+        if builder is not None:
+            compiled = builder(self, expression, kind)
+            if compiled is not None:
+                return compiled
+        if isinstance(expression, functools.partial):
+            return self._lazy_args_getter(expression, kind) or expression
+        if type(expression) is TransformedGetter:
+            return self._transformed_getter(expression, kind)
+        return expression
+
+    def _identity(self, expression, kind):
+        return lambda item, context: item
+
+    def _constant(self, expression, kind):
+        value = expression.constant
+        return lambda item, context: value
+
+    def _property_name(self, expression, kind):
+        name_expression = expression._property_name_expression
+        if type(name_expression) is not ConstantGetterSpec:
+            return None
+        name = name_expression.constant
+        transform = transform_from_datatype(expression.datatype)
+
+        def property_name(item, context):
+            return transform(item.get(name) if isinstance(item, dict) else None)
+        return self._shared(('property_name', name, expression.datatype), kind, property_name)
+
+    def _property_path(self, expression, kind):
+        path = list(expression.property_path)
+        transform = transform_from_datatype(expression.datatype)
+
+        def property_path(item, context):
+            return transform(safe_recursive_lookup(item, path))
+        return self._shared(('property_path', tuple(path), expression.datatype), kind, property_path)
+
+    def _root_doc(self, expression, kind):
+        inner = self.expression(expression._expression_fn, ROOT_DOC)
+
+        def root_doc(item, context):
+            if context is None:
+                return None
+            return inner(context.root_doc, context)
+        return root_doc
+
+    def _named(self, expression, kind):
+        name = expression.name
+        named_expression = expression._context.named_expressions[name]
+        inner = self._cached(named_expression, kind, lambda: self.expression(named_expression, kind))
+
+        def named(item, context):
+            # same caching as NamedExpressionSpec
+            key = 'named_expression-{}-{}'.format(name, id(item))
+            if context and context.exists_in_cache(key):
+                return context.get_cache_value(key)
+            result = inner(item, context)
+            if context:
+                context.set_iteration_cache_value(key, result)
+            return result
+        return named
+
+    def _conditional(self, expression, kind):
+        test = self.filter(expression._test_function, kind)
+        if_true = self.expression(expression._true_expression, kind)
+        if_false = self.expression(expression._false_expression, kind)
+
+        def conditional(item, context):
+            if test(item, context):
+                return if_true(item, context)
+            return if_false(item, context)
+        return conditional
+
+    def _coalesce(self, expression, kind):
+        value_expression = self.expression(expression._expression, kind)
+        default_expression = self.expression(expression._default_expression, kind)
+
+        def coalesce(item, context):
+            value = value_expression(item, context)
+            default = default_expression(item, context)
+            if value is None or value == '':
+                return default
+            return value
+        return coalesce
+
+    def _switch(self, expression, kind):
+        switch_on = self.expression(expression._switch_on_expression, kind)
+        cases = [
+            (case, self.expression(expression._case_expressions[case], kind))
+            for case in expression.cases
+        ]
+        default = self.expression(expression._default_expression, kind)
+
+        def switch(item, context):
+            value = switch_on(item, context)
+            for case, case_expression in cases:
+                if value == case:
+                    return case_expression(item, context)
+            return default(item, context)
+        return switch
+
+    def _lazy_args_getter(self, partial, kind):
+        # getters built by getter_from_property_reference
+        if partial.func is not evaluate_lazy_args or len(partial.args) != 1:
+            return None
+        getter = partial.args[0]
+        if type(getter) is DictGetter:
+            name = getter.property_name
+
+            def dict_getter(item, context):
+                item = eval_lazy(item)
+                if not isinstance(item, dict):
+                    return None
+                try:
+                    return item[name]
+                except KeyError:
+                    return None
+            return self._shared(('dict_getter', name), kind, dict_getter)
+        if type(getter) is NestedDictGetter:
+            path = getter.property_path
+
+            def nested_dict_getter(item, context):
+                return safe_recursive_lookup(eval_lazy(item), path)
+            return self._shared(('nested_dict_getter', tuple(path)), kind, nested_dict_getter)
+        return None
+
+    def _transformed_getter(self, expression, kind):
+        inner = self.expression(expression.getter, kind)
+        transform = expression.transform
+        if not transform:
+            return inner
+
+        def transformed(item, context):
+            return transform(inner(item, context))
+        key = _get_transform_key(transform)
+        inner_key = _get_shared_key(expression.getter)
+        if key is None or inner_key is None:
+            return transformed
+        return self._shared(('transformed', inner_key, key), kind, transformed)
+
+
+def _get_transform_key(transform):
+    if (isinstance(transform, functools.partial)
+            and transform.func is evaluate_lazy_args and len(transform.args) == 1):
+        return transform.args[0]
+    return None
+
+
+def _get_shared_key(getter):
+    if isinstance(getter, functools.partial) and getter.func is evaluate_lazy_args and len(getter.args) == 1:
+        inner = getter.args[0]
+        if type(inner) is DictGetter:
+            return 'dict_getter', inner.property_name
+        if type(inner) is NestedDictGetter:
+            return 'nested_dict_getter', tuple(inner.property_path)
+    if type(getter) is TransformedGetter:
+        inner_key = _get_shared_key(getter.getter)
+        key = _get_transform_key(getter.transform) if getter.transform else 'none'
+        if inner_key is not None and key is not None:
+            return 'transformed', inner_key, key
+    return None
+
+
+_BOOLEAN_INDICATOR_TYPES = {BooleanIndicator, SmallBooleanIndicator}
+
+_EXPRESSION_BUILDERS = {
+    IdentityExpressionSpec: _Compiler._identity,
+    ConstantGetterSpec: _Compiler._constant,
+    PropertyNameGetterSpec: _Compiler._property_name,
+    PropertyPathGetterSpec: _Compiler._property_path,
+    RootDocExpressionSpec: _Compiler._root_doc,
+    NamedExpressionSpec: _Compiler._named,
+    ConditionalExpressionSpec: _Compiler._conditional,
+    CoalesceExpressionSpec: _Compiler._coalesce,
+    SwitchExpressionSpec: _Compiler._switch,
+}
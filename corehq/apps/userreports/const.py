@@ -50,6 +50,10 @@ VALID_REFERENCED_DOC_TYPES = [
 ASYNC_INDICATOR_QUEUE_TIME = timedelta(minutes=5)
 ASYNC_INDICATOR_CHUNK_SIZE = getattr(settings, 'ASYNC_INDICATOR_CHUNK_SIZE', 100)
 ASYNC_INDICATOR_MAX_RETRIES = 20
+# AsyncIndicators queued longer ago than this are assumed to have been lost and are queued again
+ASYNC_INDICATOR_REQUEUE_AFTER = timedelta(hours=4)
+# number of AsyncIndicators claimed at once by process_async_indicators
+ASYNC_INDICATOR_BATCH_SIZE = getattr(settings, 'ASYNC_INDICATOR_BATCH_SIZE', 1000)
 
 XFORM_CACHE_KEY_PREFIX = 'xform_to_json_cache'
 
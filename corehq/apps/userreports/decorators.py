@@ -40,8 +40,7 @@ def ucr_context_cache(vary_on=()):
         assert 'context' in fn.__code__.co_varnames
         assert isinstance(vary_on, tuple)
 
-        @wraps(fn)
-        def _inner(*args, **kwargs):
+        def _get_context_and_cache_key(*args, **kwargs):
             # shamelessly stolen from quickcache
             callargs = inspect.getcallargs(fn, *args, **kwargs)
             context = callargs['context']
@@ -50,10 +49,25 @@ def ucr_context_cache(vary_on=()):
                 hashlib.md5(inspect.getsource(fn).encode('utf-8')).hexdigest()[-8:]
             )
             cache_key = (prefix,) + tuple(callargs[arg_name] for arg_name in vary_on)
+            return context, cache_key
+
+        @wraps(fn)
+        def _inner(*args, **kwargs):
+            context, cache_key = _get_context_and_cache_key(*args, **kwargs)
             if context.exists_in_cache(cache_key):
                 return context.get_cache_value(cache_key)
             res = fn(*args, **kwargs)
             context.set_cache_value(cache_key, res)
             return res
+
+        def prime(value, *args, **kwargs):
+            """
+            Cache ``value`` as the result of calling the function with
+            ``*args`` and ``**kwargs``, e.g. after fetching it in bulk
+            """
+            context, cache_key = _get_context_and_cache_key(*args, **kwargs)
+            context.set_cache_value(cache_key, value)
+
+        _inner.prime = prime
         return _inner
     return decorator
@@ -47,6 +47,19 @@ class ConfigurableIndicatorMixIn(object):
     def get_values(self, item, context=None):
         raise NotImplementedError()
 
+    def get_column_values(self, batch):
+        """
+        Columnar equivalent of ``get_values`` for every item in an ``ItemBatch``
+
+        :returns: a list of ``(column, values)`` pairs, with one value per item
+        """
+        columns = self.get_columns()
+        values_by_column = [[] for column in columns]
+        for item, context in zip(batch.items, batch.contexts):
+            for values, column_value in zip(values_by_column, self.get_values(item, context)):
+                values.append(column_value.value)
+        return list(zip(columns, values_by_column))
+
 
 class ConfigurableIndicator(ConfigurableIndicatorMixIn):
 
@@ -82,6 +95,9 @@ class BooleanIndicator(SingleColumnIndicator):
         value = 1 if self.filter(item, context) else 0
         return [ColumnValue(self.column, value)]
 
+    def get_column_values(self, batch):
+        return [(self.column, [1 if value else 0 for value in batch.evaluate_filter(self.filter)])]
+
 
 class SmallBooleanIndicator(BooleanIndicator):
     column_datatype = TYPE_SMALL_INTEGER
@@ -99,6 +115,9 @@ class RawIndicator(SingleColumnIndicator):
     def get_values(self, item, context=None):
         return [ColumnValue(self.column, self.getter(item, context))]
 
+    def get_column_values(self, batch):
+        return [(self.column, batch.evaluate(self.getter))]
+
 
 class CompoundIndicator(ConfigurableIndicator):
     """
@@ -115,6 +134,9 @@ class CompoundIndicator(ConfigurableIndicator):
     def get_values(self, item, context=None):
         return [val for ind in self.indicators for val in ind.get_values(item, context)]
 
+    def get_column_values(self, batch):
+        return [val for ind in self.indicators for val in ind.get_column_values(batch)]
+
 
 class LedgerBalancesIndicator(ConfigurableIndicator):
     column_datatype = TYPE_INTEGER
@@ -0,0 +1,128 @@
+import functools
+
+from corehq.apps.userreports.expressions.getters import (
+    DictGetter,
+    NestedDictGetter,
+    TransformedGetter,
+    evaluate_lazy_args,
+    safe_recursive_lookup,
+    transform_date,
+    transform_datetime,
+    transform_decimal,
+    transform_int,
+    transform_unicode,
+)
+from corehq.apps.userreports.expressions.specs import ConstantGetterSpec
+from corehq.apps.userreports.filters import SinglePropertyValueFilter
+from corehq.util import eval_lazy
+
+# transforms that always return immutable values, so a value converted
+# once can be reused by every row in the batch with the same input
+_REUSABLE_TRANSFORMS = {
+    transform_date,
+    transform_datetime,
+    transform_decimal,
+    transform_int,
+    transform_unicode,
+}
+
+
+class ItemBatch(object):
+    """
+    A batch of items, each with its own evaluation context, that indicators
+    are evaluated against one column at a time.
+
+    Each expression or filter object is only evaluated once per batch, so
+    indicators that share a getter (e.g. every column of a choice list)
+    share its values.
+    """
+
+    def __init__(self, items, contexts):
+        assert len(items) == len(contexts)
+        self.items = items
+        self.contexts = contexts
+        # keep a reference to each evaluated object so its id is not reused
+        self._values = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def evaluate(self, expression):
+        """
+        :returns: a list with the value of ``expression`` for each item
+        """
+        key = id(expression)
+        if key not in self._values:
+            self._values[key] = (expression, self._evaluate(expression))
+        return self._values[key][1]
+
+    def evaluate_filter(self, filter_):
+        """
+        :returns: a list with the result of ``filter_`` for each item
+        """
+        key = id(filter_)
+        if key not in self._values:
+            self._values[key] = (filter_, self._evaluate_filter(filter_))
+        return self._values[key][1]
+
+    def _evaluate(self, expression):
+        if type(expression) is TransformedGetter:
+            values = self.evaluate(expression.getter)
+            if not expression.transform:
+                return values
+            return _map_transform(expression.transform, values)
+
+        getter = _get_lazy_args_getter(expression)
+        if type(getter) is DictGetter:
+            name = getter.property_name
+            return [_get_property(eval_lazy(item), name) for item in self.items]
+        if type(getter) is NestedDictGetter:
+            path = getter.property_path
+            return [safe_recursive_lookup(eval_lazy(item), path) for item in self.items]
+        return [expression(item, context) for item, context in zip(self.items, self.contexts)]
+
+    def _evaluate_filter(self, filter_):
+        if (type(filter_) is SinglePropertyValueFilter
+                and type(filter_.reference_expression) is ConstantGetterSpec):
+            operator = filter_.operator
+            reference = filter_.reference_expression.constant
+            return [operator(value, reference) for value in self.evaluate(filter_.expression)]
+        return [filter_(item, context) for item, context in zip(self.items, self.contexts)]
+
+
+def _get_lazy_args_getter(expression):
+    # getters built by getter_from_property_reference
+    if (isinstance(expression, functools.partial)
+            and expression.func is evaluate_lazy_args and len(expression.args) == 1):
+        return expression.args[0]
+    return None
+
+
+def _get_property(item, name):
+    # same as DictGetter
+    if not isinstance(item, dict):
+        return None
+    try:
+        return item[name]
+    except KeyError:
+        return None
+
+
+def _map_transform(transform, values):
+    func = _get_lazy_args_getter(transform)
+    if func not in _REUSABLE_TRANSFORMS:
+        return [transform(value) for value in values]
+
+    # the same strings (e.g. dates) tend to repeat within a batch
+    converted = {}
+    result = []
+    for value in values:
+        if type(value) is str:
+            try:
+                result.append(converted[value])
+            except KeyError:
+                converted[value] = func(value)
+                result.append(converted[value])
+        else:
+            result.append(transform(value))
+    return result
@@ -104,12 +104,14 @@ def _build_choice_list_indicator(spec, context):
     def _construct_column(choice):
         return '{col}_{choice}'.format(col=spec['column_id'], choice=choice)
 
+    # share one getter so batch evaluation only looks the property up once
+    getter = wrapped_spec.getter
     choice_indicators = [
         BooleanIndicator(
             display_name=_construct_display(choice),
             column_id=_construct_column(choice),
             filter=SinglePropertyValueFilter(
-                expression=wrapped_spec.getter,
+                expression=getter,
                 operator=wrapped_spec.get_operator(),
                 reference_expression=ExpressionFactory.from_spec(choice),
             ),
@@ -10,11 +10,23 @@ class Command(BaseCommand):
         parser.add_argument('indicator_config_id')
         parser.add_argument('--in-place', action='store_true', dest='in_place', default=False,
                             help='Rebuild table in place (preserve existing data)')
+        parser.add_argument('--in-slices', action='store_true', dest='in_slices', default=False,
+                            help='Rebuild into a shadow table with a celery task per shard and id range, '
+                                 'and replace the table when all tasks have finished')
+        parser.add_argument('--ranges-per-shard', type=int, default=1, dest='ranges_per_shard',
+                            help='Number of id ranges to split each shard into with --in-slices')
         parser.add_argument('--initiated-by', action='store', required=True, dest='initiated',
                             help='Who initiated the rebuild (for sending email notifications)')
 
     def handle(self, indicator_config_id, **options):
-        if options['in_place']:
+        if options['in_slices']:
+            tasks.rebuild_indicators_in_slices(
+                indicator_config_id,
+                initiated_by=options['initiated'],
+                source='rebuild_indicator_table',
+                ranges_per_shard=options['ranges_per_shard'],
+            )
+        elif options['in_place']:
             tasks.rebuild_indicators_in_place(
                 indicator_config_id, options['initiated'], source='rebuild_indicator_table'
             )
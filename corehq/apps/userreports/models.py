@@ -71,6 +71,7 @@ from corehq.apps.userreports.exceptions import (
 from corehq.apps.userreports.expressions.factory import ExpressionFactory
 from corehq.apps.userreports.filters.factory import FilterFactory
 from corehq.apps.userreports.indicators import CompoundIndicator
+from corehq.apps.userreports.indicators.batch import ItemBatch
 from corehq.apps.userreports.indicators.factory import IndicatorFactory
 from corehq.apps.userreports.reports.factory import (
     ChartFactory,
@@ -87,6 +88,7 @@ from corehq.apps.userreports.util import (
 )
 from corehq.pillows.utils import get_deleted_doc_types
 from corehq.sql_db.connections import UCR_ENGINE_ID, connection_manager
+from corehq.toggles import COMPILED_UCR_EXPRESSIONS
 from corehq.util.couch import DocumentNotFound, get_document_or_not_found
 from corehq.util.quickcache import quickcache
 
@@ -267,9 +269,23 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
         if eval_context is None:
             eval_context = EvaluationContext(document)
 
+        compiled = self.get_compiled()
+        if compiled is not None:
+            return compiled.filter(document, eval_context)
         filter_fn = self._get_main_filter()
         return filter_fn(document, eval_context)
 
+    @memoized
+    def get_compiled(self):
+        """
+        :returns: A ``CompiledDataSource`` if compiled expressions are
+        enabled for the domain, otherwise `None`.
+        """
+        if not COMPILED_UCR_EXPRESSIONS.enabled(self.domain):
+            return None
+        from corehq.apps.userreports.compiler import compile_data_source
+        return compile_data_source(self)
+
     def deleted_filter(self, document):
         filter_fn = self._get_deleted_filter()
         return filter_fn and filter_fn(document, EvaluationContext(document, 0))
@@ -452,19 +468,22 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
 
     def get_items(self, document, eval_context=None):
         if self.filter(document, eval_context):
-            if not self.base_item_expression:
-                return [document]
-            else:
-                result = self.parsed_expression(document, eval_context)
-                if result is None:
-                    return []
-                elif isinstance(result, list):
-                    return result
-                else:
-                    return [result]
+            return self._get_base_items(document, eval_context)
         else:
             return []
 
+    def _get_base_items(self, document, eval_context):
+        if not self.base_item_expression:
+            return [document]
+        else:
+            result = self.parsed_expression(document, eval_context)
+            if result is None:
+                return []
+            elif isinstance(result, list):
+                return result
+            else:
+                return [result]
+
     def get_all_values(self, doc, eval_context=None):
         if not eval_context:
             eval_context = EvaluationContext(doc)
@@ -486,14 +505,42 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
                     )
                 return []
 
+        compiled = self.get_compiled()
+        indicators = compiled if compiled is not None else self.indicators
         rows = []
         for item in self.get_items(doc, eval_context):
-            values = self.indicators.get_values(item, eval_context)
+            values = indicators.get_values(item, eval_context)
             rows.append(values)
             eval_context.increment_iteration()
 
         return rows
 
+    def get_column_values(self, docs, eval_contexts):
+        """
+        Columnar equivalent of ``get_all_values`` for documents that are
+        already known to pass the data source filter.
+
+        Data sources with validations are evaluated one document at a time.
+
+        :returns: a list of ``(column, values)`` pairs, with one value per row
+        """
+        if self.has_validations:
+            rows = []
+            for doc, eval_context in zip(docs, eval_contexts):
+                rows.extend(self.get_all_values(doc, eval_context))
+            return [
+                (column, [row[i].value for row in rows])
+                for i, column in enumerate(self.get_columns())
+            ]
+
+        items = []
+        contexts = []
+        for doc, eval_context in zip(docs, eval_contexts):
+            for iteration, item in enumerate(self._get_base_items(doc, eval_context)):
+                items.append(item)
+                contexts.append(eval_context.get_iteration_context(eval_context.iteration + iteration))
+        return self.indicators.get_column_values(ItemBatch(items, contexts))
+
     def get_report_count(self):
         """
         Return the number of ReportConfigurations that reference this data source.
@@ -33,6 +33,7 @@ from corehq.apps.userreports.exceptions import (
     UserReportsWarning,
 )
 from corehq.apps.userreports.models import AsyncIndicator
+from corehq.apps.userreports.planner import RelatedDocPlanner
 from corehq.apps.userreports.rebuild import (
     get_table_diffs,
     get_tables_rebuild_migrate,
@@ -43,6 +44,7 @@ from corehq.apps.userreports.sql import get_metadata
 from corehq.apps.userreports.tasks import rebuild_indicators
 from corehq.apps.userreports.util import get_indicator_adapter
 from corehq.sql_db.connections import connection_manager
+from corehq.toggles import BATCH_UCR_EVALUATION, UCR_PREFETCH_RELATED_DOCS
 from corehq.util.soft_assert import soft_assert
 from corehq.util.timer import TimingContext
 
@@ -187,6 +189,7 @@ class ConfigurableReportTableManagerMixin(object):
             pillow_logging.warning("UCR pillow has no configs to process")
 
         self.table_adapters_by_domain = defaultdict(list)
+        self.related_doc_planners_by_domain = {}
 
         for config in configs:
             self.table_adapters_by_domain[config.domain].append(
@@ -306,6 +309,16 @@ class ConfigurableReportTableManagerMixin(object):
             domain_adapters.append(self._get_indicator_adapter(new_data_source))
             # update dictionary
             self.table_adapters_by_domain[new_data_source.domain] = domain_adapters
+            self.related_doc_planners_by_domain.pop(new_data_source.domain, None)
+
+    def _get_related_doc_planner(self, domain):
+        if domain not in self.related_doc_planners_by_domain:
+            # docs for asynchronous data sources are processed later, on their own
+            self.related_doc_planners_by_domain[domain] = RelatedDocPlanner([
+                adapter.config for adapter in self.table_adapters_by_domain[domain]
+                if not adapter.run_asynchronous
+            ])
+        return self.related_doc_planners_by_domain[domain]
 
 
 class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, BulkPillowProcessor):
@@ -360,23 +373,38 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
         changes_by_id = {change.id: change for change in changes_chunk}
         to_delete_by_adapter = defaultdict(list)
         rows_to_save_by_adapter = defaultdict(list)
+        docs_to_transform_by_adapter = defaultdict(list)
+        column_values_by_adapter = {}
         async_configs_by_doc_id = defaultdict(list)
         to_update = {change for change in changes_chunk if not change.deleted}
         with self._metrics_timer('extract'):
             retry_changes, docs = bulk_fetch_changes_docs(to_update, domain)
         change_exceptions = []
+        batch_evaluation = BATCH_UCR_EVALUATION.enabled(domain)
+        eval_contexts = {doc['_id']: EvaluationContext(doc) for doc in docs}
+
+        if UCR_PREFETCH_RELATED_DOCS.enabled(domain):
+            with self._metrics_timer('prefetch_related_docs'):
+                try:
+                    self._get_related_doc_planner(domain).prefetch(domain, docs, eval_contexts)
+                except Exception:
+                    # related docs are fetched on demand if prefetching fails
+                    pillow_logging.exception("Error prefetching related docs for domain %s", domain)
 
         with self._metrics_timer('single_batch_transform'):
             for doc in docs:
                 change = changes_by_id[doc['_id']]
                 doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
+                eval_context = eval_contexts[doc['_id']]
                 with self._metrics_timer('single_doc_transform'):
                     for adapter in adapters:
                         with self._per_config_metrics_timer('transform', adapter.config._id):
                             if adapter.config.filter(doc, eval_context):
                                 if adapter.run_asynchronous:
                                     async_configs_by_doc_id[doc['_id']].append(adapter.config._id)
+                                elif batch_evaluation:
+                                    docs_to_transform_by_adapter[adapter].append((doc, eval_context))
+                                    eval_context.reset_iteration()
                                 else:
                                     try:
                                         rows_to_save_by_adapter[adapter].extend(adapter.get_all_values(doc, eval_context))
@@ -389,6 +417,20 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
                                 # if the subtype matches our filters, but the full filter no longer applies
                                 to_delete_by_adapter[adapter].append(doc)
 
+        if docs_to_transform_by_adapter:
+            with self._metrics_timer('batch_transform'):
+                for adapter, docs_to_transform in docs_to_transform_by_adapter.items():
+                    with self._per_config_metrics_timer('transform', adapter.config._id):
+                        try:
+                            column_values_by_adapter[adapter] = adapter.get_column_values(
+                                *zip(*docs_to_transform)
+                            )
+                        except Exception:
+                            # evaluate one doc at a time to find the ones that failed
+                            change_exceptions.extend(self._transform_serially(
+                                adapter, docs_to_transform, changes_by_id, rows_to_save_by_adapter
+                            ))
+
         with self._metrics_timer('single_batch_delete'):
             # bulk delete by adapter
             to_delete = [{'_id': c.id} for c in changes_chunk if c.deleted]
@@ -411,6 +453,12 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
                         adapter.save_rows(rows)
                     except Exception:
                         retry_changes.update(to_update)
+            for adapter, column_values in column_values_by_adapter.items():
+                with self._per_config_metrics_timer('load', adapter.config._id):
+                    try:
+                        adapter.save_column_values(column_values)
+                    except Exception:
+                        retry_changes.update(to_update)
 
         if async_configs_by_doc_id:
             with self._metrics_timer('async_config_load'):
@@ -422,6 +470,17 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
         return retry_changes, change_exceptions
 
+    @staticmethod
+    def _transform_serially(adapter, docs_to_transform, changes_by_id, rows_to_save_by_adapter):
+        change_exceptions = []
+        for doc, eval_context in docs_to_transform:
+            try:
+                rows_to_save_by_adapter[adapter].extend(adapter.get_all_values(doc, eval_context))
+            except Exception as e:
+                change_exceptions.append((changes_by_id[doc['_id']], e))
+            eval_context.reset_iteration()
+        return change_exceptions
+
     def _metrics_timer(self, step, config_id=None):
         tags = {
             'action': step,
@@ -0,0 +1,208 @@
+"""
+Plans the related documents needed to process a chunk of changes for all
+of a domain's data sources, so that they can be fetched in bulk.
+
+Without planning, every ``related_doc`` expression fetches its document
+on first use for each changed document, one request at a time. The
+evaluation context cache only shares those fetches between data sources
+processing the same document.
+
+``RelatedDocPlanner`` finds every ``related_doc`` expression used by a
+set of data sources, including those inside named expressions and named
+filters. ``RelatedDocPlanner.prefetch`` evaluates their doc ID expressions
+against each document in a chunk that passes the filter of a data source
+that uses them. It then fetches all the referenced documents with one
+bulk request per document type and primes each document's evaluation
+context cache with the results.
+
+The doc IDs are evaluated against the root document. Expressions that
+are actually evaluated against something else (e.g. a repeat item) will
+usually not find an ID there and are then fetched on demand as before.
+``related_doc`` expressions inside another one's value expression are
+evaluated against the related document, in an evaluation context of its
+own, so they are not planned at all.
+"""
+import functools
+import json
+from collections import Counter, defaultdict, namedtuple
+
+from pillowtop.dao.exceptions import DocumentNotFoundError
+
+from corehq.apps.change_feed.data_sources import get_document_store_for_doc_type
+from corehq.apps.userreports.expressions.specs import RelatedDocExpressionSpec
+from corehq.util.metrics import metrics_counter
+
+LOAD_SOURCE = 'related_doc_prefetch'
+
+# configs: the data sources that use the lookup
+RelatedDocLookup = namedtuple('RelatedDocLookup', 'related_doc_type doc_id_expression depth configs')
+
+
+class RelatedDocPlanner(object):
+
+    def __init__(self, configs):
+        """
+        :param configs: The data sources that changed docs are processed
+        for. Asynchronous data sources should be left out, since their docs
+        are not processed with the chunk.
+        """
+        self.lookups = _get_related_doc_lookups(configs)
+        self.configs = list({id(config): config for lookup in self.lookups for config in lookup.configs}.values())
+
+    def prefetch(self, domain, docs, eval_contexts):
+        """
+        Fetch the related docs referenced by ``docs`` and prime their
+        evaluation contexts.
+
+        Lookups whose doc ID comes from another related doc (e.g. a parent
+        case's parent) are planned after the docs they depend on have been
+        fetched.
+
+        Only the lookups of data sources whose filters a doc passes are
+        evaluated for it.
+
+        :param eval_contexts: ``EvaluationContext`` for each doc, by doc ID
+        """
+        if not self.lookups:
+            return
+        matching_config_ids_by_doc_id = {
+            doc['_id']: self._get_matching_config_ids(doc, eval_contexts[doc['_id']])
+            for doc in docs
+        }
+        for lookups in _group_by_depth(self.lookups):
+            self._prefetch(domain, lookups, docs, eval_contexts, matching_config_ids_by_doc_id)
+
+    def _get_matching_config_ids(self, doc, eval_context):
+        """
+        :returns: set of the IDs of the data sources whose filters ``doc`` passes
+        """
+        # related docs that the filters fetch are cached in the shared context
+        context = eval_context.get_iteration_context(0)
+        matching = set()
+        for config in self.configs:
+            try:
+                if config.filter(doc, context):
+                    matching.add(id(config))
+            except Exception:
+                # leave it to the data source to raise the error
+                continue
+        return matching
+
+    def _prefetch(self, domain, lookups, docs, eval_contexts, matching_config_ids_by_doc_id):
+        related_keys_by_doc_id = defaultdict(set)
+        for doc in docs:
+            matching_config_ids = matching_config_ids_by_doc_id[doc['_id']]
+            # don't leave named expression values in the context's iteration cache
+            context = eval_contexts[doc['_id']].get_iteration_context(0)
+            for lookup in lookups:
+                if not any(id(config) in matching_config_ids for config in lookup.configs):
+                    continue
+                try:
+                    doc_id = lookup.doc_id_expression(doc, context)
+                except Exception:
+                    # leave it to the data source to raise the error
+                    continue
+                if doc_id and isinstance(doc_id, str):
+                    related_keys_by_doc_id[doc['_id']].add((lookup.related_doc_type, doc_id))
+
+        # without prefetching each changed doc fetches each of its related docs itself
+        requested_by_type = Counter()
+        doc_ids_by_type = defaultdict(set)
+        for keys in related_keys_by_doc_id.values():
+            for related_doc_type, doc_id in keys:
+                requested_by_type[related_doc_type] += 1
+                doc_ids_by_type[related_doc_type].add(doc_id)
+
+        related_docs = {}
+        for related_doc_type, doc_ids in doc_ids_by_type.items():
+            fetched = _bulk_fetch(domain, related_doc_type, doc_ids)
+            if fetched is None:
+                continue
+            for doc_id in doc_ids:
+                related_docs[(related_doc_type, doc_id)] = fetched.get(doc_id)
+            tags = {'related_doc_type': related_doc_type}
+            metrics_counter('commcare.ucr.related_doc_prefetch.fetched', len(doc_ids), tags=tags)
+            metrics_counter('commcare.ucr.related_doc_prefetch.saved',
+                            requested_by_type[related_doc_type] - len(doc_ids), tags=tags)
+
+        for doc_id, keys in related_keys_by_doc_id.items():
+            context = eval_contexts[doc_id]
+            for key in keys:
+                if key in related_docs:
+                    _prime_related_doc(key, related_docs[key], context)
+
+
+def _group_by_depth(lookups):
+    by_depth = defaultdict(list)
+    for lookup in lookups:
+        by_depth[lookup.depth].append(lookup)
+    return [by_depth[depth] for depth in sorted(by_depth)]
+
+
+def _bulk_fetch(domain, related_doc_type, doc_ids):
+    """
+    :returns: dict of docs by ID or ``None`` if the document store
+    for this doc type can't fetch documents in bulk
+    """
+    document_store = get_document_store_for_doc_type(domain, related_doc_type, load_source=LOAD_SOURCE)
+    try:
+        return {doc['_id']: doc for doc in document_store.iter_documents(list(doc_ids))}
+    except (NotImplementedError, DocumentNotFoundError):
+        return None
+
+
+def _prime_related_doc(key, doc, context):
+    related_doc_type, doc_id = key
+    # same as RelatedDocExpressionSpec._get_document
+    if doc is not None and context.root_doc['domain'] != doc.get('domain'):
+        doc = None
+    RelatedDocExpressionSpec._get_document.prime(doc, related_doc_type, doc_id, context)
+
+
+def _get_related_doc_lookups(configs):
+    """
+    :returns: list of a distinct ``RelatedDocLookup`` for every
+    ``related_doc`` expression used by ``configs``
+    """
+    lookups = {}
+    for config in configs:
+        roots = [config._get_main_filter(), config.indicators, config.parsed_expression]
+        for spec in _iter_related_doc_expressions(roots):
+            key = (spec.related_doc_type, json.dumps(spec.doc_id_expression, sort_keys=True, default=str))
+            if key not in lookups:
+                # the number of related docs needed to get this doc's ID
+                depth = len(list(_iter_related_doc_expressions([spec._doc_id_expression])))
+                lookups[key] = RelatedDocLookup(spec.related_doc_type, spec._doc_id_expression, depth, [])
+            if not any(owner is config for owner in lookups[key].configs):
+                lookups[key].configs.append(config)
+    return list(lookups.values())
+
+
+def _iter_related_doc_expressions(roots):
+    seen = set()
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, RelatedDocExpressionSpec):
+            yield obj
+            # the value expression is evaluated against the related doc in a
+            # new context, which the prefetched docs aren't primed in
+            stack.append(obj._doc_id_expression)
+        elif isinstance(obj, (list, tuple, set)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, functools.partial):
+            stack.extend(obj.args)
+        elif _is_spec_object(obj):
+            stack.extend(vars(obj).values())
+
+
+def _is_spec_object(obj):
+    # expressions, filters and indicators (including custom ones) all
+    # keep the objects they evaluate as instance attributes
+    module = type(obj).__module__ or ''
+    return hasattr(obj, '__dict__') and module.startswith(('corehq.', 'custom.'))
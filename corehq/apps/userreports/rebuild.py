@@ -1,5 +1,10 @@
+import json
 import logging
-from collections import defaultdict
+import math
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from django.db.models import Max, Min, Q
 
 import attr
 from alembic.autogenerate import compare_metadata
@@ -13,10 +18,29 @@ from fluff.signals import (
     reformat_alembic_diffs,
 )
 
+from corehq.apps.userreports.adapter import IndicatorAdapterLoadTracker
 from corehq.apps.userreports.models import id_is_static
+from corehq.apps.userreports.util import get_table_name
+from corehq.form_processor.models import CommCareCaseSQL, XFormInstanceSQL
+from corehq.form_processor.utils.general import should_use_sql_backend
+from corehq.sql_db.util import get_db_aliases_for_partitioned_query, paginate_query
+from corehq.util.metrics.load_counters import ucr_load_counter
 
 logger = logging.getLogger(__name__)
 
+# must not start with the UCR table prefix so that shadow tables aren't taken for data source tables
+SHADOW_TABLE_PREFIX = 'ucrshadow_'
+
+# The documents of a data source with the given case type or xmlns on one
+# shard database, with primary keys in [start_pk, end_pk)
+RebuildSlice = namedtuple('RebuildSlice', 'case_type_or_xmlns db_alias start_pk end_pk')
+
+# {referenced_doc_type: (model, id field, case type or xmlns field)}
+SLICEABLE_DOC_MODELS = {
+    'XFormInstance': (XFormInstanceSQL, 'form_id', 'xmlns'),
+    'CommCareCase': (CommCareCaseSQL, 'case_id', 'type'),
+}
+
 
 def get_redis_key_for_config(config):
     if id_is_static(config._id):
@@ -42,10 +66,137 @@ class DataSourceResumeHelper(object):
         self._client.rpush(self._key, case_type_or_xmlns)
 
     def clear_resume_info(self):
-        self._client.delete(self._key)
+        self._client.delete(
+            self._key, self._slices_key, self._completed_slices_key, self._started_key, self._replacing_key
+        )
 
     def has_resume_info(self):
-        return self._client.exists(self._key)
+        return bool(self._client.exists(self._key) or self._client.exists(self._slices_key))
+
+    @property
+    def _slices_key(self):
+        return '{}:slices'.format(self._key)
+
+    @property
+    def _completed_slices_key(self):
+        return '{}:completed-slices'.format(self._key)
+
+    @property
+    def _started_key(self):
+        return '{}:slices-started'.format(self._key)
+
+    @property
+    def _replacing_key(self):
+        return '{}:replacing'.format(self._key)
+
+    def set_slices(self, slices, started):
+        """Record the slices of a rebuild into a shadow table
+
+        :param started: When the rebuild started. Documents modified
+        since then are rebuilt again once the table has been replaced.
+        """
+        self._client.set(self._started_key, started.isoformat())
+        if slices:
+            self._client.sadd(self._slices_key, *[json.dumps(list(slice_)) for slice_ in slices])
+
+    def get_slices_started(self):
+        started = self._client.get(self._started_key)
+        return datetime.fromisoformat(started.decode('utf-8')) if started is not None else None
+
+    def add_completed_slice(self, slice_):
+        self._client.sadd(self._completed_slices_key, json.dumps(list(slice_)))
+
+    def get_incomplete_slices(self):
+        return [
+            RebuildSlice(*json.loads(slice_))
+            for slice_ in self._client.sdiff(self._slices_key, self._completed_slices_key)
+        ]
+
+    def claim_table_replacement(self):
+        """
+        :returns: True for exactly one caller once all slices are complete
+        """
+        return (
+            self.get_slices_started() is not None
+            and not self.get_incomplete_slices()
+            and bool(self._client.set(self._replacing_key, 1, nx=True))
+        )
+
+    def release_table_replacement(self):
+        self._client.delete(self._replacing_key)
+
+
+def can_rebuild_in_slices(config):
+    return (
+        config.referenced_doc_type in SLICEABLE_DOC_MODELS
+        and should_use_sql_backend(config.domain)
+        and not config.asynchronous
+        and not config.mirrored_engine_ids
+    )
+
+
+def get_shadow_table_name(config):
+    return get_table_name(config.domain, config.table_id, prefix=SHADOW_TABLE_PREFIX)
+
+
+def get_shadow_indicator_adapter(config, raise_errors=False, load_source="unknown"):
+    """Like ``get_indicator_adapter`` for the data source's shadow table"""
+    from corehq.apps.userreports.sql.adapter import (
+        ErrorRaisingIndicatorSqlAdapter,
+        IndicatorSqlAdapter,
+    )
+    adapter_cls = ErrorRaisingIndicatorSqlAdapter if raise_errors else IndicatorSqlAdapter
+    adapter = adapter_cls(config, override_table_name=get_shadow_table_name(config))
+    track_load = ucr_load_counter(config.engine_id, load_source, config.domain)
+    return IndicatorAdapterLoadTracker(adapter, track_load)
+
+
+def get_rebuild_slices(config, ranges_per_shard=1):
+    """Split the documents of a data source by shard and primary key range"""
+    model = SLICEABLE_DOC_MODELS[config.referenced_doc_type][0]
+    slices = []
+    for case_type_or_xmlns in config.get_case_type_or_xmlns_filter():
+        query = _get_doc_query(config, case_type_or_xmlns)
+        for db_alias in get_db_aliases_for_partitioned_query():
+            bounds = model.objects.using(db_alias).filter(query).aggregate(min_pk=Min('id'), max_pk=Max('id'))
+            if bounds['min_pk'] is None:
+                continue
+            step = math.ceil((bounds['max_pk'] + 1 - bounds['min_pk']) / ranges_per_shard)
+            for start_pk in range(bounds['min_pk'], bounds['max_pk'] + 1, step):
+                slices.append(RebuildSlice(case_type_or_xmlns, db_alias, start_pk, start_pk + step))
+    return slices
+
+
+def iter_slice_doc_ids(config, slice_):
+    model, id_field, __ = SLICEABLE_DOC_MODELS[config.referenced_doc_type]
+    query = _get_doc_query(config, slice_.case_type_or_xmlns)
+    query &= Q(id__gte=slice_.start_pk, id__lt=slice_.end_pk)
+    for doc_id, in paginate_query(
+            slice_.db_alias, model, query, values=[id_field], load_source='build_indicators'):
+        yield doc_id
+
+
+def iter_doc_ids_modified_since(config, case_type_or_xmlns, modified_since):
+    """Iterate ids of documents modified since ``modified_since``, including deleted documents"""
+    model, id_field, __ = SLICEABLE_DOC_MODELS[config.referenced_doc_type]
+    query = _get_doc_query(config, case_type_or_xmlns, include_deleted=True)
+    query &= Q(server_modified_on__gte=modified_since)
+    for db_alias in get_db_aliases_for_partitioned_query():
+        for doc_id, in paginate_query(db_alias, model, query, values=[id_field], load_source='build_indicators'):
+            yield doc_id
+
+
+def _get_doc_query(config, case_type_or_xmlns, include_deleted=False):
+    model, __, type_field = SLICEABLE_DOC_MODELS[config.referenced_doc_type]
+    query = Q(domain=config.domain)
+    if not include_deleted:
+        if model is XFormInstanceSQL:
+            query &= Q(state=XFormInstanceSQL.NORMAL)
+        else:
+            query &= Q(deleted=False)
+    if case_type_or_xmlns is not None:
+        query &= Q(**{type_field: case_type_or_xmlns})
+    return query
 
 
 @attr.s
@@ -58,3 +58,13 @@ class EvaluationContext(object):
     def reset_iteration(self):
         self.iteration_cache = {}
         self.iteration = 0
+
+    def get_iteration_context(self, iteration):
+        """
+        A context for a single iteration over the root doc that shares this
+        context's cache but has its own iteration cache
+        """
+        context = EvaluationContext(self.root_doc, iteration)
+        context.inserted_timestamp = self.inserted_timestamp
+        context.cache = self.cache
+        return context
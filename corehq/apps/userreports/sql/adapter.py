@@ -1,16 +1,19 @@
 import hashlib
 import itertools
 import logging
+from io import StringIO
+from uuid import uuid4
 
 from django.utils.translation import ugettext as _
 
 import psycopg2
 import sqlalchemy
 from memoized import memoized
-from sqlalchemy.exc import ProgrammingError, OperationalError
+from sqlalchemy.exc import DataError, DBAPIError, ProgrammingError, OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.schema import Index, PrimaryKeyConstraint
+from sqlalchemy.schema import CreateTable, Index, PrimaryKeyConstraint
 
+from corehq import toggles
 from corehq.apps.userreports.adapter import IndicatorAdapter
 from corehq.apps.userreports.exceptions import (
     ColumnNotFoundError,
@@ -25,6 +28,8 @@ from corehq.util.test_utils import unit_testing_only
 
 logger = logging.getLogger(__name__)
 
+# Saves of fewer rows use INSERT statements, which are faster for a few rows
+COPY_MIN_ROWS = 100
 
 engine_metadata = {}
 
@@ -117,6 +122,52 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         finally:
             self.session_helper.Session.commit()
 
+    def build_table_without_indexes(self):
+        """
+        (Re)create the table with its primary key but without its other
+        indexes, which are faster to build after the table has been
+        filled. Use ``create_indexes`` to add them.
+        """
+        self.session_helper.Session.remove()
+        table = self.get_table()
+        try:
+            with self.engine.begin() as connection:
+                table.drop(connection, checkfirst=True)
+                connection.execute(CreateTable(table))
+            self._apply_sql_addons()
+        except (ProgrammingError, OperationalError) as e:
+            raise TableRebuildError('problem building UCR table {}: {}'.format(self.config, e))
+        finally:
+            self.session_helper.Session.commit()
+
+    def create_indexes(self):
+        with self.engine.begin() as connection:
+            for index in self.get_table().indexes:
+                index.create(connection)
+
+    def replace_table(self, new_adapter):
+        """
+        Atomically replace this adapter's table with the table of
+        ``new_adapter``, which must have the same definition. Indexes are
+        renamed to the names of the indexes they replace.
+        """
+        self.session_helper.Session.remove()
+        table_name = self.get_table().name
+        new_table = new_adapter.get_table()
+        with self.engine.begin() as connection:
+            index_names = {
+                index_def: index_name
+                for index_name, index_def in _get_index_definitions(connection, table_name)
+            }
+            connection.execute('DROP TABLE IF EXISTS "{}"'.format(table_name))
+            connection.execute('ALTER TABLE "{}" RENAME TO "{}"'.format(new_table.name, table_name))
+            for index_name, index_def in _get_index_definitions(connection, table_name):
+                if index_def in index_names and index_names[index_def] != index_name:
+                    connection.execute('ALTER INDEX "{}" RENAME TO "{}"'.format(
+                        index_name, index_names[index_def]
+                    ))
+        get_metadata(new_adapter.engine_id).remove(new_table)
+
     def drop_table(self, initiated_by=None, source=None, skip_log=False):
         self.log_table_drop(initiated_by, source, skip_log)
         # this will hang if there are any open sessions, so go ahead and close them
@@ -180,6 +231,30 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             {i.column.database_column_name.decode('utf-8'): i.value for i in row}
             for row in rows
         ]
+        self._save_formatted_rows(formatted_rows, use_shard_col)
+
+    def save_column_values(self, column_values, use_shard_col=True):
+        """
+        Like ``save_rows`` but takes a list of ``(column, values)`` pairs
+        """
+        if not column_values or not column_values[0][1]:
+            return
+
+        names = [column.database_column_name.decode('utf-8') for column, values in column_values]
+        formatted_rows = [
+            dict(zip(names, row))
+            for row in zip(*[values for column, values in column_values])
+        ]
+        self._save_formatted_rows(formatted_rows, use_shard_col)
+
+    def _save_formatted_rows(self, formatted_rows, use_shard_col):
+        if len(formatted_rows) >= COPY_MIN_ROWS and toggles.UCR_COPY_ROWS.enabled(self.config.domain):
+            try:
+                self._copy_formatted_rows(formatted_rows, use_shard_col)
+                return
+            except DataError:
+                # values that COPY can't parse may still be cast by an INSERT
+                pass
         if self.session_helper.is_citus_db and use_shard_col:
             config = self.config.sql_settings.citus_config
             if config.distribution_type == 'hash':
@@ -205,6 +280,70 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             for query in queries:
                 session.execute(query)
 
+    def _copy_formatted_rows(self, formatted_rows, use_shard_col):
+        """
+        Save rows by streaming them into a temporary staging table with
+        ``COPY`` and merging them into the table with one statement.
+
+        Rows for hash distributed Citus tables that can't be upserted are
+        copied directly into the table after deleting their doc ids by
+        shard column, to avoid locking the whole table.
+        """
+        table = self.get_table()
+        upsert = self.supports_upsert() and use_shard_col
+        by_shard_column = (
+            self.session_helper.is_citus_db and use_shard_col
+            and self.config.sql_settings.citus_config.distribution_type == 'hash'
+        )
+        # columns without values are left to their defaults, as they are by INSERT
+        copy_columns = [column for column in table.columns if column.name in formatted_rows[0]]
+        columns = ', '.join('"{}"'.format(column.name) for column in copy_columns)
+        with self.session_context() as session:
+            if by_shard_column and not upsert:
+                for query in self._get_delete_by_shard_column_queries(table, formatted_rows):
+                    session.execute(query)
+                _copy_rows(session, copy_columns, table.name, formatted_rows)
+                return
+
+            staging_table_name = 'ucr_staging_{}'.format(uuid4().hex)
+            session.execute('CREATE TEMPORARY TABLE "{}" (LIKE "{}" INCLUDING DEFAULTS) ON COMMIT DROP'.format(
+                staging_table_name, table.name
+            ))
+            _copy_rows(session, copy_columns, staging_table_name, formatted_rows)
+            if upsert:
+                updates = ', '.join(
+                    '"{0}" = EXCLUDED."{0}"'.format(column.name)
+                    for column in copy_columns if not column.primary_key
+                )
+                session.execute(
+                    'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{staging}" '
+                    'ON CONFLICT ({pk}) DO {action}'.format(
+                        table=table.name,
+                        columns=columns,
+                        staging=staging_table_name,
+                        pk=', '.join('"{}"'.format(column.name) for column in table.primary_key.columns),
+                        action='UPDATE SET {}'.format(updates) if updates else 'NOTHING',
+                    )
+                )
+            else:
+                session.execute(
+                    'DELETE FROM "{table}" USING "{staging}" '
+                    'WHERE "{table}".doc_id = "{staging}".doc_id'.format(
+                        table=table.name, staging=staging_table_name
+                    )
+                )
+                session.execute('INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{staging}"'.format(
+                    table=table.name, columns=columns, staging=staging_table_name
+                ))
+
+    def _get_delete_by_shard_column_queries(self, table, rows):
+        shard_col = self.config.sql_settings.citus_config.distribution_column
+        rows = sorted(rows, key=lambda row: row[shard_col])
+        for shard_value, rows_ in itertools.groupby(rows, key=lambda row: row[shard_col]):
+            doc_ids = set(row['doc_id'] for row in rows_)
+            delete = table.delete().where(table.c.get(shard_col) == shard_value)
+            yield delete.where(table.c.doc_id.in_(doc_ids))
+
     def _by_column_update(self, rows):
         config = self.config.sql_settings.citus_config
         shard_col = config.distribution_column
@@ -213,12 +352,10 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         rows = sorted(rows, key=lambda row: row[shard_col])
         for shard_value, rows_ in itertools.groupby(rows, key=lambda row: row[shard_col]):
             formatted_rows = list(rows_)
-            doc_ids = set(row['doc_id'] for row in formatted_rows)
             if self.supports_upsert():
                 queries = [self._upsert_query(table, formatted_rows)]
             else:
-                delete = table.delete().where(table.c.get(shard_col) == shard_value)
-                delete = delete.where(table.c.doc_id.in_(doc_ids))
+                delete, = self._get_delete_by_shard_column_queries(table, formatted_rows)
                 insert = table.insert().values(formatted_rows)
                 queries = [delete, insert]
 
@@ -348,6 +485,10 @@ class MultiDBSqlAdapter(object):
         for adapter in self.all_adapters:
             adapter.best_effort_save(doc, eval_context)
 
+    def best_effort_bulk_save(self, docs):
+        for adapter in self.all_adapters:
+            adapter.best_effort_bulk_save(docs)
+
     def save(self, doc, eval_context=None):
         for adapter in self.all_adapters:
             adapter.save(doc, eval_context)
@@ -383,6 +524,13 @@ class MultiDBSqlAdapter(object):
         for adapter in self.all_adapters:
             adapter.save_rows(rows, use_shard_col)
 
+    def get_column_values(self, docs, eval_contexts):
+        return self.config.get_column_values(docs, eval_contexts)
+
+    def save_column_values(self, column_values, use_shard_col=True):
+        for adapter in self.all_adapters:
+            adapter.save_column_values(column_values, use_shard_col)
+
     def bulk_save(self, docs):
         for adapter in self.all_adapters:
             adapter.bulk_save(docs)
@@ -461,6 +609,56 @@ def get_indicator_table(indicator_config, metadata, override_table_name=None):
     )
 
 
+def _copy_rows(session, columns, target_table_name, formatted_rows):
+    data = StringIO()
+    for row in formatted_rows:
+        data.write(','.join(_to_copy_value(row.get(column.name)) for column in columns))
+        data.write('\n')
+    data.seek(0)
+    statement = 'COPY "{}" ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        target_table_name, ', '.join('"{}"'.format(column.name) for column in columns)
+    )
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(statement, data)
+    except psycopg2.Error as e:
+        # raise the exceptions that SQLAlchemy raises for other statements
+        raise DBAPIError.instance(statement, None, e, psycopg2.Error)
+    finally:
+        cursor.close()
+
+
+def _to_copy_value(value):
+    """Format a value as a CSV field for COPY
+
+    Values are always quoted, because an unquoted empty field is NULL.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        value = '{{{}}}'.format(','.join(
+            'NULL' if item is None
+            else '"{}"'.format(str(item).replace('\\', '\\\\').replace('"', '\\"'))
+            for item in value
+        ))
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+
+def _get_index_definitions(connection, table_name):
+    """
+    :returns: List of ``(index name, definition)`` for the table's indexes,
+    where the definition excludes the index and table names
+    """
+    rows = connection.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+        [table_name]
+    )
+    return [
+        (index_name, (index_def.startswith('CREATE UNIQUE'), index_def.split(' USING ', 1)[-1]))
+        for index_name, index_def in rows
+    ]
+
+
 def _custom_index_name(table_name, column_ids):
     base_name = "ix_{}_{}".format(table_name, ','.join(column_ids))
     base_hash = hashlib.md5(base_name.encode('utf-8')).hexdigest()
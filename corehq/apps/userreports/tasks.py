@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.db import DatabaseError, InternalError, transaction
-from django.db.models import Count, Min
+from django.db.models import Count, Min, Q
 from django.utils.translation import ugettext as _
 
 from botocore.vendored.requests.exceptions import ReadTimeout
@@ -15,7 +15,12 @@ from celery.schedules import crontab
 from celery.task import periodic_task, task
 from couchdbkit import ResourceConflict, ResourceNotFound
 from corehq.util.es.elasticsearch import ConnectionTimeout
-from corehq.util.metrics import metrics_counter, metrics_gauge, metrics_histogram_timer
+from corehq.util.metrics import (
+    metrics_counter,
+    metrics_gauge,
+    metrics_histogram,
+    metrics_histogram_timer,
+)
 from corehq.util.metrics.const import MPM_MAX, MPM_MIN, MPM_LIVESUM
 from corehq.util.queries import paginated_queryset
 
@@ -35,9 +40,11 @@ from corehq.apps.reports.util import (
     send_report_download_email,
 )
 from corehq.apps.userreports.const import (
+    ASYNC_INDICATOR_BATCH_SIZE,
     ASYNC_INDICATOR_CHUNK_SIZE,
     ASYNC_INDICATOR_QUEUE_TIME,
     ASYNC_INDICATOR_MAX_RETRIES,
+    ASYNC_INDICATOR_REQUEUE_AFTER,
     UCR_CELERY_QUEUE,
     UCR_INDICATOR_CELERY_QUEUE,
 )
@@ -51,7 +58,14 @@ from corehq.apps.userreports.models import (
     get_report_config,
     id_is_static,
 )
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import (
+    DataSourceResumeHelper,
+    can_rebuild_in_slices,
+    get_rebuild_slices,
+    get_shadow_indicator_adapter,
+    iter_doc_ids_modified_since,
+    iter_slice_doc_ids,
+)
 from corehq.apps.userreports.reports.data_source import (
     ConfigurableReportDataSource,
 )
@@ -76,15 +90,20 @@ def _get_config_by_id(indicator_config_id):
         return DataSourceConfiguration.get(indicator_config_id)
 
 
-def _build_indicators(config, document_store, relevant_ids):
-    adapter = get_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
+def _build_indicators(config, document_store, relevant_ids, adapter=None):
+    if adapter is None:
+        adapter = get_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
 
-    for doc in document_store.iter_documents(relevant_ids):
-        if config.asynchronous:
+    if config.asynchronous:
+        for doc in document_store.iter_documents(relevant_ids):
             AsyncIndicator.update_record(
                 doc.get('_id'), config.referenced_doc_type, config.domain, [config._id]
             )
-        else:
+    elif toggles.UCR_COPY_ROWS.enabled(config.domain):
+        # rows of all the docs are saved together so that they can be copied
+        adapter.best_effort_bulk_save(list(document_store.iter_documents(relevant_ids)))
+    else:
+        for doc in document_store.iter_documents(relevant_ids):
             # save is a noop if the filter doesn't match
             adapter.best_effort_save(doc)
 
@@ -146,8 +165,18 @@ def resume_building_indicators(indicator_config_id, initiated_by=None):
     success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
     failure = _('There was an error rebuilding Your UCR table {} in {}.').format(config.table_id, config.domain)
     send = toggles.SEND_UCR_REBUILD_INFO.enabled(initiated_by)
+    resume_helper = DataSourceResumeHelper(config)
+    if resume_helper.get_slices_started() is not None:
+        # resume a rebuild into a shadow table
+        incomplete_slices = resume_helper.get_incomplete_slices()
+        if incomplete_slices:
+            _queue_indicator_slices(config, incomplete_slices, initiated_by)
+        else:
+            resume_helper.release_table_replacement()
+            _replace_table_if_slices_complete(config, initiated_by)
+        return
+
     with notify_someone(initiated_by, success_message=success, error_message=failure, send=send):
-        resume_helper = DataSourceResumeHelper(config)
         adapter = get_indicator_adapter(config)
         adapter.log_table_build(
             initiated_by=initiated_by,
@@ -156,6 +185,97 @@ def resume_building_indicators(indicator_config_id, initiated_by=None):
         _iteratively_build_table(config, resume_helper)
 
 
+@task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True)
+def rebuild_indicators_in_slices(indicator_config_id, initiated_by=None, source=None, ranges_per_shard=1):
+    """
+    Rebuild a data source into a shadow table, with a task for each slice
+    of its documents by shard and primary key range. The data source's
+    table is replaced by the shadow table once every slice has been
+    built, so reports are served from the old table until then.
+
+    Falls back to ``rebuild_indicators`` for data sources whose documents
+    are not in sharded SQL databases.
+    """
+    config = _get_config_by_id(indicator_config_id)
+    if not can_rebuild_in_slices(config):
+        rebuild_indicators(indicator_config_id, initiated_by=initiated_by, source=source)
+        return
+
+    started = datetime.utcnow()
+    get_indicator_adapter(config).log_table_rebuild(initiated_by=initiated_by, source=source)
+    if not id_is_static(indicator_config_id):
+        config.meta.build.initiated = started
+        config.meta.build.finished = False
+        config.meta.build.rebuilt_asynchronously = False
+        config.save()
+
+    get_shadow_indicator_adapter(config).build_table_without_indexes()
+    slices = get_rebuild_slices(config, ranges_per_shard)
+    resume_helper = DataSourceResumeHelper(config)
+    resume_helper.clear_resume_info()
+    resume_helper.set_slices(slices, started)
+    if slices:
+        _queue_indicator_slices(config, slices, initiated_by)
+    else:
+        _replace_table_if_slices_complete(config, initiated_by)
+
+
+def _queue_indicator_slices(config, slices, initiated_by):
+    for slice_ in slices:
+        build_indicator_slice.delay(config._id, slice_, initiated_by)
+
+
+@task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True, acks_late=True)
+def build_indicator_slice(indicator_config_id, slice_, initiated_by=None):
+    config = _get_config_by_id(indicator_config_id)
+    adapter = get_shadow_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
+    document_store = get_document_store_for_doc_type(
+        config.domain, config.referenced_doc_type,
+        case_type_or_xmlns=slice_.case_type_or_xmlns,
+        load_source="build_indicators",
+    )
+    for relevant_ids in chunked(iter_slice_doc_ids(config, slice_), ID_CHUNK_SIZE):
+        _build_indicators(config, document_store, list(relevant_ids), adapter)
+
+    DataSourceResumeHelper(config).add_completed_slice(slice_)
+    _replace_table_if_slices_complete(config, initiated_by)
+
+
+def _replace_table_if_slices_complete(config, initiated_by):
+    resume_helper = DataSourceResumeHelper(config)
+    if not resume_helper.claim_table_replacement():
+        return
+
+    success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
+    failure = _('There was an error rebuilding Your UCR table {} in {}.').format(config.table_id, config.domain)
+    send = toggles.SEND_UCR_REBUILD_INFO.enabled(initiated_by)
+    with notify_someone(initiated_by, success_message=success, error_message=failure, send=send):
+        started = resume_helper.get_slices_started()
+        shadow_adapter = get_shadow_indicator_adapter(config)
+        shadow_adapter.create_indexes()
+        adapter = get_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
+        adapter.replace_table(shadow_adapter)
+        resume_helper.clear_resume_info()
+
+        # Changes made while slices were being built went to the old table
+        for case_type_or_xmlns in config.get_case_type_or_xmlns_filter():
+            document_store = get_document_store_for_doc_type(
+                config.domain, config.referenced_doc_type,
+                case_type_or_xmlns=case_type_or_xmlns,
+                load_source="build_indicators",
+            )
+            doc_ids = iter_doc_ids_modified_since(config, case_type_or_xmlns, started)
+            for relevant_ids in chunked(doc_ids, ID_CHUNK_SIZE):
+                for doc in document_store.iter_documents(list(relevant_ids)):
+                    if config.filter(doc):
+                        adapter.best_effort_save(doc)
+                    else:
+                        adapter.delete(doc)
+
+        if not id_is_static(config._id):
+            _mark_build_finished(config)
+
+
 def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-1):
     resume_helper = resume_helper or DataSourceResumeHelper(config)
     indicator_config_id = config._id
@@ -191,22 +311,26 @@ def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-
 
     resume_helper.clear_resume_info()
     if not id_is_static(indicator_config_id):
+        _mark_build_finished(config, in_place)
+
+
+def _mark_build_finished(config, in_place=False):
+    if in_place:
+        config.meta.build.finished_in_place = True
+    else:
+        config.meta.build.finished = True
+    try:
+        config.save()
+    except ResourceConflict:
+        current_config = DataSourceConfiguration.get(config._id)
+        # check that a new build has not yet started
         if in_place:
-            config.meta.build.finished_in_place = True
+            if config.meta.build.initiated_in_place == current_config.meta.build.initiated_in_place:
+                current_config.meta.build.finished_in_place = True
         else:
-            config.meta.build.finished = True
-        try:
-            config.save()
-        except ResourceConflict:
-            current_config = DataSourceConfiguration.get(config._id)
-            # check that a new build has not yet started
-            if in_place:
-                if config.meta.build.initiated_in_place == current_config.meta.build.initiated_in_place:
-                    current_config.meta.build.finished_in_place = True
-            else:
-                if config.meta.build.initiated == current_config.meta.build.initiated:
-                    current_config.meta.build.finished = True
-            current_config.save()
+            if config.meta.build.initiated == current_config.meta.build.initiated:
+                current_config.meta.build.finished = True
+        current_config.save()
 
 
 @task(serializer='pickle', queue=UCR_CELERY_QUEUE)
@@ -323,15 +447,23 @@ def time_in_range(time, time_dictionary):
 def queue_async_indicators():
     """
         Fetches AsyncIndicators that
-        1. were not queued till now or were last queued more than 4 hours ago
+        1. were not queued till now or were last queued more than ASYNC_INDICATOR_REQUEUE_AFTER ago
         2. have failed less than ASYNC_INDICATOR_MAX_RETRIES times
         This task quits after it has run for more than
         ASYNC_INDICATOR_QUEUE_TIME - 30 seconds i.e 4 minutes 30 seconds.
         While it runs, it clubs fetched AsyncIndicators by domain and doc type and queue them for processing.
+
+        If settings.ASYNC_INDICATOR_WORKERS is set, that many process_async_indicators
+        tasks are queued instead, which claim and process the AsyncIndicators themselves.
     """
     start = datetime.utcnow()
     cutoff = start + ASYNC_INDICATOR_QUEUE_TIME - timedelta(seconds=30)
-    retry_threshold = start - timedelta(hours=4)
+    if settings.ASYNC_INDICATOR_WORKERS:
+        for i in range(settings.ASYNC_INDICATOR_WORKERS):
+            process_async_indicators.delay(cutoff)
+        return
+
+    retry_threshold = start - ASYNC_INDICATOR_REQUEUE_AFTER
     # don't requeue anything that has been retried more than ASYNC_INDICATOR_MAX_RETRIES times
     indicators = AsyncIndicator.objects.filter(unsuccessful_attempts__lt=ASYNC_INDICATOR_MAX_RETRIES)[:settings.ASYNC_INDICATORS_TO_QUEUE]
 
@@ -377,23 +509,6 @@ def build_async_indicators(indicator_doc_ids):
     memoizers = {'configs': {}, 'adapters': {}}
     assert(len(indicator_doc_ids)) <= ASYNC_INDICATOR_CHUNK_SIZE
 
-    def handle_exception(exception, config_id, doc, adapter):
-        metric = None
-        if isinstance(exception, (ProtocolError, ReadTimeout)):
-            metric = 'commcare.async_indicator.riak_error'
-        elif isinstance(exception, (ESError, ConnectionTimeout)):
-            # a database had an issue so log it and go on to the next document
-            metric = 'commcare.async_indicator.es_error'
-        elif isinstance(exception, (DatabaseError, InternalError)):
-            # a database had an issue so log it and go on to the next document
-            metric = 'commcare.async_indicator.psql_error'
-        else:
-            # getting the config could fail before the adapter is set
-            if adapter:
-                adapter.handle_exception(doc, exception)
-        if metric:
-            metrics_counter(metric, tags={'config_id': config_id})
-
     def doc_ids_from_rows(rows):
         formatted_rows = [
             {column.column.database_column_name.decode('utf-8'): column.value for column in row}
@@ -419,20 +534,6 @@ def build_async_indicators(indicator_doc_ids):
             adapter_by_config[config._id] = adapter
             return adapter
 
-    def _metrics_timer(step, config_id=None):
-        tags = {
-            'action': step,
-        }
-        if config_id and settings.ENTERPRISE_MODE:
-            tags['config_id'] = config_id
-        else:
-            # Prometheus requires consistent tags even if not available
-            tags['config_id'] = None
-        return metrics_histogram_timer(
-            'commcare.async_indicator.timing',
-            timing_buckets=(.03, .1, .3, 1, 3, 10), tags=tags
-        )
-
     # tracks processed/deleted configs to be removed from each indicator
     configs_to_remove_by_indicator_id = defaultdict(list)
 
@@ -468,7 +569,7 @@ def build_async_indicators(indicator_doc_ids):
                 indicator = indicator_by_doc_id[doc['_id']]
                 eval_context = EvaluationContext(doc)
                 for config_id in indicator.indicator_config_ids:
-                    with _metrics_timer('transform', config_id):
+                    with _async_indicator_timer('transform', config_id):
                         config_ids.add(config_id)
                         try:
                             config = _get_config(config_id)
@@ -492,14 +593,14 @@ def build_async_indicators(indicator_doc_ids):
                             eval_context.reset_iteration()
                         except Exception as e:
                             failed_indicators.add(indicator)
-                            handle_exception(e, config_id, doc, adapter)
+                            _handle_async_indicator_exception(e, config_id, doc, adapter)
 
-            with _metrics_timer('single_batch_update'):
+            with _async_indicator_timer('single_batch_update'):
                 for adapter, rows in rows_to_save_by_adapter.items():
                     doc_ids = doc_ids_from_rows(rows)
                     indicators = [indicator_by_doc_id[doc_id] for doc_id in doc_ids]
                     try:
-                        with _metrics_timer('update', adapter.config._id):
+                        with _async_indicator_timer('update', adapter.config._id):
                             adapter.save_rows(rows, use_shard_col=True)
                     except Exception as e:
                         failed_indicators.union(indicators)
@@ -512,9 +613,9 @@ def build_async_indicators(indicator_doc_ids):
                             [i.pk for i in indicators]
                         )
 
-            with _metrics_timer('single_batch_delete'):
+            with _async_indicator_timer('single_batch_delete'):
                 for adapter, docs in docs_to_delete_by_adapter.items():
-                    with _metrics_timer('delete', adapter.config._id):
+                    with _async_indicator_timer('delete', adapter.config._id):
                         adapter.bulk_delete(docs)
 
         # delete fully processed indicators
@@ -541,6 +642,197 @@ def build_async_indicators(indicator_doc_ids):
         )
 
 
+def _handle_async_indicator_exception(exception, config_id, doc, adapter):
+    metric = None
+    if isinstance(exception, (ProtocolError, ReadTimeout)):
+        metric = 'commcare.async_indicator.riak_error'
+    elif isinstance(exception, (ESError, ConnectionTimeout)):
+        # a database had an issue so log it and go on to the next document
+        metric = 'commcare.async_indicator.es_error'
+    elif isinstance(exception, (DatabaseError, InternalError)):
+        # a database had an issue so log it and go on to the next document
+        metric = 'commcare.async_indicator.psql_error'
+    else:
+        # getting the config could fail before the adapter is set
+        if adapter:
+            adapter.handle_exception(doc, exception)
+    if metric:
+        metrics_counter(metric, tags={'config_id': config_id})
+
+
+def _async_indicator_timer(step, config_id=None):
+    tags = {
+        'action': step,
+    }
+    if config_id and settings.ENTERPRISE_MODE:
+        tags['config_id'] = config_id
+    else:
+        # Prometheus requires consistent tags even if not available
+        tags['config_id'] = None
+    return metrics_histogram_timer(
+        'commcare.async_indicator.timing',
+        timing_buckets=(.03, .1, .3, 1, 3, 10), tags=tags
+    )
+
+
+@task(serializer='pickle', queue=UCR_INDICATOR_CELERY_QUEUE, ignore_result=True, acks_late=True)
+def process_async_indicators(cutoff):
+    """
+        Claims batches of AsyncIndicators and builds them until there are none
+        left to claim or cutoff has passed. Several of these tasks can run at
+        once, since each one skips the AsyncIndicators claimed by the others.
+    """
+    while datetime.utcnow() < cutoff:
+        indicators = claim_async_indicators(ASYNC_INDICATOR_BATCH_SIZE)
+        if not indicators:
+            break
+        for chunk in chunked(indicators, ASYNC_INDICATOR_CHUNK_SIZE):
+            build_async_indicator_batch(chunk)
+
+
+def claim_async_indicators(limit):
+    """
+        Claims up to ``limit`` of the oldest AsyncIndicators that are not queued,
+        or were queued long enough ago that their task is assumed to be lost,
+        by setting their date_queued. Rows that are being claimed concurrently
+        are skipped rather than waited for.
+    """
+    now = datetime.utcnow()
+    with transaction.atomic():
+        indicators = list(
+            AsyncIndicator.objects
+            .select_for_update(skip_locked=True)
+            .filter(unsuccessful_attempts__lt=ASYNC_INDICATOR_MAX_RETRIES)
+            .filter(Q(date_queued__isnull=True) | Q(date_queued__lt=now - ASYNC_INDICATOR_REQUEUE_AFTER))
+            .order_by('date_created')[:limit]
+        )
+        AsyncIndicator.objects.filter(pk__in=[i.pk for i in indicators]).update(date_queued=now)
+    return indicators
+
+
+def build_async_indicator_batch(indicators):
+    """
+        Builds up to ASYNC_INDICATOR_CHUNK_SIZE claimed AsyncIndicators, so that
+        their locks don't time out while they are held. Indicators are grouped by
+        domain, doc type and data sources, so that each group's documents are
+        fetched together, and the rows for each data source are saved together.
+    """
+    assert len(indicators) <= ASYNC_INDICATOR_CHUNK_SIZE
+    adapters_by_config_id = {}
+    rows_by_config_id = defaultdict(list)
+    doc_ids_by_config_id = defaultdict(list)
+    docs_to_delete_by_config_id = defaultdict(list)
+    failed_config_ids_by_doc_id = defaultdict(set)
+
+    def _get_adapter(config_id):
+        # returns None for data sources that no longer exist
+        if config_id not in adapters_by_config_id:
+            try:
+                config = _get_config_by_id(config_id)
+            except (ResourceNotFound, StaticDataSourceConfigurationNotFoundError):
+                celery_task_logger.info("{} no longer exists, skipping".format(config_id))
+                adapters_by_config_id[config_id] = None
+            else:
+                adapters_by_config_id[config_id] = get_indicator_adapter(
+                    config, load_source='build_async_indicators'
+                )
+        return adapters_by_config_id[config_id]
+
+    timer = TimingContext()
+    lock_keys = [get_async_indicator_modify_lock_key(i.doc_id) for i in indicators]
+    with CriticalSection(lock_keys), timer:
+        # data sources may have been added to the indicators since they were claimed
+        indicators = list(AsyncIndicator.objects.filter(pk__in=[i.pk for i in indicators]))
+        groups = defaultdict(list)
+        for indicator in indicators:
+            groups[(indicator.domain, indicator.doc_type, tuple(indicator.indicator_config_ids))].append(indicator)
+
+        for (domain, doc_type, config_ids), group in groups.items():
+            doc_ids = [i.doc_id for i in group]
+            adapters = []
+            for config_id in config_ids:
+                try:
+                    adapter = _get_adapter(config_id)
+                except Exception as e:
+                    _handle_async_indicator_exception(e, config_id, None, None)
+                    for doc_id in doc_ids:
+                        failed_config_ids_by_doc_id[doc_id].add(config_id)
+                    continue
+                if adapter is not None:
+                    adapters.append(adapter)
+            if not adapters:
+                continue
+
+            doc_store = get_document_store_for_doc_type(domain, doc_type, load_source="build_async_indicators")
+            with _async_indicator_timer('transform'):
+                for doc in doc_store.iter_documents(doc_ids):
+                    eval_context = EvaluationContext(doc)
+                    for adapter in adapters:
+                        config_id = adapter.config._id
+                        try:
+                            rows = adapter.get_all_values(doc, eval_context)
+                            eval_context.reset_iteration()
+                        except Exception as e:
+                            failed_config_ids_by_doc_id[doc['_id']].add(config_id)
+                            _handle_async_indicator_exception(e, config_id, doc, adapter)
+                            continue
+                        if rows:
+                            rows_by_config_id[config_id].extend(rows)
+                            doc_ids_by_config_id[config_id].append(doc['_id'])
+                        else:
+                            docs_to_delete_by_config_id[config_id].append(doc)
+
+        for config_id, rows in rows_by_config_id.items():
+            try:
+                with _async_indicator_timer('update', config_id):
+                    adapters_by_config_id[config_id].save_rows(rows, use_shard_col=True)
+            except Exception as e:
+                for doc_id in doc_ids_by_config_id[config_id]:
+                    failed_config_ids_by_doc_id[doc_id].add(config_id)
+                notify_exception(None, "Exception bulk saving async indicators:{}".format(e))
+
+        for config_id, docs in docs_to_delete_by_config_id.items():
+            try:
+                with _async_indicator_timer('delete', config_id):
+                    adapters_by_config_id[config_id].bulk_delete(docs)
+            except Exception as e:
+                for doc in docs:
+                    failed_config_ids_by_doc_id[doc['_id']].add(config_id)
+                notify_exception(None, "Exception bulk deleting async indicators:{}".format(e))
+
+        processed_indicators = [i for i in indicators if i.doc_id not in failed_config_ids_by_doc_id]
+        failed_indicators = [i for i in indicators if i.doc_id in failed_config_ids_by_doc_id]
+        AsyncIndicator.objects.filter(pk__in=[i.pk for i in processed_indicators]).delete()
+
+        # retry failed indicators in the next queue interval rather than reclaiming them straight away
+        retry_date_queued = datetime.utcnow() - ASYNC_INDICATOR_REQUEUE_AFTER + ASYNC_INDICATOR_QUEUE_TIME
+        with transaction.atomic():
+            for indicator in failed_indicators:
+                failed_config_ids = failed_config_ids_by_doc_id[indicator.doc_id]
+                indicator.update_failure(set(indicator.indicator_config_ids) - failed_config_ids)
+                indicator.date_queued = retry_date_queued
+                indicator.save()
+
+    _record_async_indicator_lag(processed_indicators)
+    metrics_counter('commcare.async_indicator.processed_success', len(processed_indicators))
+    metrics_counter('commcare.async_indicator.processed_fail', len(failed_indicators))
+    metrics_counter('commcare.async_indicator.processing_time', timer.duration)
+    metrics_counter('commcare.async_indicator.processed_total', len(indicators))
+
+
+def _record_async_indicator_lag(indicators):
+    now = datetime.utcnow()
+    for indicator in indicators:
+        lag = (now - indicator.date_created).total_seconds()
+        for config_id in indicator.indicator_config_ids:
+            metrics_histogram(
+                'commcare.async_indicator.processed_lag', lag,
+                bucket_tag='lag', buckets=(60, 10 * 60, 60 * 60, 6 * 60 * 60, 24 * 60 * 60), bucket_unit='s',
+                tags={'config_id': config_id},
+                documentation="Time from an indicator's creation until it was processed, by data source",
+            )
+
+
 @periodic_task(run_every=crontab(minute="*/5"), queue=settings.CELERY_PERIODIC_QUEUE)
 def async_indicators_metrics():
     now = datetime.utcnow()
@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime, timedelta
 
 from django.test import SimpleTestCase, TestCase
 
@@ -10,7 +11,13 @@ from corehq.apps.userreports.models import (
     AsyncIndicator,
     DataSourceConfiguration,
 )
-from corehq.apps.userreports.tasks import build_async_indicators, queue_async_indicators
+from corehq.apps.userreports.tasks import (
+    build_async_indicator_batch,
+    build_async_indicators,
+    claim_async_indicators,
+    process_async_indicators,
+    queue_async_indicators,
+)
 from corehq.apps.userreports.tests.utils import load_data_from_db
 from corehq.apps.userreports.util import get_indicator_adapter, get_table_name
 
@@ -275,3 +282,60 @@ class BulkAsyncIndicatorProcessingTest(TestCase):
             mock.call('commcare.async_indicator.processed_success', 0),
             mock.call('commcare.async_indicator.processed_fail', 10)
         ])
+
+    def test_claim_and_build_batch(self):
+        AsyncIndicator.objects.filter(
+            doc_id__in=self.doc_ids[0:5]
+        ).update(indicator_config_ids=[self.config1._id])
+        AsyncIndicator.objects.filter(
+            doc_id__in=self.doc_ids[5:]
+        ).update(indicator_config_ids=[self.config1._id, self.config2._id])
+
+        indicators = claim_async_indicators(100)
+        self.assertEqual(sorted(i.doc_id for i in indicators), sorted(self.doc_ids))
+        # claimed indicators aren't claimed again
+        self.assertEqual(claim_async_indicators(100), [])
+
+        build_async_indicator_batch(indicators)
+
+        self._assert_rows_in_ucr_table(self.config1, [
+            {'doc_id': d["_id"], 'name': d["name"]} for d in self.docs
+        ])
+        self._assert_rows_in_ucr_table(self.config2, [
+            {'doc_id': d["_id"], 'color': d["color"]} for d in self.docs[5:]
+        ])
+        self.assertEqual(AsyncIndicator.objects.count(), 0)
+        self.datadog_patch.assert_has_calls([
+            mock.call('commcare.async_indicator.processed_success', 10),
+            mock.call('commcare.async_indicator.processed_fail', 0)
+        ])
+
+    def test_build_batch_failure(self):
+        AsyncIndicator.objects.filter(
+            doc_id__in=self.doc_ids
+        ).update(indicator_config_ids=[self.config1._id, "unknown_id"])
+        indicators = claim_async_indicators(100)
+        with mock.patch("corehq.apps.userreports.tasks.get_indicator_adapter") as adapter_mock:
+            adapter_mock.side_effect = Exception("Some random exception")
+            build_async_indicator_batch(indicators)
+
+        self.assertEqual(
+            AsyncIndicator.objects.filter(
+                indicator_config_ids=[self.config1._id], unsuccessful_attempts=1
+            ).count(),
+            10
+        )
+        # failed indicators are not retried straight away
+        self.assertEqual(claim_async_indicators(100), [])
+
+    @mock.patch('corehq.apps.userreports.tasks.ASYNC_INDICATOR_CHUNK_SIZE', 4)
+    @mock.patch('corehq.apps.userreports.tasks.build_async_indicator_batch')
+    def test_claimed_indicators_built_in_chunks(self, build_batch):
+        process_async_indicators(datetime.utcnow() + timedelta(minutes=1))
+        self.assertEqual([len(call[0][0]) for call in build_batch.call_args_list], [4, 4, 2])
+
+    @mock.patch('corehq.apps.userreports.tasks.process_async_indicators')
+    def test_queue_async_indicator_workers(self, patched_process):
+        with self.settings(ASYNC_INDICATOR_WORKERS=2):
+            queue_async_indicators()
+        self.assertEqual(patched_process.delay.call_count, 2)
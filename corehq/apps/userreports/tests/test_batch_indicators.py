@@ -0,0 +1,117 @@
+import uuid
+
+from django.test import SimpleTestCase
+from mock import patch
+
+from corehq.apps.userreports.indicators.batch import ItemBatch
+from corehq.apps.userreports.indicators.factory import IndicatorFactory
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import (
+    get_data_source_with_repeat,
+    get_sample_data_source,
+    get_sample_doc_and_indicators,
+)
+
+
+class ColumnValuesTest(SimpleTestCase):
+    """get_column_values must match get_all_values for every document"""
+
+    def assertSameValues(self, config, docs):
+        docs = [doc for doc in docs if config.filter(doc)]
+        rows = []
+        for doc in docs:
+            rows.extend(config.get_all_values(doc, EvaluationContext(doc)))
+        expected = [
+            (column.id, [row[i].value for row in rows])
+            for i, column in enumerate(config.get_columns())
+        ]
+        contexts = [EvaluationContext(doc) for doc in docs]
+        column_values = config.get_column_values(docs, contexts)
+        actual = [(column.id, values) for column, values in column_values]
+        self.assertEqual(_without_inserted_at(actual), _without_inserted_at(expected))
+
+    def test_sample_data_source(self):
+        docs = []
+        for date_opened in ['2014-06-21T00:00:00Z', '2014-06-21T00:00:00Z', '2015-01-01', 'not a date', None]:
+            doc, _ = get_sample_doc_and_indicators()
+            doc['opened_on'] = date_opened
+            docs.append(doc)
+        docs[1].update(category='feature', tags='roadmap', estimate='x', priority='2')
+        docs[2].pop('category')
+        docs[3]['type'] = 'not-a-ticket'
+        self.assertSameValues(get_sample_data_source(), docs)
+
+    def test_repeats(self):
+        def _doc(time_logs):
+            return {
+                '_id': uuid.uuid4().hex,
+                'domain': 'user-reports',
+                'doc_type': 'XFormInstance',
+                'created': 'Tuesday',
+                'form': {'time_logs': time_logs},
+            }
+        docs = [
+            _doc([
+                {'start_time': '2015-01-01T10:00:00Z', 'end_time': '2015-01-01T11:00:00Z', 'person': 'al'},
+                {'start_time': '2015-01-02', 'person': 'bo'},
+            ]),
+            _doc({'start_time': '2015-01-03', 'person': 'cy'}),
+            _doc([]),
+        ]
+        self.assertSameValues(get_data_source_with_repeat(), docs)
+
+    def test_repeat_iteration(self):
+        config = get_data_source_with_repeat()
+        doc = {
+            '_id': uuid.uuid4().hex,
+            'domain': 'user-reports',
+            'doc_type': 'XFormInstance',
+            'form': {'time_logs': [{'person': 'al'}, {'person': 'bo'}, {'person': 'cy'}]},
+        }
+        column_values = dict(
+            (column.id, values)
+            for column, values in config.get_column_values([doc], [EvaluationContext(doc)])
+        )
+        self.assertEqual(column_values['repeat_iteration'], [0, 1, 2])
+        self.assertEqual(column_values['doc_id'], [doc['_id']] * 3)
+
+
+class ItemBatchTest(SimpleTestCase):
+
+    def test_choice_list_getter_evaluated_once(self):
+        indicator = IndicatorFactory.from_spec({
+            "type": "choice_list",
+            "column_id": "category",
+            "property_name": "category",
+            "choices": ["bug", "feature", "app"],
+        })
+        items = [{'category': 'bug'}, {'category': 'app'}, {}, 'not a dict']
+        batch = ItemBatch(items, [None] * len(items))
+        with patch('corehq.apps.userreports.indicators.batch.ItemBatch._evaluate',
+                   wraps=batch._evaluate) as evaluate:
+            column_values = indicator.get_column_values(batch)
+        self.assertEqual(evaluate.call_count, 1)
+        self.assertEqual(
+            [(column.id, values) for column, values in column_values],
+            [
+                ('category_bug', [1, 0, 0, 0]),
+                ('category_feature', [0, 0, 0, 0]),
+                ('category_app', [0, 1, 0, 0]),
+            ]
+        )
+
+    def test_date_transform(self):
+        indicator = IndicatorFactory.from_spec({
+            "type": "raw",
+            "column_id": "dob",
+            "property_name": "dob",
+            "datatype": "date",
+        })
+        items = [{'dob': '2000-01-02'}, {'dob': '2000-01-02'}, {'dob': 'junk'}, {'dob': ''}, {}]
+        batch = ItemBatch(items, [None] * len(items))
+        [(column, values)] = indicator.get_column_values(batch)
+        self.assertEqual(values, [indicator.getter(item) for item in items])
+
+
+def _without_inserted_at(column_values):
+    return [(column_id, values) for column_id, values in column_values if column_id != 'inserted_at']
@@ -0,0 +1,205 @@
+import copy
+import json
+import os
+import uuid
+
+from django.test import SimpleTestCase
+
+from corehq.apps.userreports.compiler import compile_data_source
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import (
+    get_data_source_with_related_doc_type,
+    get_data_source_with_repeat,
+    get_sample_data_source,
+    get_sample_doc_and_indicators,
+)
+
+
+def _doc_variants(doc):
+    """Yield `doc` plus copies with missing, mistyped and unusual values"""
+    yield doc
+    for key in list(doc):
+        if key in ('_id', 'doc_type', 'domain'):
+            continue
+        for value in (None, '', 'junk', 0, 1.5, [], ['a', 'b'], {}, {'#text': 'x'}):
+            variant = copy.deepcopy(doc)
+            variant[key] = value
+            yield variant
+        variant = copy.deepcopy(doc)
+        del variant[key]
+        yield variant
+    for key, value in [('doc_type', 'CommCareCase-Deleted'), ('domain', 'other-domain'), ('type', 'other')]:
+        variant = copy.deepcopy(doc)
+        variant[key] = value
+        yield variant
+
+
+class CompiledDataSourceDifferentialTest(SimpleTestCase):
+    """Compiled data sources must produce exactly what the interpreter does"""
+
+    def assertSameResults(self, config, docs):
+        compiled = compile_data_source(config)
+        for doc in docs:
+            interpreted_context = EvaluationContext(doc)
+            compiled_context = EvaluationContext(doc)
+            compiled_context.inserted_timestamp = interpreted_context.inserted_timestamp
+
+            expected_filter = config._get_main_filter()(doc, interpreted_context)
+            self.assertEqual(compiled.filter(doc, compiled_context), expected_filter, doc)
+            if config.base_item_expression:
+                items = config.parsed_expression(doc, interpreted_context) or []
+                if not isinstance(items, list):
+                    items = [items]
+            else:
+                items = [doc]
+            for item in items:
+                expected = config.indicators.get_values(item, interpreted_context)
+                actual = compiled.get_values(item, compiled_context)
+                self.assertEqual(_as_tuples(actual), _as_tuples(expected), doc)
+                interpreted_context.increment_iteration()
+                compiled_context.increment_iteration()
+
+    def test_sample_data_source(self):
+        doc, _ = get_sample_doc_and_indicators()
+        extra = dict(doc, priority='4.0', estimate='x', tags='roadmap public', category='app')
+        self.assertSameResults(get_sample_data_source(), list(_doc_variants(doc)) + [extra])
+
+    def test_data_source_with_repeat(self):
+        doc = {
+            '_id': uuid.uuid4().hex,
+            'domain': 'user-reports',
+            'doc_type': 'XFormInstance',
+            'created': 'Tuesday',
+            'form': {
+                'time_logs': [
+                    {'start_time': '2015-01-01T10:00:00Z', 'end_time': '2015-01-01T11:00:00Z', 'person': 'al'},
+                    {'start_time': '2015-01-02', 'end_time': None, 'person': 3},
+                    {'start_time': 'not a date'},
+                ],
+            },
+        }
+        self.assertSameResults(get_data_source_with_repeat(), _doc_variants(doc))
+
+    def test_parent_child_data_source(self):
+        # no indices, so the related doc is never fetched
+        doc = {
+            '_id': uuid.uuid4().hex,
+            'domain': 'bug-domain',
+            'doc_type': 'CommCareCase',
+            'type': 'bug-child',
+            'update-prop-child': 'child value',
+        }
+        self.assertSameResults(get_data_source_with_related_doc_type(), _doc_variants(doc))
+
+    def test_static_data_source(self):
+        path = os.path.join(os.path.dirname(__file__), 'data', 'static_data_sources',
+                            'sample_static_data_source.json')
+        with open(path, encoding='utf-8') as f:
+            config = DataSourceConfiguration.wrap(dict(json.load(f)['config'], domain='example'))
+        doc = {
+            '_id': uuid.uuid4().hex,
+            'domain': 'example',
+            'doc_type': 'CommCareCase',
+            'name': 'candidate',
+            'opened_on': '2020-02-03T04:05:06Z',
+        }
+        self.assertSameResults(config, _doc_variants(doc))
+
+    def test_shared_subexpressions(self):
+        config = _get_expression_data_source()
+        compiled = compile_data_source(config)
+        # 'age' as an integer is used by a named filter, a conditional and
+        # a column; 'status' by a switch and a boolean indicator
+        self.assertGreaterEqual(compiled.shared_subexpressions, 2)
+        doc = {
+            '_id': uuid.uuid4().hex,
+            'domain': 'compiled',
+            'doc_type': 'CommCareCase',
+            'age': '21',
+            'status': 'open',
+            'location': {'district': 'north', 'block': ''},
+            'visit_date': '2020-01-31',
+        }
+        self.assertSameResults(config, _doc_variants(doc))
+        self.assertSameResults(config, [dict(doc, age=age) for age in ('17', 18, '99.5', 'old', None)])
+
+
+def _as_tuples(column_values):
+    return [(value.column.id, value.value) for value in column_values]
+
+
+def _get_expression_data_source():
+    age = {"type": "property_name", "property_name": "age", "datatype": "integer"}
+    status = {"type": "property_name", "property_name": "status"}
+    return DataSourceConfiguration.wrap({
+        "domain": "compiled",
+        "doc_type": "DataSourceConfiguration",
+        "referenced_doc_type": "CommCareCase",
+        "table_id": "compiled",
+        "named_expressions": {
+            "district": {"type": "property_path", "property_path": ["location", "district"]},
+            "age": age,
+        },
+        "named_filters": {
+            "is_adult": {
+                "type": "boolean_expression",
+                "expression": age,
+                "operator": "gte",
+                "property_value": 18,
+            },
+        },
+        "configured_filter": {
+            "type": "or",
+            "filters": [
+                {"type": "named", "name": "is_adult"},
+                {"type": "not", "filter": {
+                    "type": "boolean_expression",
+                    "expression": status,
+                    "operator": "eq",
+                    "property_value": "closed",
+                }},
+            ],
+        },
+        "configured_indicators": [
+            {"type": "expression", "column_id": "age", "datatype": "integer", "expression": age},
+            {"type": "expression", "column_id": "age_named", "datatype": "integer",
+             "expression": {"type": "named", "name": "age"}},
+            {"type": "expression", "column_id": "age_group", "datatype": "string", "expression": {
+                "type": "conditional",
+                "test": {"type": "named", "name": "is_adult"},
+                "expression_if_true": {"type": "constant", "constant": "adult"},
+                "expression_if_false": {"type": "constant", "constant": "child"},
+            }},
+            {"type": "expression", "column_id": "status_code", "datatype": "integer", "expression": {
+                "type": "switch",
+                "switch_on": status,
+                "cases": {
+                    "open": {"type": "constant", "constant": 1},
+                    "closed": {"type": "constant", "constant": 2},
+                },
+                "default": {"type": "constant", "constant": 0},
+            }},
+            {"type": "boolean", "column_id": "is_open", "filter": {
+                "type": "boolean_expression",
+                "expression": status,
+                "operator": "eq",
+                "property_value": "open",
+            }},
+            {"type": "expression", "column_id": "block", "datatype": "string", "expression": {
+                "type": "coalesce",
+                "expression": {"type": "property_path", "property_path": ["location", "block"]},
+                "default_expression": {"type": "named", "name": "district"},
+            }},
+            {"type": "expression", "column_id": "root_district", "datatype": "string", "expression": {
+                "type": "root_doc",
+                "expression": {"type": "named", "name": "district"},
+            }},
+            {"type": "expression", "column_id": "visit_date", "datatype": "date", "expression": {
+                "type": "property_name", "property_name": "visit_date", "datatype": "date",
+            }},
+            {"type": "raw", "column_id": "visit_date_raw", "datatype": "date", "property_name": "visit_date"},
+            {"type": "choice_list", "column_id": "status", "property_name": "status",
+             "choices": ["open", "closed", "pending"], "select_style": "single"},
+        ],
+    })
@@ -7,6 +7,7 @@ from corehq.apps.userreports.models import (
     DataSourceActionLog,
     DataSourceConfiguration,
 )
+from corehq.apps.userreports.rebuild import get_shadow_indicator_adapter
 from corehq.apps.userreports.tests.utils import (
     get_sample_data_source,
     skip_domain_filter_patch,
@@ -247,3 +248,35 @@ class RebuildTableTest(TestCase):
         pk = insp.get_pk_constraint(table_name)
         expected_pk = ['pk_key', 'doc_id']
         self.assertEqual(expected_pk, pk['constrained_columns'])
+
+
+class ReplaceTableTest(TestCase):
+
+    def setUp(self):
+        self.config = get_sample_data_source()
+        self.config.table_id = self.config.table_id + 'replace'
+        self.config.configured_indicators[0]['create_index'] = True
+        self.config.save()
+        self.addCleanup(self.config.delete)
+        self.adapter = get_indicator_adapter(self.config)
+        self.adapter.build_table()
+        self.addCleanup(self.adapter.drop_table)
+
+    def test_replace_with_shadow_table(self):
+        shadow_adapter = get_shadow_indicator_adapter(self.config)
+        shadow_adapter.build_table_without_indexes()
+        self.addCleanup(shadow_adapter.drop_table)
+        shadow_table_name = shadow_adapter.get_table().name
+        insp = reflection.Inspector.from_engine(self.adapter.engine)
+        self.assertEqual(insp.get_indexes(shadow_table_name), [])
+
+        shadow_adapter.create_indexes()
+        self.adapter.replace_table(shadow_adapter)
+
+        insp = reflection.Inspector.from_engine(self.adapter.engine)
+        table_name = self.adapter.get_table().name
+        self.assertFalse(self.adapter.engine.has_table(shadow_table_name))
+        self.assertEqual(
+            [index['name'] for index in insp.get_indexes(table_name)],
+            [index.name for index in self.adapter.get_table().indexes],
+        )
@@ -0,0 +1,134 @@
+import uuid
+
+from django.test import SimpleTestCase
+from mock import patch
+from pillowtop.dao.mock import MockDocumentStore
+
+from corehq.apps.userreports.planner import RelatedDocPlanner
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import (
+    get_data_source_with_related_doc_type,
+    get_sample_data_source,
+)
+
+
+class CountingDocumentStore(MockDocumentStore):
+
+    def __init__(self, data):
+        super(CountingDocumentStore, self).__init__(data)
+        self.single_fetches = 0
+        self.bulk_fetches = 0
+
+    def get_document(self, doc_id):
+        self.single_fetches += 1
+        return super(CountingDocumentStore, self).get_document(doc_id)
+
+    def iter_documents(self, ids):
+        self.bulk_fetches += 1
+        for doc_id in ids:
+            yield self._data_store[doc_id]
+
+
+@patch('corehq.apps.userreports.planner.metrics_counter')
+class RelatedDocPlannerTest(SimpleTestCase):
+    domain = 'bug-domain'
+
+    def setUp(self):
+        self.parent = self._case('bug-parent', **{'update-prop-parent': 'parent value'})
+        self.other_domain_parent = self._case('bug-parent', domain='other-domain')
+        self.store = CountingDocumentStore({
+            doc['_id']: doc for doc in [self.parent, self.other_domain_parent]
+        })
+        patcher = patch('corehq.apps.userreports.expressions.specs.get_document_store_for_doc_type',
+                        return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('corehq.apps.userreports.planner.get_document_store_for_doc_type',
+                        return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _case(self, case_type, parent=None, domain=None, **properties):
+        case = dict(
+            _id=uuid.uuid4().hex,
+            domain=domain or self.domain,
+            doc_type='CommCareCase',
+            type=case_type,
+            indices=[{'referenced_id': parent['_id']}] if parent else [],
+            **properties
+        )
+        return case
+
+    def test_lookups(self, metrics_counter):
+        planner = RelatedDocPlanner([get_data_source_with_related_doc_type(), get_sample_data_source()])
+        self.assertEqual(
+            [(lookup.related_doc_type, lookup.depth) for lookup in planner.lookups], [('CommCareCase', 0)]
+        )
+
+    def test_nested_lookups_not_planned(self, metrics_counter):
+        config = get_data_source_with_related_doc_type()
+        # the parent's host is looked up from the parent, not from the doc being processed
+        config.named_expressions['parent_property']['value_expression'] = {
+            'type': 'related_doc',
+            'related_doc_type': 'CommCareCase',
+            'doc_id_expression': {'type': 'property_name', 'property_name': 'host_id'},
+            'value_expression': {'type': 'property_name', 'property_name': 'update-prop-host'},
+        }
+        planner = RelatedDocPlanner([config])
+        self.assertEqual(
+            [(lookup.related_doc_type, lookup.depth) for lookup in planner.lookups], [('CommCareCase', 0)]
+        )
+
+    def test_lookup_configs(self, metrics_counter):
+        configs = [get_data_source_with_related_doc_type(), get_data_source_with_related_doc_type()]
+        planner = RelatedDocPlanner(configs + [get_sample_data_source()])
+        [lookup] = planner.lookups
+        self.assertEqual([id(config) for config in lookup.configs], [id(config) for config in configs])
+
+    def test_docs_filtered_out(self, metrics_counter):
+        # the data source only processes bug-child cases
+        docs = [
+            self._case('bug-child', parent=self.parent),
+            self._case('bug-other', parent=self.parent),
+            self._case('bug-other', parent=self.other_domain_parent),
+        ]
+        eval_contexts = {doc['_id']: EvaluationContext(doc) for doc in docs}
+        RelatedDocPlanner([get_data_source_with_related_doc_type()]).prefetch(self.domain, docs, eval_contexts)
+        self.assertEqual(self.store.bulk_fetches, 1)
+        metrics_counter.assert_any_call(
+            'commcare.ucr.related_doc_prefetch.fetched', 1, tags={'related_doc_type': 'CommCareCase'}
+        )
+        metrics_counter.assert_any_call(
+            'commcare.ucr.related_doc_prefetch.saved', 0, tags={'related_doc_type': 'CommCareCase'}
+        )
+
+    def test_no_lookups(self, metrics_counter):
+        planner = RelatedDocPlanner([get_sample_data_source()])
+        doc = self._case('ticket')
+        planner.prefetch(self.domain, [doc], {doc['_id']: EvaluationContext(doc)})
+        self.assertEqual(self.store.bulk_fetches, 0)
+
+    def test_prefetch(self, metrics_counter):
+        # two configs with the same lookup
+        configs = [get_data_source_with_related_doc_type(), get_data_source_with_related_doc_type()]
+        children = [
+            self._case('bug-child', parent=self.parent),
+            self._case('bug-child', parent=self.parent),
+            self._case('bug-child', parent=self.other_domain_parent),
+            self._case('bug-child'),
+        ]
+        eval_contexts = {doc['_id']: EvaluationContext(doc) for doc in children}
+        RelatedDocPlanner(configs).prefetch(self.domain, children, eval_contexts)
+        self.assertEqual(self.store.bulk_fetches, 1)
+
+        values = []
+        for child in children:
+            for config in configs:
+                [row] = config.get_all_values(child, eval_contexts[child['_id']])
+                values.append({value.column.id: value.value for value in row}['parent_property'])
+                eval_contexts[child['_id']].reset_iteration()
+        self.assertEqual(values, ['parent value'] * 4 + [None] * 4)
+        self.assertEqual(self.store.single_fetches, 0)
+        metrics_counter.assert_any_call(
+            'commcare.ucr.related_doc_prefetch.saved', 1, tags={'related_doc_type': 'CommCareCase'}
+        )
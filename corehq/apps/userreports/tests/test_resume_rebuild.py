@@ -1,6 +1,8 @@
+from datetime import datetime
+
 from django.test import SimpleTestCase
 
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import DataSourceResumeHelper, RebuildSlice
 from corehq.apps.userreports.tests.utils import get_sample_data_source
 
 
@@ -41,3 +43,25 @@ class DataSourceResumeBuildTest(SimpleTestCase):
     def test_has_resume_info_true(self):
         self._resume_helper.add_completed_case_type_or_xmlns('type1')
         self.assertEqual(True, self._resume_helper.has_resume_info())
+
+    def test_slices(self):
+        slices = [RebuildSlice('type1', 'db1', 1, 101), RebuildSlice(None, 'db2', 1, 11)]
+        started = datetime(2020, 1, 1, 12, 30)
+        self._resume_helper.set_slices(slices, started)
+        self.assertEqual(True, self._resume_helper.has_resume_info())
+        self.assertEqual(started, self._resume_helper.get_slices_started())
+
+        self._resume_helper.add_completed_slice(slices[0])
+        self.assertEqual([slices[1]], self._resume_helper.get_incomplete_slices())
+        self.assertFalse(self._resume_helper.claim_table_replacement())
+
+        self._resume_helper.add_completed_slice(slices[1])
+        self.assertEqual([], self._resume_helper.get_incomplete_slices())
+        self.assertTrue(self._resume_helper.claim_table_replacement())
+        self.assertFalse(self._resume_helper.claim_table_replacement())
+
+    def test_clear_slices(self):
+        self._resume_helper.set_slices([RebuildSlice('type1', 'db1', 1, 101)], datetime.utcnow())
+        self._resume_helper.clear_resume_info()
+        self.assertEqual(False, self._resume_helper.has_resume_info())
+        self.assertIsNone(self._resume_helper.get_slices_started())
@@ -4,6 +4,7 @@ from django.test import TestCase, override_settings
 
 from alembic.operations import Operations
 from alembic.runtime.migration import MigrationContext
+from mock import patch
 
 from corehq.apps.userreports.app_manager.helpers import clean_table_name
 from corehq.apps.userreports.const import UCR_SQL_BACKEND
@@ -16,6 +17,7 @@ from corehq.apps.userreports.models import (
     InvalidUCRData,
 )
 from corehq.apps.userreports.util import get_indicator_adapter
+from corehq.util.test_utils import flag_enabled
 
 
 def get_sample_config(domain=None):
@@ -98,6 +100,27 @@ class SaveErrorsTest(TestCase):
         self.assertEqual(invalid[0].validation_name, 'not_null_violation')
         self.assertEqual(invalid[0].doc_id, '123')
 
+    @flag_enabled('UCR_COPY_ROWS')
+    @patch('corehq.apps.userreports.sql.adapter.COPY_MIN_ROWS', 1)
+    def test_non_nullable_column_bulk_save(self):
+        self.config.configured_indicators[0]['is_nullable'] = False
+        self.config._id = 'docs id'
+        adapter = self._get_adapter()
+        adapter.build_table()
+
+        docs = [{
+            "_id": doc_id,
+            "domain": "domain",
+            "doc_type": "CommCareCase",
+            "name": name
+        } for doc_id, name in [('123', None), ('456', 'bob')]]
+        adapter.best_effort_bulk_save(docs)
+
+        invalid = InvalidUCRData.objects.all()
+        self.assertEqual(len(invalid), 1)
+        self.assertEqual(invalid[0].doc_id, '123')
+        self.assertEqual([row.name for row in adapter.get_query_object()], ['bob'])
+
 
 class AdapterBulkSaveTest(TestCase):
 
@@ -131,3 +154,21 @@ class AdapterBulkSaveTest(TestCase):
     def test_save_rows_empty(self):
         self.adapter.build_table()
         self.adapter.save_rows([])
+
+    @flag_enabled('UCR_COPY_ROWS')
+    @patch('corehq.apps.userreports.sql.adapter.COPY_MIN_ROWS', 1)
+    def test_bulk_save_with_copy(self):
+        names = ['doc_name_0', '', None, 'quote "and" comma, \\backslash']
+        docs = [{
+            "_id": str(i),
+            "domain": self.domain,
+            "doc_type": "CommCareCase",
+            "name": name,
+        } for i, name in enumerate(names)]
+
+        self.adapter.build_table()
+        self.adapter.bulk_save(docs)
+        # saving again replaces the rows
+        self.adapter.bulk_save(docs)
+        rows = sorted(self.adapter.get_query_object(), key=lambda row: row.doc_id)
+        self.assertEqual([row.name for row in rows], names)
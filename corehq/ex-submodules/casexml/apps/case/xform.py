@@ -328,7 +328,21 @@ def extract_case_blocks(doc, include_path=False):
     else:
         form = doc.form_data
 
-    return [struct if include_path else struct.caseblock for struct in _extract_case_blocks(form)]
+    parsed_xform = getattr(doc, 'parsed_xform', None)
+    if parsed_xform is not None:
+        # the case blocks were located when the form was parsed
+        structs = _extract_parsed_case_blocks(parsed_xform, form)
+    else:
+        structs = _extract_case_blocks(form)
+    return [struct if include_path else struct.caseblock for struct in structs]
+
+
+def _extract_parsed_case_blocks(parsed_xform, form):
+    from corehq.form_processor.utils import extract_meta_instance_id
+    form_id = extract_meta_instance_id(form)
+    for path, value in parsed_xform.iter_case_values(form):
+        for case_block in _iter_case_blocks(value, path, form_id):
+            yield case_block
 
 
 def _extract_case_blocks(data, path=None, form_id=Ellipsis):
@@ -351,22 +365,27 @@ def _extract_case_blocks(data, path=None, form_id=Ellipsis):
             new_path = path + [key]
             if const.CASE_TAG == key:
                 # it's a case block! Stop recursion and add to this value
-                if isinstance(value, list):
-                    case_blocks = value
-                else:
-                    case_blocks = [value]
-
-                for case_block in case_blocks:
-                    if has_case_id(case_block):
-                        validate_phone_datetime(
-                            case_block.get('@date_modified'), none_ok=True, form_id=form_id
-                        )
-                        yield CaseBlockWithPath(caseblock=case_block, path=path)
+                for case_block in _iter_case_blocks(value, path, form_id):
+                    yield case_block
             else:
                 for case_block in _extract_case_blocks(value, path=new_path, form_id=form_id):
                     yield case_block
 
 
+def _iter_case_blocks(value, path, form_id):
+    if isinstance(value, list):
+        case_blocks = value
+    else:
+        case_blocks = [value]
+
+    for case_block in case_blocks:
+        if has_case_id(case_block):
+            validate_phone_datetime(
+                case_block.get('@date_modified'), none_ok=True, form_id=form_id
+            )
+            yield CaseBlockWithPath(caseblock=case_block, path=path)
+
+
 def get_case_updates(xform):
     if not xform:
         return []
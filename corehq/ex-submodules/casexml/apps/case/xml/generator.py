@@ -1,4 +1,7 @@
+import re
+
 import settings
+from casexml.apps.case import const
 from casexml.apps.case.xml import V1, V2, V3, check_version, V2_NAMESPACE
 from lxml import etree as ElementTree
 import logging
@@ -255,3 +258,181 @@ class CaseDBXMLGenerator(V2CaseXMLGenerator):
         self.add_indices(element)
         self.add_attachments(element)
         return element
+
+
+class UnsupportedCaseXMLValue(Exception):
+    """Raised by ``CaseXMLSerializer`` for values it cannot reproduce
+    byte-for-byte; callers fall back to the lxml generators."""
+
+
+# characters lxml refuses to serialize ("All strings must be XML compatible")
+_INVALID_XML_CHARS = re.compile(
+    '[^\u0009\u000A\u000D\u0020-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]')
+# printable ASCII, which libxml2 writes to attributes without char refs
+_SIMPLE_ATTR_VALUE = re.compile('[\t\n\r\x20-\x7e]*')
+# conservative subset of the names lxml accepts as tags
+_SIMPLE_TAG_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_.\-]*')
+# matches libxml2's escaping of text nodes
+_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '\r': '&#13;'})
+# matches libxml2's escaping of attribute values
+_ATTR_ESCAPES = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+    '\n': '&#10;', '\r': '&#13;', '\t': '&#9;',
+})
+
+
+class CaseXMLSerializer(object):
+    """
+    Writes V2/V3 case blocks straight to UTF-8 bytes.
+
+    This produces exactly the same bytes as
+    ``tostring(get_case_element(case, updates, version))`` without creating
+    an lxml element per node. Anything that would need lxml's help to
+    serialize identically (dict property values, unusual tag names,
+    non-ASCII attribute values, XML-incompatible characters) raises
+    ``UnsupportedCaseXMLValue`` so the caller can use the lxml generator.
+    """
+
+    def __init__(self, case):
+        self.case = case
+        self._parts = []
+        self._write = self._parts.append
+
+    def get_bytes(self, updates):
+        from corehq.apps.users.cases import get_owner_id
+        case = self.case
+        write = self._write
+
+        attrs = [
+            ("xmlns", V2_NAMESPACE),
+            ("case_id", case.case_id),
+            ("user_id", case.user_id or ''),
+        ]
+        if case.modified_on:
+            attrs.append(("date_modified", datetime_to_xml_string(case.modified_on)))
+        write('<case')
+        self._write_attrs(attrs)
+        write('>')
+
+        do_create = const.CASE_ACTION_CREATE in updates
+        do_update = const.CASE_ACTION_UPDATE in updates
+        do_purge = const.CASE_ACTION_PURGE in updates or const.CASE_ACTION_CLOSE in updates
+
+        base_properties = [
+            ("case_type", case.type),
+            ("case_name", case.name),
+            ("owner_id", get_owner_id(case)),
+        ]
+        if do_create:
+            write('<create>')
+            self._write_simple_elements(base_properties)
+            write('</create>')
+
+        if do_update:
+            properties = [] if do_create else list(base_properties)
+            if case.external_id:
+                properties.append(("external_id", case.external_id))
+            if case.opened_on:
+                properties.append(("date_opened", date_to_xml_string(case.opened_on)))
+            if properties:
+                write('<update>')
+                self._write_simple_elements(properties)
+                self._write_dynamic_properties()
+                write('</update>')
+            else:
+                # dynamic properties may be empty, in which case the update
+                # block is omitted entirely
+                mark = len(self._parts)
+                write('<update>')
+                self._write_dynamic_properties()
+                if len(self._parts) == mark + 1:
+                    del self._parts[mark:]
+                else:
+                    write('</update>')
+
+            self._write_indices()
+            self._write_attachments()
+
+        if do_purge:
+            write('<close/>')
+
+        write('</case>')
+        return ''.join(self._parts).encode('utf-8')
+
+    def _write_simple_elements(self, pairs):
+        # mirrors ``safe_element``: falsy values produce an empty element
+        write = self._write
+        for tag, value in pairs:
+            if value:
+                write('<%s>%s</%s>' % (tag, self._text(str(value)), tag))
+            else:
+                write('<%s/>' % tag)
+
+    def _write_dynamic_properties(self):
+        # mirrors ``get_dynamic_element``: text is always set
+        write = self._write
+        for key, value in self.case.dynamic_case_properties().items():
+            if isinstance(value, dict):
+                raise UnsupportedCaseXMLValue(key)
+            tag = self._tag(key)
+            text = str(value)
+            if text:
+                write('<%s>%s</%s>' % (tag, self._text(text), tag))
+            else:
+                write('<%s></%s>' % (tag, tag))
+
+    def _write_indices(self):
+        indices = self.case.indices
+        if not indices:
+            return
+        write = self._write
+        write('<index>')
+        # sorted is stable, as is the element sort in V2CaseXMLGenerator
+        for index in sorted(indices, key=lambda i: i.identifier):
+            tag = self._tag(index.identifier)
+            write('<' + tag)
+            attrs = [("case_type", index.referenced_type)]
+            if getattr(index, 'relationship') and index.relationship == "extension":
+                attrs.append(("relationship", index.relationship))
+            self._write_attrs(attrs)
+            if index.referenced_id:
+                write('>%s</%s>' % (self._text(str(index.referenced_id)), tag))
+            else:
+                write('/>')
+        write('</index>')
+
+    def _write_attachments(self):
+        if not _sync_attachments(self.case.domain):
+            return
+        attachments = self.case.case_attachments
+        if not attachments:
+            return
+        write = self._write
+        write('<attachment>')
+        for name in attachments:
+            write('<' + self._tag(name))
+            self._write_attrs([
+                ("src", self.case.get_attachment_server_url(name)),
+                ("from", "remote"),
+            ])
+            write('/>')
+        write('</attachment>')
+
+    def _write_attrs(self, attrs):
+        write = self._write
+        for name, value in attrs:
+            if not isinstance(value, str) or not _SIMPLE_ATTR_VALUE.fullmatch(value):
+                raise UnsupportedCaseXMLValue(name)
+            write(' %s="%s"' % (name, value.translate(_ATTR_ESCAPES)))
+
+    @staticmethod
+    def _tag(name):
+        if not isinstance(name, str) or not _SIMPLE_TAG_NAME.fullmatch(name):
+            raise UnsupportedCaseXMLValue(name)
+        return name
+
+    @staticmethod
+    def _text(value):
+        if _INVALID_XML_CHARS.search(value):
+            raise UnsupportedCaseXMLValue(value)
+        return value.translate(_TEXT_ESCAPES)
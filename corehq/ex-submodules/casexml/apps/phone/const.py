@@ -15,6 +15,7 @@ ASYNC_RETRY_AFTER = 5
 
 ASYNC_RESTORE_CACHE_KEY_PREFIX = "async-restore-task"
 RESTORE_CACHE_KEY_PREFIX = "ota-restore"
+RESTORE_FRAGMENT_CACHE_KEY_PREFIX = "ota-restore-fragment"
 
 # case sync algorithms
 CLEAN_OWNERS = 'clean_owners'
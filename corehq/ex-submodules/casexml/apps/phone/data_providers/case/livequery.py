@@ -22,23 +22,41 @@ Example case graphs with outcomes:
    a(closed) <--ext-- b <--chi-- c(owned) >> []
 """
 import logging
+import threading
 from collections import defaultdict
 from functools import wraps
 from itertools import chain, islice
+from queue import Full, Queue
+
+from django.db import connections
 
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
 from casexml.apps.phone.data_providers.case.load_testing import (
-    get_xml_for_response,
+    get_xml_for_updates,
+)
+from casexml.apps.phone.data_providers.case.stock import (
+    get_stock_payload,
+    project_uses_ledgers,
 )
-from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
-from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
-from corehq.sql_db.routers import read_from_plproxy_standbys
-from corehq.toggles import LIVEQUERY_READ_FROM_STANDBYS, NAMESPACE_USER
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors, LedgerAccessors
+from corehq.sql_db.routers import (
+    allow_read_from_plproxy_standby,
+    read_from_plproxy_standbys,
+)
+from corehq.toggles import (
+    LIVEQUERY_PREFETCH_CASES,
+    LIVEQUERY_READ_FROM_STANDBYS,
+    NAMESPACE_USER,
+)
 from corehq.util.metrics import metrics_histogram
 from corehq.util.metrics.load_counters import case_load_counter
+from corehq.util.timer import NestableTimer
+
+# number of case batches fetched ahead of the batch being serialized
+PREFETCH_DEPTH = 1
 
 
 def livequery_read_from_standbys(func):
@@ -272,11 +290,21 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
                     'restore_type': 'incremental' if restore_state.last_sync_log else 'fresh'
                 }
             )
+            if LIVEQUERY_PREFETCH_CASES.enabled(restore_state.domain):
+                ledger_accessor = None
+                if project_uses_ledgers(restore_state.project):
+                    ledger_accessor = LedgerAccessors(restore_state.domain)
+                batches = prefetch_batches(
+                    timing_context,
+                    batch_cases(iaccessor, sync_ids, ledger_accessor),
+                )
+            else:
+                batches = batch_cases(iaccessor, sync_ids)
             compile_response(
                 timing_context,
                 restore_state,
                 response,
-                batch_cases(iaccessor, sync_ids),
+                batches,
                 init_progress(async_task, len(sync_ids)),
             )
 
@@ -311,7 +339,12 @@ class PrefetchIndexCaseAccessor(object):
         return self.accessor.get_cases(case_ids, **kw)
 
 
-def batch_cases(accessor, case_ids):
+def batch_cases(accessor, case_ids, ledger_accessor=None):
+    """Yield two-tuples: (cases, ledgers)
+
+    Ledgers are the result of ``get_current_ledger_state`` for the
+    batch of cases if ``ledger_accessor`` is given, otherwise `None`.
+    """
     def take(n, iterable):
         # https://docs.python.org/2/library/itertools.html#recipes
         return list(islice(iterable, n))
@@ -323,7 +356,75 @@ def batch_cases(accessor, case_ids):
         if not next_ids:
             break
         track_load(len(next_ids))
-        yield accessor.get_cases(next_ids)
+        cases = accessor.get_cases(next_ids)
+        ledgers = None
+        if ledger_accessor is not None:
+            ledgers = ledger_accessor.get_current_ledger_state([c.case_id for c in cases])
+        yield cases, ledgers
+
+
+def prefetch_batches(timing_context, batches, depth=PREFETCH_DEPTH):
+    """Consume `batches` on a worker thread, up to `depth` batches ahead
+
+    Batches are yielded in order. Time spent fetching on the worker and
+    waiting for it are recorded in `timing_context`. Exceptions raised
+    while fetching are re-raised in the calling thread.
+    """
+    done = object()
+    queue = Queue(maxsize=depth)
+    stop = threading.Event()
+    read_from_standbys = allow_read_from_plproxy_standby()
+
+    def put(item):
+        # do not block forever if the consumer has gone away
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def fetch_all():
+        items = iter(batches)
+        while True:
+            timer = NestableTimer("fetch_case_batch", is_root=False)
+            timer.start()
+            batch = next(items, done)
+            timer.stop()
+            if batch is done or not put((timer, batch, None)):
+                return
+
+    def fetch():
+        try:
+            if read_from_standbys:
+                with read_from_plproxy_standbys():
+                    fetch_all()
+            else:
+                fetch_all()
+            put((None, done, None))
+        except Exception as err:
+            put((None, done, err))
+        finally:
+            # connections are thread local: don't leak this thread's
+            connections.close_all()
+
+    worker = threading.Thread(target=fetch, name="livequery-prefetch")
+    worker.daemon = True
+    worker.start()
+    try:
+        while True:
+            with timing_context("wait_for_case_batch"):
+                timer, batch, err = queue.get()
+            if err is not None:
+                raise err
+            if batch is done:
+                break
+            timing_context.peek().append(timer)
+            yield batch
+    finally:
+        stop.set()
+        worker.join()
 
 
 def init_progress(async_task, total):
@@ -346,12 +447,13 @@ def init_progress(async_task, total):
 
 def compile_response(timing_context, restore_state, response, batches, update_progress):
     done = 0
-    for cases in batches:
+    for cases, ledgers in batches:
         with timing_context("get_stock_payload"):
             response.extend(get_stock_payload(
                 restore_state.project,
                 restore_state.stock_settings,
                 cases,
+                ledgers,
             ))
 
         with timing_context("get_case_sync_updates (%s cases)" % len(cases)):
@@ -359,9 +461,7 @@ def compile_response(timing_context, restore_state, response, batches, update_pr
                 restore_state.domain, cases, restore_state.last_sync_log)
 
         with timing_context("get_xml_for_response (%s updates)" % len(updates)):
-            response.extend(item
-                for update in updates
-                for item in get_xml_for_response(update, restore_state))
+            response.extend(get_xml_for_updates(updates, restore_state))
 
         done += len(cases)
         update_progress(done)
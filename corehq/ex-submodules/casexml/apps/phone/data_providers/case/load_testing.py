@@ -1,7 +1,10 @@
 from copy import deepcopy
+from casexml.apps.case.xml.generator import _sync_attachments
 from casexml.apps.phone.data_providers.case.utils import CaseSyncUpdate
-from casexml.apps.phone.xml import get_case_element, tostring
+from casexml.apps.phone.restore_caching import RestoreFragmentCache
+from casexml.apps.phone.xml import get_case_xml
 from corehq.apps.app_manager.const import USERCASE_TYPE
+from corehq.toggles import RESTORE_CASE_FRAGMENT_CACHE
 
 
 def transform_loadtest_update(update, factor):
@@ -28,8 +31,7 @@ def get_xml_for_response(update, restore_state):
     original_update = update
     elements = []
     while current_count < restore_state.loadtest_factor:
-        element = get_case_element(update.case, update.required_updates, restore_state.version)
-        elements.append(tostring(element))
+        elements.append(get_case_xml(update.case, update.required_updates, restore_state.version))
         current_count += 1
         if current_count < restore_state.loadtest_factor:
             update = transform_loadtest_update(original_update, current_count)
@@ -37,3 +39,43 @@ def get_xml_for_response(update, restore_state):
         if original_update.case.type == USERCASE_TYPE:
             break
     return elements
+
+
+def get_xml_for_updates(updates, restore_state):
+    """
+    Yields the XML for a batch of case updates, reusing case blocks cached
+    by previous restores for cases that have not changed since.
+    """
+    if (restore_state.loadtest_factor > 1
+            or not RESTORE_CASE_FRAGMENT_CACHE.enabled(restore_state.domain)):
+        for update in updates:
+            for item in get_xml_for_response(update, restore_state):
+                yield item
+        return
+
+    version = restore_state.version
+    attachments = _sync_attachments(restore_state.domain)
+    cache = RestoreFragmentCache(restore_state.domain, 'case')
+    keys = [_get_fragment_key(update, version, attachments) for update in updates]
+    cached = cache.get_many([key for key in keys if key is not None])
+    new_fragments = {}
+    for key, update in zip(keys, updates):
+        xml = cached.get(key)
+        if xml is None:
+            xml = get_case_xml(update.case, update.required_updates, version)
+            if key is not None:
+                new_fragments[key] = xml
+        yield xml
+    cache.set_many(new_fragments)
+
+
+def _get_fragment_key(update, version, attachments):
+    modified = getattr(update.case, 'server_modified_on', None)
+    if not modified:
+        return None
+    return update.case.case_id, '{} {} {} {}'.format(
+        modified.isoformat(),
+        version,
+        ','.join(sorted(update.required_updates)),
+        attachments,
+    )
@@ -12,28 +12,38 @@ from casexml.apps.stock.consumption import compute_default_monthly_consumption,
 from casexml.apps.stock.const import COMMTRACK_REPORT_XMLNS
 
 
-def get_stock_payload(project, stock_settings, case_stub_list):
-    uses_ledgers = project.commtrack_enabled or toggles.NON_COMMTRACK_LEDGERS.enabled(project.name)
-    if project and not uses_ledgers:
+def project_uses_ledgers(project):
+    return project.commtrack_enabled or toggles.NON_COMMTRACK_LEDGERS.enabled(project.name)
+
+
+def get_stock_payload(project, stock_settings, case_stub_list, ledgers=None):
+    """
+    :param ledgers: Optional result of ``get_current_ledger_state`` for
+    the cases in ``case_stub_list``. Ledgers are fetched if not provided.
+    """
+    if project and not project_uses_ledgers(project):
         return
 
-    generator = StockPayloadGenerator(project.name, stock_settings, case_stub_list)
+    generator = StockPayloadGenerator(project.name, stock_settings, case_stub_list, ledgers)
     for section in generator.yield_sections():
         yield section
 
 
 class StockPayloadGenerator(object):
-    def __init__(self, domain_name, stock_settings, case_stub_list):
+    def __init__(self, domain_name, stock_settings, case_stub_list, ledgers=None):
         self.domain_name = domain_name
         self.stock_settings = stock_settings
         self.case_stub_list = case_stub_list
+        self.ledgers = ledgers
 
         from lxml.builder import ElementMaker
         self.elem_maker = ElementMaker(namespace=COMMTRACK_REPORT_XMLNS)
 
     def yield_sections(self):
-        case_ids = [case.case_id for case in self.case_stub_list]
-        all_current_ledgers = LedgerAccessors(self.domain_name).get_current_ledger_state(case_ids)
+        all_current_ledgers = self.ledgers
+        if all_current_ledgers is None:
+            case_ids = [case.case_id for case in self.case_stub_list]
+            all_current_ledgers = LedgerAccessors(self.domain_name).get_current_ledger_state(case_ids)
         for case_stub in self.case_stub_list:
             case_id = case_stub.case_id
             case_ledgers = all_current_ledgers[case_id]
@@ -0,0 +1,78 @@
+import time
+import uuid
+from datetime import datetime
+
+from django.core.management import BaseCommand
+
+from mock import patch
+
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.restore import RestoreContent
+from casexml.apps.phone.xml import get_case_element, get_case_xml, tostring
+from corehq.form_processor.models import CommCareCaseIndexSQL, CommCareCaseSQL
+
+
+class Command(BaseCommand):
+    """Compare the lxml and streaming case XML serializers on a synthetic restore
+
+    No database access is needed: cases are built in memory. Both payloads
+    are checked to be byte-identical.
+
+    Usage: ./manage.py benchmark_case_xml --cases 100000 --properties 20
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', type=int, default=100000)
+        parser.add_argument('--properties', type=int, default=20)
+
+    def handle(self, cases, properties, **options):
+        print("Building {} cases with {} properties".format(cases, properties))
+        case_list = [_get_case(i, properties) for i in range(cases)]
+        updates = ('create', 'update')
+
+        def lxml_path(case):
+            return tostring(get_case_element(case, updates, V2))
+
+        def streaming_path(case):
+            return get_case_xml(case, updates, V2)
+
+        with patch('casexml.apps.case.xml.generator._sync_attachments', lambda domain: False):
+            lxml_payload, lxml_time = _restore(case_list, lxml_path)
+            streaming_payload, streaming_time = _restore(case_list, streaming_path)
+
+        print("lxml:      {:.2f}s".format(lxml_time))
+        print("streaming: {:.2f}s".format(streaming_time))
+        print("speedup:   {:.2f}x".format(lxml_time / streaming_time))
+        print("payload:   {} bytes, identical: {}".format(
+            len(streaming_payload), lxml_payload == streaming_payload))
+
+
+def _restore(case_list, serialize):
+    start = time.time()
+    with RestoreContent('benchmark', items=True) as content:
+        content.extend(serialize(case) for case in case_list)
+        with content.get_fileobj() as fileobj:
+            duration = time.time() - start
+            return fileobj.read(), duration
+
+
+def _get_case(num, properties):
+    now = datetime.utcnow()
+    case = CommCareCaseSQL(
+        domain='benchmark',
+        case_id=uuid.uuid4().hex,
+        type='patient',
+        name='Patient {} & family'.format(num),
+        owner_id='owner-id',
+        user_id='user-id',
+        opened_on=now,
+        modified_on=now,
+        case_json={'property_{}'.format(i): 'value {}'.format(i) for i in range(properties)},
+    )
+    case.cached_indices = [CommCareCaseIndexSQL(
+        identifier='parent',
+        referenced_type='household',
+        referenced_id=uuid.uuid4().hex,
+        relationship_id=CommCareCaseIndexSQL.CHILD,
+    )]
+    return case
@@ -1,6 +1,6 @@
+import io
 import logging
 import os
-import shutil
 import tempfile
 import uuid
 from io import BytesIO
@@ -98,12 +98,22 @@ class StockSettings(object):
 
 
 class RestoreContent(object):
+    """Restore response body written to a single temporary file
+
+    Space for the start tag is reserved at the front of the file and the
+    tag (which includes the item count) is written when the content is
+    finished, right-aligned against the first element. The returned file
+    object starts at the beginning of the tag, so the payload is identical
+    to writing the tag first without copying the body into a second file.
+    """
     start_tag_template = (
         b'<OpenRosaResponse xmlns="http://openrosa.org/http/response"%(items)s>'
         b'<message nature="%(nature)s">Successfully restored account %(username)s!</message>'
     )
     items_template = b' items="%s"'
     closing_tag = b'</OpenRosaResponse>'
+    # fixed width reserved for the item count in the start tag
+    max_items_digits = 20
 
     def __init__(self, username=None, items=False):
         self.username = username
@@ -112,10 +122,13 @@ class RestoreContent(object):
 
     def __enter__(self):
         self.response_body = tempfile.TemporaryFile('w+b')
+        self.header_size = len(self._get_start_tag(b'9' * self.max_items_digits))
+        self.response_body.seek(self.header_size)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.response_body.close()
+        if self.response_body is not None:
+            self.response_body.close()
 
     def append(self, xml_element):
         self.num_items += 1
@@ -130,29 +143,69 @@ class RestoreContent(object):
         for element in iterable:
             self.append(element)
 
-    def _write_to_file(self, fileobj):
-        # Add 1 to num_items to account for message element
-        items = (self.items_template % ('%s' % (self.num_items + 1)).encode('utf-8')) if self.items else b''
-        fileobj.write(self.start_tag_template % {
+    def _get_start_tag(self, num_items):
+        items = (self.items_template % num_items) if self.items else b''
+        return self.start_tag_template % {
             b"items": items,
             b"username": self.username.encode("utf8"),
             b"nature": ResponseNature.OTA_RESTORE_SUCCESS.encode("utf8"),
-        })
-
-        self.response_body.seek(0)
-        shutil.copyfileobj(self.response_body, fileobj)
-
-        fileobj.write(self.closing_tag)
+        }
 
     def get_fileobj(self):
-        fileobj = tempfile.TemporaryFile('w+b')
+        """Finish the response and return a file object positioned at its start
+
+        The returned file object owns the underlying temporary file; it is
+        not closed when this context exits.
+        """
+        # Add 1 to num_items to account for message element
+        start_tag = self._get_start_tag(('%s' % (self.num_items + 1)).encode('utf-8'))
+        offset = self.header_size - len(start_tag)
+        body = self.response_body
         try:
-            self._write_to_file(fileobj)
+            body.seek(0, os.SEEK_END)
+            body.write(self.closing_tag)
+            body.seek(offset)
+            body.write(start_tag)
+            fileobj = OffsetFile(body, offset)
             fileobj.seek(0)
-            return fileobj
         except:
-            fileobj.close()
+            body.close()
             raise
+        finally:
+            self.response_body = None
+        return fileobj
+
+
+class OffsetFile(io.RawIOBase):
+    """Read-only view of a file object that starts at ``offset``"""
+
+    def __init__(self, fileobj, offset):
+        self.fileobj = fileobj
+        self.offset = offset
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def read(self, size=-1):
+        return self.fileobj.read(size)
+
+    def readinto(self, buffer):
+        return self.fileobj.readinto(buffer)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            offset += self.offset
+        return self.fileobj.seek(offset, whence) - self.offset
+
+    def tell(self):
+        return self.fileobj.tell() - self.offset
+
+    def close(self):
+        self.fileobj.close()
+        super(OffsetFile, self).close()
 
 
 class RestoreResponse(object):
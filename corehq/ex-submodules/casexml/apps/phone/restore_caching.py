@@ -1,8 +1,14 @@
 import hashlib
 import logging
 import datetime
-from casexml.apps.phone.const import RESTORE_CACHE_KEY_PREFIX, ASYNC_RESTORE_CACHE_KEY_PREFIX
+from casexml.apps.phone.const import (
+    RESTORE_CACHE_KEY_PREFIX,
+    ASYNC_RESTORE_CACHE_KEY_PREFIX,
+    RESTORE_FRAGMENT_CACHE_KEY_PREFIX,
+)
 from corehq.toggles import ENABLE_LOADTEST_USERS
+from corehq.util.metrics import metrics_counter
+from corehq.util.metrics.utils import maybe_add_domain_tag
 from corehq.util.quickcache import quickcache
 from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
 
@@ -97,3 +103,67 @@ class RestorePayloadPathCache(_RestoreCache):
 class AsyncRestoreTaskIdCache(_RestoreCache):
     timeout = 24 * 60 * 60
     prefix = ASYNC_RESTORE_CACHE_KEY_PREFIX
+
+
+class RestoreFragmentCache(object):
+    """Cache of pre-serialized restore elements
+
+    Fragments are stored by ``(name, version)``, where ``version`` must
+    change whenever the serialized element would change (for example the
+    case's ``server_modified_on``). Stale fragments are never invalidated
+    explicitly: a new version simply misses the cache and the old entry
+    expires. ``invalidate_restore_cache(domain)`` drops all fragments for
+    the domain.
+
+    Hits and misses are reported as ``commcare.restores.fragment_cache``.
+    """
+    timeout = 24 * 60 * 60
+
+    def __init__(self, domain, fragment_type):
+        self.domain = domain
+        self.fragment_type = fragment_type
+
+    def _make_cache_key(self, name, version):
+        hashable_key = ','.join([str(part) for part in [
+            self.domain,
+            RESTORE_FRAGMENT_CACHE_KEY_PREFIX,
+            self.fragment_type,
+            name,
+            version,
+            _get_domain_freshness_token(self.domain),
+        ]])
+        return hashlib.md5(hashable_key.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Get cached fragments
+
+        :param keys: List of ``(name, version)`` pairs.
+        :returns: Dict of ``{(name, version): bytes}`` for cached fragments.
+        """
+        if not keys:
+            return {}
+        cache_keys = {self._make_cache_key(name, version): (name, version) for name, version in keys}
+        found = get_redis_default_cache().get_many(list(cache_keys))
+        result = {cache_keys[cache_key]: value for cache_key, value in found.items()}
+        self._record_metric('hit', len(result))
+        self._record_metric('miss', len(cache_keys) - len(result))
+        return result
+
+    def set_many(self, fragments):
+        """Cache fragments
+
+        :param fragments: Dict of ``{(name, version): bytes}``.
+        """
+        if not fragments:
+            return
+        get_redis_default_cache().set_many({
+            self._make_cache_key(name, version): value
+            for (name, version), value in fragments.items()
+        }, timeout=self.timeout)
+
+    def _record_metric(self, result, count):
+        if not count:
+            return
+        tags = {'type': self.fragment_type, 'result': result}
+        maybe_add_domain_tag(self.domain, tags)
+        metrics_counter('commcare.restores.fragment_cache', count, tags=tags)
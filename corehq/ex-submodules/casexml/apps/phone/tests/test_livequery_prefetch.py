@@ -0,0 +1,51 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.data_providers.case.livequery import prefetch_batches
+from corehq.util.timer import TimingContext
+
+
+class PrefetchBatchesTest(SimpleTestCase):
+
+    def test_batches_are_yielded_in_order(self):
+        batches = [([i], None) for i in range(10)]
+        with TimingContext("restore") as timing_context:
+            result = list(prefetch_batches(timing_context, iter(batches)))
+        self.assertEqual(result, batches)
+        names = {timer.name for timer in timing_context.to_list(exclude_root=True)}
+        self.assertEqual(names, {"fetch_case_batch", "wait_for_case_batch"})
+
+    def test_batches_are_fetched_on_another_thread(self):
+        def batches():
+            for i in range(3):
+                yield threading.current_thread().name, None
+
+        with TimingContext("restore") as timing_context:
+            names = {name for name, ledgers in prefetch_batches(timing_context, batches())}
+        self.assertEqual(names, {"livequery-prefetch"})
+
+    def test_fetch_error_is_raised(self):
+        def batches():
+            yield [1], None
+            raise ValueError("fetch failed")
+
+        with TimingContext("restore") as timing_context:
+            items = prefetch_batches(timing_context, batches())
+            self.assertEqual(next(items), ([1], None))
+            with self.assertRaisesRegex(ValueError, "fetch failed"):
+                next(items)
+
+    def test_fetching_stops_when_consumer_stops(self):
+        fetched = []
+
+        def batches():
+            for i in range(100):
+                fetched.append(i)
+                yield [i], None
+
+        with TimingContext("restore") as timing_context:
+            items = prefetch_batches(timing_context, batches(), depth=1)
+            next(items)
+            items.close()
+        self.assertLess(len(fetched), 100)
@@ -783,6 +783,12 @@ class LiveQuerySyncTokenUpdateTestSQL(LiveQuerySyncTokenUpdateTest):
     pass
 
 
+@flag_enabled('RESTORE_CASE_FRAGMENT_CACHE')
+@use_sql_backend
+class LiveQueryFragmentCacheSyncTokenUpdateTestSQL(LiveQuerySyncTokenUpdateTest):
+    pass
+
+
 class SyncDeletedCasesTest(BaseSyncTest):
 
     def test_deleted_case_doesnt_sync(self):
@@ -2133,3 +2139,9 @@ class LiveQueryIndexSyncTest(IndexSyncTest):
 @use_sql_backend
 class LiveQueryIndexSyncTestSQL(LiveQueryIndexSyncTest):
     pass
+
+
+@flag_enabled('RESTORE_CASE_FRAGMENT_CACHE')
+@use_sql_backend
+class LiveQueryFragmentCacheIndexSyncTestSQL(LiveQueryIndexSyncTest):
+    pass
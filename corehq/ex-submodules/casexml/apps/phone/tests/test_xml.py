@@ -1,12 +1,16 @@
 import datetime
 import os.path
 from django.test import SimpleTestCase
+from mock import patch
 
 import casexml.apps.phone.xml as xml
 from casexml.apps.case.models import CommCareCase
 from casexml.apps.case.sharedmodels import CommCareCaseIndex
+from casexml.apps.case.xml import V2, V3
+from casexml.apps.case.xml.generator import CaseXMLSerializer, UnsupportedCaseXMLValue
 
 from corehq.apps.app_manager.tests.util import TestXmlMixin
+from corehq.form_processor.models import CommCareCaseIndexSQL, CommCareCaseSQL
 
 
 class TestCaseDBElement(TestXmlMixin, SimpleTestCase):
@@ -38,3 +42,97 @@ class TestCaseDBElement(TestXmlMixin, SimpleTestCase):
     def test_generate_xml(self):
         casedb_xml = xml.tostring(xml.get_casedb_element(self.case))
         self.assertXmlEqual(casedb_xml, self.get_xml('case_db_block'))
+
+
+@patch('casexml.apps.case.xml.generator._sync_attachments', lambda domain: False)
+class TestCaseXMLSerializer(SimpleTestCase):
+
+    def _get_case(self, case_json=None, indices=(), **kwargs):
+        case = CommCareCaseSQL(
+            domain='winterfell',
+            case_id='redwoman',
+            type='priestess',
+            name='melisandre',
+            owner_id='lordoflight',
+            user_id='stannis',
+            opened_on=datetime.datetime(2016, 5, 31),
+            modified_on=datetime.datetime(2016, 5, 31, 12, 30),
+            case_json=case_json if case_json is not None else {'power': 'prophecy'},
+            **kwargs
+        )
+        case.cached_indices = list(indices)
+        return case
+
+    def assertSameXML(self, case, updates=('create', 'update')):
+        for version in (V2, V3):
+            self.assertEqual(
+                xml.get_case_xml(case, updates, version),
+                xml.tostring(xml.get_case_element(case, updates, version)),
+            )
+
+    def test_create_update(self):
+        self.assertSameXML(self._get_case())
+
+    def test_update_only(self):
+        self.assertSameXML(self._get_case(), updates=('update',))
+
+    def test_closed(self):
+        self.assertSameXML(self._get_case(closed=True), updates=('create', 'update', 'close'))
+        self.assertSameXML(self._get_case(closed=True), updates=('close',))
+
+    def test_empty_values(self):
+        case = self._get_case(
+            case_json={'blank': '', 'none': None, 'number': 42},
+            name=None,
+            owner_id='',
+            user_id=None,
+            external_id='',
+            opened_on=None,
+            modified_on=None,
+        )
+        self.assertSameXML(case)
+        self.assertSameXML(case, updates=('update',))
+
+    def test_no_update_block(self):
+        case = self._get_case(case_json={}, opened_on=None)
+        self.assertSameXML(case)
+
+    def test_escaping(self):
+        case = self._get_case(
+            case_json={
+                'markup': '<b>bold</b> & "quoted" \'single\'',
+                'whitespace': 'line\nbreak\r\ttab',
+                'unicode': 'R’hllor \U0001F525',
+            },
+            name='<melisandre & co>',
+            external_id='ext&id',
+        )
+        self.assertSameXML(case)
+
+    def test_indices(self):
+        case = self._get_case(indices=[
+            CommCareCaseIndexSQL(
+                identifier='parent', referenced_type='human',
+                referenced_id='stannis', relationship_id=CommCareCaseIndexSQL.CHILD),
+            CommCareCaseIndexSQL(
+                identifier='host', referenced_type='god <of light>',
+                referenced_id='r"hllor', relationship_id=CommCareCaseIndexSQL.EXTENSION),
+            CommCareCaseIndexSQL(
+                identifier='empty', referenced_type='human',
+                referenced_id='', relationship_id=CommCareCaseIndexSQL.CHILD),
+        ])
+        self.assertSameXML(case)
+
+    def test_fallback(self):
+        for case_json in [
+            {'dict': {'#text': 'value', '@attr': 'x'}},
+            {'bad:tag': 'value'},
+            {'näme': 'value'},
+        ]:
+            case = self._get_case(case_json=case_json)
+            with self.assertRaises(UnsupportedCaseXMLValue):
+                CaseXMLSerializer(case).get_bytes(('create', 'update'))
+        case = self._get_case(case_id='café')
+        with self.assertRaises(UnsupportedCaseXMLValue):
+            CaseXMLSerializer(case).get_bytes(('create', 'update'))
+        self.assertSameXML(case)
@@ -4,7 +4,7 @@ from lxml import etree as ElementTree
 from casexml.apps.case import const
 from casexml.apps.case.xml import check_version, V1
 from casexml.apps.case.xml.generator import get_generator, date_to_xml_string,\
-    safe_element, CaseDBXMLGenerator
+    safe_element, CaseDBXMLGenerator, CaseXMLSerializer, UnsupportedCaseXMLValue
 import six
 
 USER_REGISTRATION_XMLNS_DEPRECATED = "http://openrosa.org/user-registration"
@@ -83,7 +83,19 @@ def get_case_element(case, updates, version=V1):
 
 
 def get_case_xml(case, updates, version=V1):
+    """
+    Returns the case block as UTF-8 bytes
+
+    V2 and V3 blocks are written directly by ``CaseXMLSerializer``, which
+    is byte-for-byte identical to serializing ``get_case_element``. Cases
+    the serializer can't handle fall back to building the lxml element.
+    """
     check_version(version)
+    if case is not None and version != V1:
+        try:
+            return CaseXMLSerializer(case).get_bytes(updates)
+        except UnsupportedCaseXMLValue:
+            pass
     return tostring(get_case_element(case, updates, version))
 
 
@@ -2,6 +2,8 @@ from codecs import BOM_UTF8
 from contextlib import closing
 import io
 import os
+import zipfile
+from unittest import skipUnless
 
 from django.test import SimpleTestCase
 from lxml import html, etree
@@ -9,9 +11,15 @@ from mock import patch, Mock
 
 from couchexport.export import export_from_tables
 from couchexport.models import Format
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
 from couchexport.writers import (
     MAX_XLS_COLUMNS,
     CsvFileWriter,
+    ParquetFileWriter,
     PythonDictWriter,
     XlsLengthException,
     ZippedExportWriter,
@@ -107,6 +115,41 @@ class HtmlExportWriterTests(SimpleTestCase):
                           ['<td>spam</td>', '<td>spam</td>', '<td/>', '<td>spam</td>']])
 
 
+@skipUnless(pyarrow, 'pyarrow is not installed')
+class ParquetExportWriterTests(SimpleTestCase):
+
+    def test_row_groups(self):
+        writer = ParquetFileWriter()
+        writer.open('Spam')
+        with patch.object(ParquetFileWriter, 'row_group_size', 2):
+            writer.write_row(['ham', 'spam', 'eggs'])
+            for row in [['a', 1, None], ['a', b'b\xe2\x80\x93', 'c'], ['b', 2.5, '']]:
+                writer.write_row(row)
+            writer.finish()
+        try:
+            parquet_file = pyarrow.parquet.ParquetFile(writer.get_path())
+            self.assertEqual(parquet_file.num_row_groups, 2)
+            table = parquet_file.read()
+            self.assertEqual(table.column_names, ['ham', 'spam', 'eggs'])
+            self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('ham').type))
+            self.assertEqual(table.to_pydict(), {
+                'ham': ['a', 'a', 'b'],
+                'spam': ['1', 'b\u2013', '2.5'],
+                'eggs': [None, 'c', ''],
+            })
+        finally:
+            writer.close()
+
+    def test_export_from_tables(self):
+        table = [['ham', 'spam'], ['a', 'b']]
+        with closing(io.BytesIO()) as file_:
+            export_from_tables([['Spam', table]], file_, Format.PARQUET)
+            with zipfile.ZipFile(file_) as archive:
+                self.assertEqual(archive.namelist(), ['Spam.parquet'])
+                parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(archive.read('Spam.parquet')))
+        self.assertEqual(parquet_file.read().to_pydict(), {'ham': ['a'], 'spam': ['b']})
+
+
 class Excel2007ExportWriterTests(SimpleTestCase):
 
     def test_bytestrings(self):
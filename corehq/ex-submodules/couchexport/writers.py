@@ -127,6 +127,69 @@ class CsvFileWriter(ExportFileWriter):
         self._file.write(buffer.getvalue().encode('utf-8'))
 
 
+class ParquetFileWriter(ExportFileWriter):
+    """
+    Writes a Parquet file with a dictionary-encoded string column for each
+    header. Rows are buffered and written in row groups of ``row_group_size``
+    rows so that only one row group is held in memory at a time.
+
+    Requires ``pyarrow``, which is only imported when a file is opened.
+    """
+    row_group_size = 50000
+
+    def _open(self):
+        import pyarrow
+        import pyarrow.parquet
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._schema = None
+        self._writer = None
+        self._rows = []
+
+    def write_row(self, row):
+        if self._schema is None:
+            # the first row is the headers
+            self._schema = self._pyarrow.schema([
+                (str(header), self._pyarrow.dictionary(self._pyarrow.int32(), self._pyarrow.string()))
+                for header in row
+            ])
+            # pyarrow writes to its own handle on the path so that closing it
+            # doesn't close self._file
+            self._writer = self._parquet.ParquetWriter(self._path, self._schema, use_dictionary=True)
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        num_columns = len(self._schema)
+        columns = [[] for _ in range(num_columns)]
+        for row in self._rows:
+            for index in range(num_columns):
+                columns[index].append(_parquet_string(row[index]) if index < len(row) else None)
+        arrays = [
+            self._pyarrow.array(values, type=self._pyarrow.string()).dictionary_encode()
+            for values in columns
+        ]
+        self._writer.write_table(self._pyarrow.Table.from_arrays(arrays, schema=self._schema))
+        self._rows = []
+
+    def _end_file(self):
+        if self._writer is None:
+            return
+        if self._rows:
+            self._write_row_group()
+        self._writer.close()
+
+
+def _parquet_string(value):
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+
 class PartialHtmlFileWriter(ExportFileWriter):
 
     def _write_from_template(self, context):
@@ -346,6 +409,21 @@ class CsvExportWriter(ZippedExportWriter):
     format = Format.CSV
 
 
+class ParquetExportWriter(ZippedExportWriter):
+    """
+    Writer that creates a zip file containing a Parquet file for each table.
+    Values are written as strings. Missing values (``None``, or cells
+    missing from the end of a short row) are written as nulls, and empty
+    strings are kept as empty strings.
+    """
+    format = Format.PARQUET
+    writer_class = ParquetFileWriter
+    table_file_extension = ".parquet"
+
+    def _write_row(self, sheet_index, row):
+        self.tables[sheet_index].write_row(list(row))
+
+
 class UnzippedCsvExportWriter(OnDiskExportWriter):
     """
     Serve the first table as a csv
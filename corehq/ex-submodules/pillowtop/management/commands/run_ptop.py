@@ -1,7 +1,7 @@
 import sys
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from pillowtop.const import DEFAULT_PROCESSOR_CHUNK_SIZE
 from pillowtop.run_pillowtop import start_pillows, start_pillow
@@ -78,6 +78,16 @@ class Command(BaseCommand):
             help="The batch size for this pillow. Some pillows process changes in bulk, "
             "setting this value to 1 will process each change as it comes in.",
         )
+        parser.add_argument(
+            '--num-workers',
+            action='store',
+            dest='num_workers',
+            default=0,
+            type=int,
+            help="The number of threads to process this pillow's partitions on. Changes are still "
+            "processed in order within each partition. Only pillows with thread-safe processors "
+            "support more than one worker.",
+        )
         parser.add_argument(
             '--dedicated-migration-process',
             action='store_true',
@@ -96,6 +106,7 @@ class Command(BaseCommand):
         process_number = options['process_number']
         processor_chunk_size = options['processor_chunk_size']
         dedicated_migration_process = options['dedicated_migration_process']
+        num_workers = options['num_workers']
         assert 0 <= process_number < num_processes
         assert processor_chunk_size
         if list_all:
@@ -122,6 +133,10 @@ class Command(BaseCommand):
         elif not run_all and not pillow_key and pillow_name:
             pillow = get_pillow_by_name(pillow_name, num_processes=num_processes, process_num=process_number,
             processor_chunk_size=processor_chunk_size, dedicated_migration_process=dedicated_migration_process)
+            if num_workers > 1 and not pillow.supports_parallel_processing:
+                raise CommandError("{} does not support more than one worker".format(pillow_name))
+            if num_workers:
+                pillow.num_workers = num_workers
             start_pillow(pillow)
             sys.exit()
         elif list_checkpoints:
@@ -55,6 +55,10 @@ class PillowBase(metaclass=ABCMeta):
     retry_errors = True
     # this will be the batch size for processors that support batch processing
     processor_chunk_size = 0
+    # number of threads to process partitions on (see ConstructedPillow)
+    num_workers = 0
+    # whether num_workers may be more than 1
+    supports_parallel_processing = False
 
     @abstractproperty
     def pillow_id(self):
@@ -416,6 +420,18 @@ class ChangeEventHandler(metaclass=ABCMeta):
         """
         pass
 
+    def set_processed_offsets_getter(self, getter):
+        """
+        Checkpoint to the offsets returned by ``getter`` instead of the offsets
+        that have been read from the change feed.
+
+        :param getter: function returning a dict of ``(topic, partition): offset``
+        of the last change processed in each partition, or ``None`` to reset
+        """
+        raise NotImplementedError(
+            '{} does not support checkpointing processed offsets'.format(self.__class__.__name__)
+        )
+
 
 class ConstructedPillow(PillowBase):
     """
@@ -425,11 +441,12 @@ class ConstructedPillow(PillowBase):
 
     def __init__(self, name, checkpoint, change_feed, processor, process_num=0,
                  change_processed_event_handler=None, processor_chunk_size=0,
-                 is_dedicated_migration_process=False):
+                 is_dedicated_migration_process=False, num_workers=0):
         self._name = name
         self._checkpoint = checkpoint
         self._change_feed = change_feed
         self.processor_chunk_size = processor_chunk_size
+        self.num_workers = num_workers
         if isinstance(processor, list):
             self.processors = processor
         else:
@@ -459,6 +476,94 @@ class ConstructedPillow(PillowBase):
     def get_change_feed(self):
         return self._change_feed
 
+    @property
+    def supports_parallel_processing(self):
+        return all(processor.thread_safe for processor in self.processors)
+
+    def process_changes(self, since, forever):
+        if self.num_workers > 1:
+            self._process_changes_in_parallel(since, forever)
+        else:
+            super(ConstructedPillow, self).process_changes(since, forever)
+
+    def _process_changes_in_parallel(self, since, forever):
+        """
+        Process changes from several partitions at once on a pool of
+            ``num_workers`` threads.
+
+            Changes are chunked by partition and each partition is processed
+            by a single worker, so changes are processed in order within a
+            partition. The checkpoint is updated to the low-water mark of each
+            partition: the last change processed by its worker, not the last
+            change read from the feed. If the checkpoint has a callback, the
+            pool is drained before the checkpoint is updated so that the
+            callback doesn't run while the workers are processing changes.
+
+            All of the pillow's processors must be ``thread_safe``.
+        """
+        from pillowtop.pillow.workers import PartitionWorkerPool
+
+        if self._change_processed_event_handler is None:
+            raise ValueError('Processing changes in parallel requires a change event handler')
+        if not self.supports_parallel_processing:
+            raise ValueError('{} has processors that are not thread-safe'.format(self.get_name()))
+
+        context = PillowRuntimeContext(changes_seen=0)
+        min_wait_seconds = 30
+        chunk_size = self.processor_chunk_size or 1
+        pool = PartitionWorkerPool(self.get_name(), self.num_workers, self._batch_process_with_error_handling)
+        self._change_processed_event_handler.set_processed_offsets_getter(pool.get_low_water_marks)
+
+        # partial chunk for each partition
+        changes_chunks = defaultdict(list)
+        last_process_time = datetime.utcnow()
+        last_change = None
+
+        def submit_chunks():
+            for partition, chunk in changes_chunks.items():
+                pool.submit(partition, chunk)
+            changes_chunks.clear()
+
+        def update_checkpoint(change):
+            handler = self._change_processed_event_handler
+            if handler.checkpoint_callback and handler.should_update_checkpoint(context):
+                # the callback may change the processors' state (the UCR
+                # processor bootstraps new adapters), so the workers must
+                # not be using them
+                submit_chunks()
+                pool.wait()
+            self._update_checkpoint(change, context)
+
+        reset = False
+        pool.start()
+        try:
+            for change in self.get_change_feed().iter_changes(since=since or None, forever=forever):
+                context.changes_seen += 1
+                if change:
+                    last_change = change
+                    partition = TopicPartition(change.topic, change.partition)
+                    changes_chunks[partition].append(change)
+                    if len(changes_chunks[partition]) == chunk_size:
+                        pool.submit(partition, changes_chunks.pop(partition))
+                    if (datetime.utcnow() - last_process_time).seconds > min_wait_seconds:
+                        last_process_time = datetime.utcnow()
+                        submit_chunks()
+                    update_checkpoint(change)
+                else:
+                    self._update_checkpoint(None, None)
+            submit_chunks()
+            pool.wait()
+            self._update_checkpoint(last_change, context)
+        except PillowtopCheckpointReset:
+            submit_chunks()
+            pool.wait()
+            reset = True
+        finally:
+            pool.stop()
+            self._change_processed_event_handler.set_processed_offsets_getter(None)
+        if reset:
+            self._process_changes_in_parallel(since=self.get_last_checkpoint_sequence(), forever=forever)
+
     def process_change(self, change, serial_only=False):
         processors = self.serial_processors if serial_only else self.processors
         for processor in processors:
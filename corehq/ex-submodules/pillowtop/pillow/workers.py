@@ -0,0 +1,112 @@
+import threading
+from queue import Queue
+
+from django.db import connections
+
+from pillowtop.logger import pillow_logging
+
+# chunks that may be queued for each worker before the feed blocks
+MAX_QUEUED_CHUNKS = 2
+
+_STOP = object()
+
+
+class PartitionWorkerPool(object):
+    """Processes chunks of changes on a pool of threads
+
+    All chunks for a partition are processed by the same worker in the
+    order they were submitted, so changes to a document are still processed
+    in order. Partitions are assigned to workers as they are first seen.
+
+    The low-water mark for a partition is the offset of the last change in
+    the last chunk that was processed for it. Every change in that partition
+    up to and including that offset has been processed. If a chunk fails,
+    the worker stops processing chunks so that its partitions' low-water
+    marks don't move past the failed chunk.
+
+    :param process_chunk: function called with each chunk on a worker thread.
+    The pillow's processors must be safe to use from several threads.
+    """
+
+    def __init__(self, name, num_workers, process_chunk):
+        self.name = name
+        self.num_workers = num_workers
+        self.process_chunk = process_chunk
+        self._queues = [Queue(maxsize=MAX_QUEUED_CHUNKS) for _ in range(num_workers)]
+        self._workers_by_partition = {}
+        self._low_water_marks = {}
+        self._lock = threading.Lock()
+        self._error = None
+        self._threads = []
+
+    def start(self):
+        for num, queue in enumerate(self._queues):
+            thread = threading.Thread(
+                target=self._work, args=(queue,), name='{}-worker-{}'.format(self.name, num)
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, partition, chunk):
+        """Queue a chunk of changes from a single partition
+
+        Blocks while the partition's worker has ``MAX_QUEUED_CHUNKS`` chunks
+        waiting, so that consuming the feed can't get far ahead of processing.
+        """
+        self.raise_error()
+        worker = self._workers_by_partition.get(partition)
+        if worker is None:
+            worker = len(self._workers_by_partition) % self.num_workers
+            self._workers_by_partition[partition] = worker
+        self._queues[worker].put((partition, chunk))
+
+    def get_low_water_marks(self):
+        """
+        :returns: dict of ``(topic, partition): offset``
+        """
+        with self._lock:
+            return dict(self._low_water_marks)
+
+    def wait(self):
+        """Wait until every submitted chunk has been processed"""
+        for queue in self._queues:
+            queue.join()
+        self.raise_error()
+
+    def stop(self):
+        if not self._threads:
+            return
+        for queue in self._queues:
+            queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _work(self, queue):
+        try:
+            while True:
+                item = queue.get()
+                try:
+                    if item is _STOP:
+                        return
+                    if self._error is None:
+                        self._process(*item)
+                finally:
+                    queue.task_done()
+        finally:
+            connections.close_all()
+
+    def _process(self, partition, chunk):
+        try:
+            self.process_chunk(chunk)
+        except Exception as e:
+            pillow_logging.exception("[%s] Error processing chunk for %s", self.name, partition)
+            self._error = e
+        else:
+            with self._lock:
+                self._low_water_marks[partition] = chunk[-1].sequence_id
@@ -1,3 +1,4 @@
+import json
 import math
 import time
 
@@ -8,9 +9,10 @@ from corehq.util.es.elasticsearch import (
     ConnectionError,
     NotFoundError,
     RequestError,
+    SerializationError,
 )
 from corehq.util.es.interface import ElasticsearchInterface
-from corehq.util.metrics import metrics_histogram_timer
+from corehq.util.metrics import metrics_counter, metrics_histogram_timer
 
 from pillowtop.exceptions import BulkDocException, PillowtopIndexingError
 from pillowtop.logger import pillow_logging
@@ -20,7 +22,6 @@ from pillowtop.utils import (
     bulk_fetch_changes_docs,
     ensure_document_exists,
     ensure_matched_revisions,
-    get_errors_with_ids,
 )
 
 from .interface import BulkPillowProcessor, PillowProcessor
@@ -37,6 +38,16 @@ def noop_filter(x):
 RETRY_INTERVAL = 2  # seconds, exponentially increasing
 MAX_RETRIES = 4  # exponential factor threshold for alerts
 
+# bulk request sizes in bytes
+BULK_MIN_BYTES = 256 * 1024
+BULK_MAX_BYTES = 16 * 1024 * 1024
+BULK_INITIAL_BYTES = 2 * 1024 * 1024
+BULK_TARGET_SECONDS = 1
+
+# bulk item statuses worth retrying one at a time. Connection errors
+# are reported by the bulk helper with a status of 'N/A'.
+RETRY_BULK_STATUSES = {429, 500, 502, 503, 504, 'N/A'}
+
 
 class ElasticProcessor(PillowProcessor):
     """Generic processor to transform documents and insert into ES.
@@ -50,6 +61,8 @@ class ElasticProcessor(PillowProcessor):
     Writes to:
       - ES
     """
+    # the ES client is thread-safe and the processor holds no other state
+    thread_safe = True
 
     def __init__(self, elasticsearch, index_info, doc_prep_fn=None, doc_filter_fn=None):
         self.doc_filter_fn = doc_filter_fn or noop_filter
@@ -118,6 +131,9 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
     """Generic processor to transform documents and insert into ES.
 
     Processes one "chunk" of changes at a time (chunk size specified by pillow).
+    Each chunk is sent in one or more bulk requests sized by ``AdaptiveBulkSizer``.
+    Changes that fail with a transient error are returned for the pillow to
+    reprocess serially. Other failures are returned as errors.
 
     Reads from:
       - Usually Couch
@@ -127,9 +143,16 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
       - ES
     """
 
+    def __init__(self, elasticsearch, index_info, doc_prep_fn=None, doc_filter_fn=None):
+        super(BulkElasticProcessor, self).__init__(elasticsearch, index_info, doc_prep_fn, doc_filter_fn)
+        self.bulk_sizer = AdaptiveBulkSizer()
+
     def process_changes_chunk(self, changes_chunk):
+        deleted_changes = [change for change in changes_chunk if change.deleted and change.id]
         with self._datadog_timing('bulk_extract'):
-            bad_changes, docs = bulk_fetch_changes_docs(changes_chunk)
+            bad_changes, docs = bulk_fetch_changes_docs(
+                [change for change in changes_chunk if not (change.deleted and change.id)]
+            )
 
         with self._datadog_timing('bulk_transform'):
             changes_to_process = {
@@ -137,6 +160,7 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
                 for change in changes_chunk
                 if change.document and not self.doc_filter_fn(change.document)
             }
+            changes_to_process.update((change.id, change) for change in deleted_changes)
             retry_changes = list(bad_changes)
 
             error_collector = ErrorCollector()
@@ -144,20 +168,127 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
                 self.index_info, list(changes_to_process.values()), self.doc_transform_fn, error_collector
             )
             error_changes = error_collector.errors
+            serializer = self.elasticsearch.transport.serializer
+            sized_actions = []
+            for action in es_actions:
+                try:
+                    sized_actions.append(_serialize_bulk_action(action, serializer))
+                except SerializationError as e:
+                    error_changes.append((changes_to_process[action['_id']], e))
+
+        with self._datadog_timing('bulk_load'):
+            retry_ids, errors = self._bulk_load(sized_actions)
+        retry_changes.extend(changes_to_process[change_id] for change_id in retry_ids)
+        for change_id, error_msg in errors:
+            error_changes.append((changes_to_process[change_id], BulkDocException(error_msg)))
+        return retry_changes, error_changes
 
-        try:
-            with self._datadog_timing('bulk_load'):
+    def _bulk_load(self, sized_actions):
+        """
+        :returns: tuple(<IDs to retry serially>, <list of (ID, error) that failed>)
+        """
+        retry_ids = []
+        failed = []
+        for actions, num_bytes in self.bulk_sizer.iter_batches(sized_actions):
+            start = time.time()
+            try:
                 _, errors = self.es_interface.bulk_ops(
-                    es_actions, raise_on_error=False, raise_on_exception=False)
-        except Exception as e:
-            pillow_logging.exception("[%s] ES bulk load error")
-            error_changes.extend([
-                (change, e) for change in changes_to_process.values()
-            ])
+                    actions, chunk_size=len(actions), raise_on_error=False, raise_on_exception=False)
+            except Exception:
+                pillow_logging.exception("[%s] ES bulk load error", self.index_info.alias)
+                retry_ids.extend(action['_id'] for action in actions)
+                self.bulk_sizer.record(num_bytes, time.time() - start, throttled=True)
+                continue
+
+            throttled = False
+            for change_id, status, error in _get_bulk_errors(errors):
+                if status in RETRY_BULK_STATUSES:
+                    throttled = throttled or status == 429
+                    retry_ids.append(change_id)
+                else:
+                    failed.append((change_id, error))
+            self.bulk_sizer.record(num_bytes, time.time() - start, throttled)
+
+        metrics_counter('commcare.change_feed.es_bulk.retried', len(retry_ids),
+                        tags={'index': self.index_info.alias})
+        return retry_ids, failed
+
+
+class AdaptiveBulkSizer(object):
+    """Splits bulk actions into requests of up to ``max_request_bytes``
+
+    The request size is adjusted after every request so that requests take
+    about ``target_seconds`` at the throughput ES has recently shown, and is
+    halved when ES rejects items because it is overloaded.
+    """
+
+    def __init__(self, initial_bytes=BULK_INITIAL_BYTES, min_bytes=BULK_MIN_BYTES,
+                 max_bytes=BULK_MAX_BYTES, target_seconds=BULK_TARGET_SECONDS):
+        self.max_request_bytes = initial_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.target_seconds = target_seconds
+
+    def iter_batches(self, sized_actions):
+        """
+        :param sized_actions: list of ``(action, size_in_bytes)``
+        :returns: iterator of ``(actions, size_in_bytes)``. Batches are split
+        lazily, so adjustments apply to the rest of the actions.
+        """
+        batch = []
+        batch_bytes = 0
+        for action, num_bytes in sized_actions:
+            if batch and batch_bytes + num_bytes > self.max_request_bytes:
+                yield batch, batch_bytes
+                batch = []
+                batch_bytes = 0
+            batch.append(action)
+            batch_bytes += num_bytes
+        if batch:
+            yield batch, batch_bytes
+
+    def record(self, num_bytes, seconds, throttled=False):
+        current = self.max_request_bytes
+        if throttled:
+            new = current / 2
+        elif seconds > self.target_seconds or num_bytes >= current / 2:
+            # small requests are dominated by overhead so don't grow from them
+            new = num_bytes / max(seconds, 0.001) * self.target_seconds
+            new = min(max(new, current / 2), current * 2)
         else:
-            for change_id, error_msg in get_errors_with_ids(errors):
-                error_changes.append((changes_to_process[change_id], BulkDocException(error_msg)))
-        return retry_changes, error_changes
+            return
+        self.max_request_bytes = int(min(max(new, self.min_bytes), self.max_bytes))
+
+
+def _serialize_bulk_action(action, serializer):
+    """
+    :param serializer: the ES client's serializer, which the source would
+    otherwise be serialized with when the request is sent.
+    :returns: tuple(<action with its source serialized>, <approximate size in bytes>)
+    """
+    size = len(json.dumps({key: value for key, value in action.items() if key != '_source'}))
+    source = action.get('_source')
+    if isinstance(source, dict):
+        # Field [_id] is a metadata field and cannot be added inside a document
+        source = serializer.dumps({key: value for key, value in source.items() if key != '_id'})
+        action = dict(action, _source=source)
+        size += len(source.encode('utf-8'))
+    return action, size
+
+
+def _get_bulk_errors(errors):
+    """
+    :returns: list of ``(doc_id, status, error)`` for failed items,
+    ignoring deletes of docs that are not in the index
+    """
+    bulk_errors = []
+    for item in errors:
+        for op_type, result in item.items():
+            status = result.get('status')
+            if op_type == 'delete' and status == 404:
+                continue
+            bulk_errors.append((result['_id'], status, result.get('error')))
+    return bulk_errors
 
 
 def send_to_elasticsearch(index_info, doc_type, doc_id, es_getter, name, data=None,
@@ -3,6 +3,9 @@ from abc import ABCMeta, abstractmethod
 
 class PillowProcessor(metaclass=ABCMeta):
     supports_batch_processing = False
+    # whether changes may be processed on several threads at once
+    # (see ConstructedPillow.num_workers)
+    thread_safe = False
 
     @abstractmethod
     def process_change(self, change):
@@ -1,4 +1,7 @@
+import json
 import uuid
+from datetime import datetime
+from decimal import Decimal
 
 from django.test import SimpleTestCase, TestCase
 
@@ -6,11 +9,13 @@ from mock import Mock, patch
 from six.moves import range
 
 from casexml.apps.case.signals import case_post_save
+from corehq.util.es.elasticsearch import elasticsearch
 from corehq.util.es.interface import ElasticsearchInterface
+from pillowtop.dao.mock import MockDocumentStore
 from pillowtop.es_utils import initialize_index_and_mapping
 from pillowtop.feed.interface import Change, ChangeMeta
 from pillowtop.pillow.interface import PillowBase
-from pillowtop.processors.elastic import BulkElasticProcessor
+from pillowtop.processors.elastic import AdaptiveBulkSizer, BulkElasticProcessor
 from pillowtop.tests.utils import TEST_INDEX_INFO
 from pillowtop.utils import bulk_fetch_changes_docs, get_errors_with_ids
 
@@ -53,6 +58,120 @@ class BulkTest(SimpleTestCase):
         self.assertEqual([(1, 'e1'), (2, 'e2')], errors)
 
 
+class AdaptiveBulkSizerTest(SimpleTestCase):
+
+    def _sizer(self):
+        return AdaptiveBulkSizer(initial_bytes=100, min_bytes=10, max_bytes=1000, target_seconds=1)
+
+    def test_iter_batches(self):
+        sizer = self._sizer()
+        sized_actions = [(i, 40) for i in range(5)]
+        self.assertEqual(
+            list(sizer.iter_batches(sized_actions)),
+            [([0, 1], 80), ([2, 3], 80), ([4], 40)]
+        )
+
+    def test_oversized_action(self):
+        sizer = self._sizer()
+        self.assertEqual(list(sizer.iter_batches([(0, 500), (1, 10)])), [([0], 500), ([1], 10)])
+
+    def test_grow_when_fast(self):
+        sizer = self._sizer()
+        sizer.record(80, 0.1)
+        self.assertEqual(sizer.max_request_bytes, 200)
+
+    def test_shrink_when_slow(self):
+        sizer = self._sizer()
+        sizer.record(100, 4)
+        self.assertEqual(sizer.max_request_bytes, 50)
+
+    def test_throttled(self):
+        sizer = self._sizer()
+        sizer.record(100, 0.1, throttled=True)
+        self.assertEqual(sizer.max_request_bytes, 50)
+
+    def test_small_request_ignored(self):
+        sizer = self._sizer()
+        sizer.record(10, 0.01)
+        self.assertEqual(sizer.max_request_bytes, 100)
+
+    def test_limits(self):
+        sizer = self._sizer()
+        for _ in range(10):
+            sizer.record(sizer.max_request_bytes, 0.01)
+        self.assertEqual(sizer.max_request_bytes, 1000)
+        for _ in range(10):
+            sizer.record(sizer.max_request_bytes, 0.01, throttled=True)
+        self.assertEqual(sizer.max_request_bytes, 10)
+
+
+class BulkElasticProcessorTest(SimpleTestCase):
+
+    def _changes(self, doc_ids, deleted=False):
+        return [
+            Change(
+                id=doc_id,
+                sequence_id=None,
+                document={'_id': doc_id, 'doc_type': 'CommCareCase'},
+                deleted=deleted,
+                document_store=MockDocumentStore(),
+                metadata=ChangeMeta(
+                    document_id=doc_id, domain='domain', data_source_type='sql', data_source_name='case-sql'
+                )
+            )
+            for doc_id in doc_ids
+        ]
+
+    def _process(self, changes, bulk_ops_result):
+        es = Mock()
+        es.transport.serializer = elasticsearch.serializer.JSONSerializer()
+        processor = BulkElasticProcessor(es, TEST_INDEX_INFO)
+        with patch.object(ElasticsearchInterface, 'bulk_ops', **bulk_ops_result) as bulk_ops:
+            retry, errors = processor.process_changes_chunk(changes)
+        return bulk_ops, [change.id for change in retry], [error[0].id for error in errors]
+
+    def test_transient_item_errors_retried(self):
+        changes = self._changes(['a', 'b', 'c', 'd'])
+        _, retry, errors = self._process(changes, {'return_value': (0, [
+            {'index': {'_id': 'a', 'status': 429, 'error': 'es_rejected_execution_exception'}},
+            {'index': {'_id': 'b', 'status': 'N/A', 'error': 'ConnectionTimeout'}},
+            {'index': {'_id': 'c', 'status': 400, 'error': 'mapper_parsing_exception'}},
+        ])})
+        self.assertEqual(retry, ['a', 'b'])
+        self.assertEqual(errors, ['c'])
+
+    def test_request_failure_retried(self):
+        changes = self._changes(['a', 'b'])
+        _, retry, errors = self._process(changes, {'side_effect': Exception('connection refused')})
+        self.assertEqual(retry, ['a', 'b'])
+        self.assertEqual(errors, [])
+
+    def test_deletes(self):
+        changes = self._changes(['a', 'b'], deleted=True)
+        bulk_ops, retry, errors = self._process(changes, {'return_value': (1, [
+            {'delete': {'_id': 'b', 'status': 404}},
+        ])})
+        [actions] = [call[0][0] for call in bulk_ops.call_args_list]
+        self.assertEqual([(action['_op_type'], action['_id']) for action in actions],
+                         [('delete', 'a'), ('delete', 'b')])
+        self.assertEqual((retry, errors), ([], []))
+
+    def test_source_serialized_by_es_client(self):
+        changes = self._changes(['a'])
+        changes[0].document.update({
+            'amount': Decimal('1.5'),
+            'modified_on': datetime(2021, 1, 2, 3, 4, 5),
+        })
+        bulk_ops, retry, errors = self._process(changes, {'return_value': (1, [])})
+        [[action]] = [call[0][0] for call in bulk_ops.call_args_list]
+        self.assertEqual(json.loads(action['_source']), {
+            'doc_type': 'CommCareCase',
+            'amount': 1.5,
+            'modified_on': '2021-01-02T03:04:05',
+        })
+        self.assertEqual((retry, errors), ([], []))
+
+
 @use_sql_backend
 @es_test
 class TestBulkDocOperations(TestCase):
@@ -0,0 +1,164 @@
+import threading
+from collections import defaultdict
+
+from django.test import SimpleTestCase
+
+from kafka.common import TopicPartition
+from mock import Mock
+
+from pillowtop.feed.interface import Change, ChangeMeta
+from pillowtop.feed.mock import RandomChangeFeed
+from pillowtop.pillow.interface import ConstructedPillow
+from pillowtop.pillow.workers import PartitionWorkerPool
+from pillowtop.processors import PillowProcessor
+
+
+def _change(topic, partition, offset):
+    doc_id = '{}-{}-{}'.format(topic, partition, offset)
+    return Change(
+        id=doc_id,
+        sequence_id=offset,
+        metadata=ChangeMeta(document_id=doc_id, data_source_type='test', data_source_name='test'),
+        topic=topic,
+        partition=partition,
+    )
+
+
+class PartitionWorkerPoolTest(SimpleTestCase):
+
+    def setUp(self):
+        self.processed = defaultdict(list)
+        self.threads = defaultdict(set)
+
+    def _process_chunk(self, chunk):
+        for change in chunk:
+            self.processed[change.partition].append(change.sequence_id)
+            self.threads[change.partition].add(threading.current_thread().name)
+
+    def test_partition_order(self):
+        pool = PartitionWorkerPool('test', 2, self._process_chunk)
+        pool.start()
+        try:
+            for offset in range(0, 20, 2):
+                for partition in range(3):
+                    pool.submit(TopicPartition('case', partition), [
+                        _change('case', partition, offset),
+                        _change('case', partition, offset + 1),
+                    ])
+            pool.wait()
+        finally:
+            pool.stop()
+
+        for partition in range(3):
+            self.assertEqual(self.processed[partition], list(range(20)))
+            self.assertEqual(len(self.threads[partition]), 1)
+        self.assertEqual(pool.get_low_water_marks(), {
+            TopicPartition('case', partition): 19 for partition in range(3)
+        })
+
+    def test_failed_chunk(self):
+        def process_chunk(chunk):
+            if chunk[0].sequence_id == 2:
+                raise ValueError('bad chunk')
+            self._process_chunk(chunk)
+
+        pool = PartitionWorkerPool('test', 1, process_chunk)
+        pool.start()
+        try:
+            for offset in range(4):
+                pool.submit(TopicPartition('case', 0), [_change('case', 0, offset)])
+            with self.assertRaises(ValueError):
+                pool.wait()
+        finally:
+            pool.stop()
+
+        self.assertEqual(self.processed[0], [0, 1])
+        # later chunks are not processed so the low-water mark stays below the failed chunk
+        self.assertEqual(pool.get_low_water_marks(), {TopicPartition('case', 0): 1})
+
+
+class PartitionedChangeFeed(RandomChangeFeed):
+
+    def __init__(self, changes):
+        super(PartitionedChangeFeed, self).__init__(len(changes))
+        self.changes = changes
+
+    def iter_changes(self, since, forever):
+        return iter(self.changes)
+
+
+class RecordingProcessor(PillowProcessor):
+    thread_safe = True
+
+    def __init__(self):
+        self.processed = defaultdict(list)
+
+    def process_change(self, change):
+        self.processed[change.partition].append(change.sequence_id)
+
+
+class ParallelPillowTest(SimpleTestCase):
+
+    def _get_pillow(self, changes, processor, handler):
+        return ConstructedPillow(
+            name='test-parallel',
+            checkpoint=Mock(),
+            change_feed=PartitionedChangeFeed(changes),
+            processor=processor,
+            change_processed_event_handler=handler,
+            processor_chunk_size=4,
+            num_workers=2,
+        )
+
+    def test_process_changes_in_parallel(self):
+        changes = [_change('case', offset % 3, offset) for offset in range(30)]
+        processor = RecordingProcessor()
+        handler = Mock()
+        handler.should_update_checkpoint.return_value = False
+        handler.update_checkpoint.return_value = False
+        pillow = self._get_pillow(changes, processor, handler)
+        getters = []
+        handler.set_processed_offsets_getter.side_effect = getters.append
+
+        pillow.process_changes(since=None, forever=False)
+
+        for partition in range(3):
+            self.assertEqual(processor.processed[partition], list(range(partition, 30, 3)))
+        low_water_marks = getters[0]()
+        self.assertEqual(low_water_marks, {
+            TopicPartition('case', 0): 27,
+            TopicPartition('case', 1): 28,
+            TopicPartition('case', 2): 29,
+        })
+        self.assertEqual(getters[-1], None)
+
+    def test_checkpoint_callback_runs_after_workers_finish(self):
+        changes = [_change('case', offset % 3, offset) for offset in range(30)]
+        processor = RecordingProcessor()
+        handler = Mock()
+        handler.should_update_checkpoint.side_effect = lambda context: context.changes_seen >= 10
+        changes_processed = []
+
+        def update_checkpoint(change, context):
+            if handler.should_update_checkpoint(context):
+                context.reset()
+                num_processed = sum(len(offsets) for offsets in processor.processed.values())
+                changes_processed.append((change.sequence_id + 1, num_processed))
+            return False
+
+        handler.update_checkpoint.side_effect = update_checkpoint
+        pillow = self._get_pillow(changes, processor, handler)
+
+        pillow.process_changes(since=None, forever=False)
+
+        # every change read from the feed had been processed when the checkpoint was updated
+        self.assertEqual(changes_processed, [(10, 10), (20, 20), (30, 30)])
+
+    def test_processors_must_be_thread_safe(self):
+        processor = RecordingProcessor()
+        processor.thread_safe = False
+        pillow = self._get_pillow([_change('case', 0, 0)], processor, Mock())
+
+        self.assertFalse(pillow.supports_parallel_processing)
+        with self.assertRaises(ValueError):
+            pillow.process_changes(since=None, forever=False)
@@ -1,4 +1,5 @@
 from casexml.apps.case.exceptions import IllegalCaseId
+from dimagi.utils.couch import acquire_lock
 from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
 from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
 from corehq.form_processor.casedb_base import AbstractCaseDbCache
@@ -24,6 +25,14 @@ class CaseDbCacheSQL(AbstractCaseDbCache):
     def _iter_cases(self, case_ids):
         return iter(CaseAccessorSQL.get_cases(case_ids))
 
+    def lock_cases(self, case_ids):
+        for case_id in sorted(set(case_ids) - self.locked_case_ids):
+            lock = CommCareCaseSQL.get_obj_lock_by_id(case_id)
+            lock = acquire_lock(lock, degrade_gracefully=True, blocking=True)
+            if lock is not None:
+                self.locks.append(lock)
+            self.locked_case_ids.add(case_id)
+
     def get_cases_for_saving(self, now):
         cases = self.get_changed()
 
@@ -11,7 +11,7 @@ from itertools import groupby
 from uuid import UUID
 
 from django.conf import settings
-from django.db import InternalError, transaction, router, DatabaseError
+from django.db import InternalError, transaction, router, DatabaseError, connections
 from django.db.models import F, Q
 from django.db.models.expressions import Value
 from django.db.models.functions import Concat, Greatest
@@ -58,6 +58,7 @@ from corehq.form_processor.utils.sql import (
     fetchone_as_namedtuple,
 )
 from corehq.sql_db.config import plproxy_config
+from corehq.sql_db.fanout import fan_out_by_db_partition, fan_out_to_all_db_partitions
 from corehq.sql_db.util import (
     estimate_row_count,
     get_db_aliases_for_partitioned_query,
@@ -106,6 +107,10 @@ def iter_all_ids_chunked(reindex_accessor):
             docs = list(reindex_accessor.get_doc_ids(db_alias, last_doc_pk=last_id))
 
 
+# the low 32 bits of the little-endian 64 bit hash, to match Postgres
+_unpack_hash = struct.Struct("<I").unpack_from
+
+
 class ShardAccessor(object):
     hash_key = b'\x00' * 16
 
@@ -166,6 +171,26 @@ class ShardAccessor(object):
         # convert 64 bit hash to 32 bit to match Postgres
         return hash_long & 0xffffffff
 
+    @staticmethod
+    def hash_doc_id_list_python(doc_ids):
+        """Hash a list of doc ids
+
+        Equivalent to calling `hash_doc_id_python` for each doc id, but
+        avoids its per-call overhead.
+
+        :returns: List of hashes in the same order as ``doc_ids``
+        """
+        siphash24 = csiphash.siphash24
+        hash_key = ShardAccessor.hash_key
+        return [
+            _unpack_hash(siphash24(hash_key, (
+                doc_id.encode('utf-8') if isinstance(doc_id, str)
+                else doc_id.bytes if isinstance(doc_id, UUID)
+                else doc_id
+            )))[0]
+            for doc_id in doc_ids
+        ]
+
     @staticmethod
     def get_database_for_docs(doc_ids):
         """
@@ -178,7 +203,8 @@ class ShardAccessor(object):
     def get_docs_by_database(doc_ids):
         """
         :param doc_ids:
-        :return: Dict of ``Django DB alias -> doc_id``
+        :return: Dict of ``Django DB alias -> [doc_id, ...]``. Doc ids
+        are listed in the order they were given.
         """
         return ShardAccessor._get_doc_database_map(doc_ids, by_doc=False)
 
@@ -186,23 +212,20 @@ class ShardAccessor(object):
     def _get_doc_database_map(doc_ids, by_doc=True):
         assert settings.USE_PARTITIONED_DATABASE, """Partitioned DB not in use,
         consider using `corehq.sql_db.get_db_alias_for_partitioned_doc` instead"""
+        dbnames = plproxy_config.get_django_dbnames_by_shard()
+        part_mask = len(dbnames) - 1
+        doc_ids = list(dict.fromkeys(doc_ids))
+        hashes = ShardAccessor.hash_doc_id_list_python(doc_ids)
+        if by_doc:
+            return {doc_id: dbnames[hash_ & part_mask] for doc_id, hash_ in zip(doc_ids, hashes)}
+
         databases = {}
-        shard_map = plproxy_config.get_django_shard_map()
-        part_mask = len(shard_map) - 1
-        for chunk in chunked(doc_ids, 100):
-            hashes = ShardAccessor.hash_doc_ids_python(chunk)
-            shards = {doc_id: hash_ & part_mask for doc_id, hash_ in hashes.items()}
-            for doc_id, shard_id in shards.items():
-                dbname = shard_map[shard_id].django_dbname
-                if by_doc:
-                    databases.update({
-                        doc_id: dbname
-                    })
-                else:
-                    if dbname not in databases:
-                        databases[dbname] = [doc_id]
-                    else:
-                        databases[dbname].append(doc_id)
+        for doc_id, hash_ in zip(doc_ids, hashes):
+            dbname = dbnames[hash_ & part_mask]
+            if dbname not in databases:
+                databases[dbname] = [doc_id]
+            else:
+                databases[dbname].append(doc_id)
         return databases
 
     @staticmethod
@@ -787,22 +810,30 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             raise CaseNotFound
 
     @staticmethod
-    def get_cases(case_ids, ordered=False, prefetched_indices=None):
+    def get_cases(case_ids, ordered=False, prefetched_indices=None, fan_out=False):
         """
         :param case_ids: List of case IDs to fetch
         :param ordered: Return cases in the same order as ``case_ids``
         :param prefetched_indices: If not None this must be a dict containing ALL the indices for ALL the
                                     cases being fetched. If the list does not contain indices for a case
                                     then an empty list will be attached to the case preventing further DB lookup.
+        :param fan_out: Query the shard databases concurrently rather than through PL/Proxy
         :return: List of cases
         """
         assert isinstance(case_ids, list)
         if not case_ids:
             return []
-        cases = list(CommCareCaseSQL.objects.plproxy_raw('SELECT * from get_cases_by_id(%s)', [case_ids]))
-
-        if ordered:
-            _sort_with_id_list(cases, case_ids, 'case_id')
+        if fan_out:
+            def get_cases_on_db(db, db_case_ids):
+                return CommCareCaseSQL.objects.raw(
+                    'SELECT * from get_cases_by_id(%s)', [db_case_ids], using=db)
+
+            cases = fan_out_by_db_partition(
+                case_ids, get_cases_on_db, doc_id_attr='case_id' if ordered else None)
+        else:
+            cases = list(CommCareCaseSQL.objects.plproxy_raw('SELECT * from get_cases_by_id(%s)', [case_ids]))
+            if ordered:
+                _sort_with_id_list(cases, case_ids, 'case_id')
 
         if prefetched_indices is not None:
             cases_by_id = {case.case_id: case for case in cases}
@@ -889,6 +920,48 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             results = fetchall_as_namedtuple(cursor)
             return [result.referenced_id for result in results]
 
+    @staticmethod
+    def get_reverse_indexed_case_ids(domain, case_ids, identifier):
+        """
+        Given a list of case ids, gets the ids of the cases that aren't deleted
+        and index any of them with ``identifier``. Only ids are loaded, with
+        one query per database for each chunk of ``case_ids``.
+        """
+        assert isinstance(case_ids, list)
+        result = set()
+        for db_name in get_db_aliases_for_partitioned_query():
+            for case_ids_chunk in chunked(case_ids, 10000):
+                result.update(CommCareCaseIndexSQL.objects
+                              .using(db_name)
+                              .filter(domain=domain, referenced_id__in=list(case_ids_chunk),
+                                      identifier=identifier, case__deleted=False)
+                              .values_list('case_id', flat=True))
+        return list(result)
+
+    @staticmethod
+    def prefetch_indices_and_referenced_cases(domain, cases):
+        """
+        Fetch the indices of all ``cases`` and the cases they reference in two
+        queries and attach them to the cases, so that ``case.indices`` and
+        ``index.referenced_case`` don't query the database for each case.
+        Referenced cases that are not found are looked up (and raise
+        ``CaseNotFound``) as usual.
+        """
+        cases_by_id = {case.case_id: case for case in cases}
+        if not cases_by_id:
+            return
+        indices = sorted(CommCareCaseIndexSQL.objects.plproxy_raw(
+            'SELECT * FROM get_multiple_cases_indices(%s, %s)',
+            [domain, list(cases_by_id)]
+        ), key=operator.attrgetter('case_id'))
+        _attach_prefetch_models(cases_by_id, indices, 'case_id', 'cached_indices')
+
+        referenced_ids = list({index.referenced_id for index in indices if index.referenced_id})
+        referenced_cases = {case.case_id: case for case in CaseAccessorSQL.get_cases(referenced_ids)}
+        for index in indices:
+            if index.referenced_id in referenced_cases:
+                index.cached_referenced_case = referenced_cases[index.referenced_id]
+
     @staticmethod
     def get_reverse_indexed_cases(domain, case_ids, case_types=None, is_closed=None):
         assert isinstance(case_ids, list)
@@ -1078,13 +1151,20 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             return [result.case_id for result in results]
 
     @staticmethod
-    def get_related_indices(domain, case_ids, exclude_indices):
+    def get_related_indices(domain, case_ids, exclude_indices, fan_out=False):
+        """
+        :param fan_out: Query the shard databases concurrently rather than through PL/Proxy
+        """
         assert isinstance(case_ids, list), case_ids
         if not case_ids:
             return []
-        return list(CommCareCaseIndexSQL.objects.plproxy_raw(
-            'SELECT * FROM get_related_indices(%s, %s, %s)',
-            [domain, case_ids, list(exclude_indices)]))
+        query = 'SELECT * FROM get_related_indices(%s, %s, %s)'
+        params = [domain, case_ids, list(exclude_indices)]
+        if fan_out:
+            # extension indices may be on any shard, so all shards are queried for all cases
+            return fan_out_to_all_db_partitions(
+                lambda db: CommCareCaseIndexSQL.objects.raw(query, params, using=db))
+        return list(CommCareCaseIndexSQL.objects.plproxy_raw(query, params))
 
     @staticmethod
     def get_closed_and_deleted_ids(domain, case_ids):
@@ -1099,15 +1179,23 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             return list(fetchall_as_namedtuple(cursor))
 
     @staticmethod
-    def get_modified_case_ids(accessor, case_ids, sync_log):
+    def get_modified_case_ids(accessor, case_ids, sync_log, fan_out=False):
+        """
+        :param fan_out: Query the shard databases concurrently rather than through PL/Proxy
+        """
         assert isinstance(case_ids, list), case_ids
         if not case_ids:
             return []
+        query = 'SELECT case_id FROM get_modified_case_ids(%s, %s, %s, %s)'
+        if fan_out:
+            def get_modified_case_ids_on_db(db, db_case_ids):
+                with connections[db].cursor() as cursor:
+                    cursor.execute(query, [accessor.domain, db_case_ids, sync_log.date, sync_log._id])
+                    return [result.case_id for result in fetchall_as_namedtuple(cursor)]
+
+            return fan_out_by_db_partition(case_ids, get_modified_case_ids_on_db)
         with CommCareCaseSQL.get_plproxy_cursor(readonly=True) as cursor:
-            cursor.execute(
-                'SELECT case_id FROM get_modified_case_ids(%s, %s, %s, %s)',
-                [accessor.domain, case_ids, sync_log.date, sync_log._id]
-            )
+            cursor.execute(query, [accessor.domain, case_ids, sync_log.date, sync_log._id])
             results = fetchall_as_namedtuple(cursor)
             return [result.case_id for result in results]
 
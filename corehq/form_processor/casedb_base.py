@@ -51,6 +51,8 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
         if self.lock and not self.wrap:
             raise ValueError('Currently locking only supports explicitly wrapping cases!')
         self.locks = []
+        # ids of cases locked with ``lock_cases``, which are not locked again by ``get``
+        self.locked_case_ids = set()
         self._changed = set()
         # this is used to allow casedb to be re-entrant. Each new context pushes the parent context locks
         # onto this stack and restores them when the context exits
@@ -65,9 +67,10 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
             self.cache = {}
 
     def __enter__(self):
-        if self.locks:
-            self.lock_stack.append(self.locks)
+        if self.locks or self.locked_case_ids:
+            self.lock_stack.append((self.locks, self.locked_case_ids))
             self.locks = []
+            self.locked_case_ids = set(self.locked_case_ids)
 
         return self
 
@@ -78,7 +81,9 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
         self.locks = []
 
         if self.lock_stack:
-            self.locks = self.lock_stack.pop()
+            self.locks, self.locked_case_ids = self.lock_stack.pop()
+        else:
+            self.locked_case_ids = set()
 
     @abstractmethod
     def _validate_case(self, case):
@@ -92,7 +97,8 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
         if case_id in self.cache:
             return self.cache[case_id]
 
-        case, lock = self.processor_interface.get_case_with_lock(case_id, self.lock, self.wrap)
+        should_lock = self.lock and case_id not in self.locked_case_ids
+        case, lock = self.processor_interface.get_case_with_lock(case_id, should_lock, self.wrap)
         if lock:
             self.locks.append(lock)
 
@@ -124,6 +130,23 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
     def _iter_cases(self, case_ids):
         pass
 
+    def lock_cases(self, case_ids):
+        """
+        Locks a set of IDs in bulk, whether or not the cases exist yet. The locks are released
+        when the current context exits, and the cases are not locked again when they are fetched
+        with `get` in the meantime. Locks are acquired in order of case ID to avoid deadlocks.
+        """
+        raise NotImplementedError
+
+    def discard(self, case_ids):
+        """
+        Removes a set of IDs from the cache, so that they are fetched from the database when they
+        are next needed. Their locks are kept.
+        """
+        for case_id in case_ids:
+            self.cache.pop(case_id, None)
+            self._changed.discard(case_id)
+
     def mark_changed(self, case):
         assert self.cache.get(case.case_id) is case
         self._changed.add(_get_id_for_case(case))
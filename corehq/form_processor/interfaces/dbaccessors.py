@@ -407,6 +407,15 @@ class CaseAccessors(object):
         else:
             return CaseAccessorCouch
 
+    @property
+    @memoized
+    def _fan_out_kwargs(self):
+        """Options for bulk reads that can query shards concurrently"""
+        from corehq.toggles import CASE_SHARD_FAN_OUT
+        if should_use_sql_backend(self.domain) and CASE_SHARD_FAN_OUT.enabled(self.domain):
+            return {'fan_out': True}
+        return {}
+
     def get_case(self, case_id):
         if not case_id:
             raise CaseNotFound
@@ -414,7 +423,7 @@ class CaseAccessors(object):
 
     def get_cases(self, case_ids, ordered=False, prefetched_indices=None):
         return self.db_accessor.get_cases(
-            case_ids, ordered=ordered, prefetched_indices=prefetched_indices)
+            case_ids, ordered=ordered, prefetched_indices=prefetched_indices, **self._fan_out_kwargs)
 
     def iter_cases(self, case_ids):
         for chunk in chunked(case_ids, 100):
@@ -458,7 +467,8 @@ class CaseAccessors(object):
         the format ``'<index.case_id> <index.identifier>'``.
         :returns: A list of CommCareCaseIndex-like objects.
         """
-        return self.db_accessor.get_related_indices(self.domain, case_ids, exclude_indices)
+        return self.db_accessor.get_related_indices(
+            self.domain, case_ids, exclude_indices, **self._fan_out_kwargs)
 
     def get_closed_and_deleted_ids(self, case_ids):
         """Get the subset of given list of case ids that are closed or deleted
@@ -471,7 +481,7 @@ class CaseAccessors(object):
         """Get the subset of given list of case ids that have been modified
         since sync date/log id
         """
-        return self.db_accessor.get_modified_case_ids(self, case_ids, sync_log)
+        return self.db_accessor.get_modified_case_ids(self, case_ids, sync_log, **self._fan_out_kwargs)
 
     def get_case_ids_modified_with_owner_since(self, owner_id, reference_date):
         return self.db_accessor.get_case_ids_modified_with_owner_since(self.domain, owner_id, reference_date)
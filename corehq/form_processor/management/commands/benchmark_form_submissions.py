@@ -0,0 +1,61 @@
+import os
+import re
+import statistics
+import uuid
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from corehq.form_processor.submission_post import SubmissionPost
+from corehq.util.timer import TimingContext
+
+INSTANCE_ID_RE = re.compile(br'(<(?:[\w-]+:)?instanceID>)[^<]*(</(?:[\w-]+:)?instanceID>)')
+
+
+class Command(BaseCommand):
+    help = ("Replay the form submissions in a directory of XML files against SubmissionPost.run "
+            "and report the time spent in each stage of processing. Each replayed form is given "
+            "a new instance id, so that it is processed as a new form rather than a duplicate.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('directory', help="Directory of form submission XML files")
+        parser.add_argument('--repeat', type=int, default=1, help="Number of times to replay each form")
+
+    def handle(self, domain, directory, repeat, **options):
+        paths = sorted(
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith('.xml')
+        )
+        if not paths:
+            raise CommandError("No .xml files found in {}".format(directory))
+
+        durations = defaultdict(list)
+        for i in range(repeat):
+            for path in paths:
+                with open(path, 'rb') as f:
+                    instance = _with_new_instance_id(f.read())
+                timing_context = TimingContext('submission')
+                with timing_context:
+                    result = SubmissionPost(instance=instance, domain=domain, timing_context=timing_context).run()
+                if result.xform is None or result.xform.is_error:
+                    print("{} was not processed successfully: {}".format(path, result.submission_type))
+                for timer in timing_context.to_list():
+                    durations[timer.full_name].append(timer.duration)
+
+        print("Replayed {} forms {} time(s)".format(len(paths), repeat))
+        print("{:<60} {:>7} {:>10} {:>10} {:>10}".format('stage', 'count', 'mean (s)', 'median (s)', 'max (s)'))
+        for name, stage_durations in durations.items():
+            print("{:<60} {:>7} {:>10.4f} {:>10.4f} {:>10.4f}".format(
+                name,
+                len(stage_durations),
+                statistics.mean(stage_durations),
+                statistics.median(stage_durations),
+                max(stage_durations),
+            ))
+
+
+def _with_new_instance_id(instance):
+    new_id = uuid.uuid4().hex.encode('utf-8')
+    return INSTANCE_ID_RE.sub(lambda match: match.group(1) + new_id + match.group(2), instance, count=1)
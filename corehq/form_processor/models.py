@@ -396,6 +396,10 @@ class XFormInstanceSQL(PartitionedModel, models.Model, RedisLockableMixIn, Attac
     # for compatability with corehq.blobs.mixin.DeferredBlobMixin interface
     persistent_blobs = None
 
+    # set on newly submitted forms that were parsed with
+    # corehq.form_processor.utils.xform.parse_xform
+    parsed_xform = None
+
     # form meta properties
     time_end = models.DateTimeField(null=True, blank=True)
     time_start = models.DateTimeField(null=True, blank=True)
@@ -503,11 +507,15 @@ class XFormInstanceSQL(PartitionedModel, models.Model, RedisLockableMixIn, Attac
         from couchforms import XMLSyntaxError
         from .utils import convert_xform_to_json, adjust_datetimes
         from corehq.form_processor.utils.metadata import scrub_form_meta
-        xml = self.get_xml()
-        try:
-            form_json = convert_xform_to_json(xml)
-        except XMLSyntaxError:
-            return {}
+        if self.parsed_xform is not None:
+            # a new submission, whose XML has already been parsed
+            form_json = self.parsed_xform.form_json
+        else:
+            xml = self.get_xml()
+            try:
+                form_json = convert_xform_to_json(xml)
+            except XMLSyntaxError:
+                return {}
         # we can assume all sql domains are new timezone domains
         with force_phone_timezones_should_be_processed():
             adjust_datetimes(form_json)
@@ -1201,6 +1209,10 @@ class CommCareCaseIndexSQL(PartitionedModel, models.Model, SaveStateMixin):
         :return: referenced case
         """
         from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
+        cached_referenced_case = 'cached_referenced_case'
+        if hasattr(self, cached_referenced_case):
+            return getattr(self, cached_referenced_case)
+
         return CaseAccessorSQL.get_case(self.referenced_id)
 
     @property
@@ -6,11 +6,13 @@ from couchdbkit import ResourceNotFound
 from ddtrace import tracer
 from django.conf import settings
 
+from corehq import toggles
 from corehq.form_processor.exceptions import MissingFormXml, NotAllowed
 from corehq.form_processor.interfaces.dbaccessors import FormAccessors
 from corehq.form_processor.interfaces.processor import FormProcessorInterface
 from corehq.form_processor.models import Attachment
 from corehq.form_processor.utils import convert_xform_to_json, adjust_datetimes
+from corehq.form_processor.utils.xform import parse_xform
 from corehq.util.soft_assert.api import soft_assert
 from couchforms import XMLSyntaxError
 from couchforms.exceptions import MissingXMLNSError
@@ -98,13 +100,25 @@ def _create_new_xform(domain, instance_xml, attachments=None, auth_context=None)
     interface = FormProcessorInterface(domain)
 
     assert attachments is not None
-    form_data = convert_xform_to_json(instance_xml)
+    parsed_xform = None
+    if (
+        isinstance(instance_xml, bytes) and interface.use_sql_domain
+        and toggles.SINGLE_PASS_FORM_PARSING.enabled(domain)
+    ):
+        parsed_xform = parse_xform(instance_xml)
+        form_data = parsed_xform.form_json
+    else:
+        form_data = convert_xform_to_json(instance_xml)
     if not form_data.get('@xmlns'):
         raise MissingXMLNSError("Form is missing a required field: XMLNS")
 
-    adjust_datetimes(form_data)
+    if parsed_xform is None:
+        # the json of a parsed form is the new form's form_data, which adjusts it
+        adjust_datetimes(form_data)
 
     xform = interface.new_xform(form_data)
+    if parsed_xform is not None:
+        xform.parsed_xform = parsed_xform
     xform.domain = domain
     xform.auth_context = auth_context
 
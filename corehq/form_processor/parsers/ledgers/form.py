@@ -123,7 +123,6 @@ def get_all_stock_report_helpers_from_form(xform):
     Given an instance of an AbstractXFormInstance, extract the ledger actions and convert
     them to StockReportHelper objects.
     """
-    form_xml = xform.get_xml_element()
     commtrack_node_names = ('{%s}balance' % COMMTRACK_REPORT_XMLNS,
                             '{%s}transfer' % COMMTRACK_REPORT_XMLNS)
 
@@ -138,7 +137,14 @@ def get_all_stock_report_helpers_from_form(xform):
                 for e in _extract_ledger_nodes_from_xml(child):
                     yield e
 
-    for elem in _extract_ledger_nodes_from_xml(form_xml):
+    parsed_xform = getattr(xform, 'parsed_xform', None)
+    if parsed_xform is not None:
+        # the ledger blocks were found when the form was parsed
+        ledger_nodes = parsed_xform.ledger_elements
+    else:
+        ledger_nodes = _extract_ledger_nodes_from_xml(xform.get_xml_element())
+
+    for elem in ledger_nodes:
         report_type, ledger_json = convert_xml_to_json(elem, last_xmlns=COMMTRACK_REPORT_XMLNS)
         if ledger_json.get('@date'):
             try:
@@ -0,0 +1,92 @@
+"""
+Process a batch of form submissions with a shared case cache
+
+The forms in a batch are processed one after another, in order, as they
+would be if they were submitted separately: each form is saved on its
+own, gets its own OpenRosa response, and duplicates and errors are
+handled in the same way. What the forms share is the case cache. The
+forms are processed in windows of a few forms. The cases that a window's
+forms update are locked and loaded together, instead of one at a time as
+each form is processed, and cases updated by one form are passed on to
+the next form in the window without being loaded again. Cases are only
+locked for as long as a window takes to process, so that the locks don't
+expire while they are held, and other submissions are not held up for
+the whole batch.
+"""
+from dimagi.utils.chunked import chunked
+
+from casexml.apps.case.xform import get_case_updates
+
+from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
+from corehq.form_processor.interfaces.processor import FormProcessorInterface
+from corehq.form_processor.submission_post import SubmissionPost
+from corehq.form_processor.utils import convert_xform_to_json
+
+MAX_BATCH_SIZE = 100
+FORMS_PER_LOCK = 10
+
+
+def process_submission_batch(domain, instances, **submission_kwargs):
+    """Process form submissions in order, sharing a case cache
+
+    :param instances: The XML of each form.
+    :param submission_kwargs: Passed to ``SubmissionPost`` for each form.
+    :returns: A ``FormProcessingResult`` for each form, in order.
+    Exceptions are raised as they are for a single submission, and the
+    forms after the form that raised are not processed.
+    """
+    interface = FormProcessorInterface(domain)
+    if not interface.use_sql_domain:
+        return [
+            SubmissionPost(instance=instance, domain=domain, **submission_kwargs).run()
+            for instance in instances
+        ]
+
+    case_ids_by_form = [_get_case_ids(instance) for instance in instances]
+    results = []
+    case_db = interface.casedb_cache(
+        domain=domain, lock=True, deleted_ok=True, load_src="form_submission_batch",
+    )
+    for window in chunked(zip(instances, case_ids_by_form), FORMS_PER_LOCK):
+        window_case_ids = set().union(*(case_ids for instance, case_ids in window))
+        with case_db:
+            case_db.lock_cases(window_case_ids)
+            _load_cases(case_db, window_case_ids)
+            for instance, case_ids in window:
+                results.append(_process_form(domain, instance, case_ids, case_db, submission_kwargs))
+        # the cases are unlocked now, so other submissions may change them
+        case_db.discard(list(case_db.cache))
+    return results
+
+
+def _process_form(domain, instance, case_ids, case_db, submission_kwargs):
+    result = SubmissionPost(
+        instance=instance, domain=domain, case_db=case_db, **submission_kwargs
+    ).run()
+    # cases locked by the form itself were unlocked when it finished
+    stale_case_ids = set(case_db.cache) - case_db.locked_case_ids
+    if result.submission_type != 'normal' or case_db.get_changed():
+        # the form's cases may have been changed in memory and not saved,
+        # or saved by reprocessing a duplicate with a case cache of its own
+        stale_case_ids.update(case_ids)
+        stale_case_ids.update(case.case_id for case in case_db.get_changed())
+    case_db.discard(stale_case_ids)
+    _load_cases(case_db, stale_case_ids & case_db.locked_case_ids)
+    return result
+
+
+def _get_case_ids(instance):
+    try:
+        return {update.id for update in get_case_updates(convert_xform_to_json(instance))}
+    except Exception:
+        # the form's cases are loaded when it is processed, which will handle the error
+        return set()
+
+
+def _load_cases(case_db, case_ids):
+    if not case_ids:
+        return
+    # cases in other domains are left for the forms that update them to reject
+    for case in CaseAccessorSQL.get_cases(list(case_ids)):
+        if case.domain == case_db.domain:
+            case_db.set(case.case_id, case)
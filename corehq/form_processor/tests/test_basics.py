@@ -22,7 +22,9 @@ from corehq.form_processor.interfaces.dbaccessors import CaseAccessors, FormAcce
 from corehq.form_processor.interfaces.processor import FormProcessorInterface, XFormQuestionValueIterator
 from corehq.form_processor.tests.utils import FormProcessorTestUtils, use_sql_backend
 from corehq.form_processor.backends.couch.update_strategy import coerce_to_datetime
-from corehq.form_processor.utils import get_simple_form_xml
+from corehq.form_processor.utils import convert_xform_to_json, get_simple_form_xml
+from corehq.form_processor.utils.xform import FormSubmissionBuilder, TestFormMetadata
+from corehq.util.test_utils import flag_enabled
 
 DOMAIN = 'fundamentals'
 
@@ -514,6 +516,40 @@ def _submit_case_block(create, case_id, **kwargs):
     )
 
 
+@use_sql_backend
+class SinglePassParsingTests(TestCase):
+    domain = 'single-pass-parsing'
+
+    def tearDown(self):
+        FormProcessorTestUtils.delete_all_sql_forms(self.domain)
+        FormProcessorTestUtils.delete_all_sql_cases(self.domain)
+        super(SinglePassParsingTests, self).tearDown()
+
+    @flag_enabled('SINGLE_PASS_FORM_PARSING')
+    def test_form_xml_parsed_once(self):
+        case_id = uuid.uuid4().hex
+        xml = FormSubmissionBuilder(
+            form_id=uuid.uuid4().hex,
+            metadata=TestFormMetadata(domain=self.domain),
+            case_blocks=[CaseBlock(case_id, create=True, update={'prop': 'value'})],
+        ).as_xml_string()
+        with patch('corehq.form_processor.parsers.form.convert_xform_to_json',
+                   wraps=convert_xform_to_json) as convert_on_submit, \
+                patch('corehq.form_processor.utils.convert_xform_to_json',
+                      wraps=convert_xform_to_json) as convert_form_data:
+            result = submit_form_locally(xml.encode('utf-8'), self.domain)
+
+        convert_on_submit.assert_not_called()
+        convert_form_data.assert_not_called()
+        self.assertIsNotNone(result.xform.parsed_xform)
+        # the same as the form data that is parsed from the saved form's XML
+        form = FormAccessors(self.domain).get_form(result.xform.form_id)
+        self.assertEqual(result.xform.form_data, form.form_data)
+        self.assertEqual(result.xform.metadata.timeStart, datetime(2013, 4, 19, 16, 53, 2))
+        case = CaseAccessors(self.domain).get_case(case_id)
+        self.assertEqual(case.get_case_property('prop'), 'value')
+
+
 class IteratorTests(TestCase):
     def test_iterator(self):
         i = XFormQuestionValueIterator("/data/a-group/repeat_group[2]/question_id")
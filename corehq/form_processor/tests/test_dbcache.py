@@ -1,5 +1,6 @@
 import uuid
 from django.test import TestCase, SimpleTestCase
+from mock import patch
 from casexml.apps.case.exceptions import IllegalCaseId
 from casexml.apps.case.mock import CaseBlock
 from casexml.apps.case.models import CommCareCase
@@ -139,6 +140,26 @@ class CaseDbCacheNoDbTest(SimpleTestCase):
             # invalid
             CaseDbCacheSQL(domain='some-domain', wrap=False)
 
+    @patch('corehq.form_processor.backends.sql.casedb.acquire_lock', side_effect=lambda lock, *a, **k: lock)
+    @patch('corehq.form_processor.backends.sql.casedb.CommCareCaseSQL.get_obj_lock_by_id')
+    def test_sql_lock_cases(self, get_obj_lock_by_id, acquire_lock):
+        case_db = CaseDbCacheSQL(domain='some-domain', lock=True)
+        with patch.object(case_db.processor_interface, 'get_case_with_lock',
+                          return_value=(None, None)) as get_case_with_lock, \
+                patch('corehq.form_processor.casedb_base.release_lock') as release_lock:
+            with case_db:
+                case_db.lock_cases(['b', 'a', 'b'])
+                with case_db:
+                    case_db.get('a')
+                    case_db.get('c')
+                self.assertEqual(release_lock.call_count, 0)
+            self.assertEqual(release_lock.call_count, 2)
+
+        self.assertEqual([c[0][0] for c in get_obj_lock_by_id.call_args_list], ['a', 'b'])
+        self.assertEqual(get_case_with_lock.call_args_list[0][0], ('a', False, True))
+        self.assertEqual(get_case_with_lock.call_args_list[1][0], ('c', True, True))
+        self.assertEqual(case_db.locked_case_ids, set())
+
 
 def _make_some_cases(howmany, domain='dbcache-test'):
     ids = [uuid.uuid4().hex for i in range(howmany)]
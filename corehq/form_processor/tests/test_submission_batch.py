@@ -0,0 +1,94 @@
+import uuid
+
+from django.test import TestCase
+
+from mock import patch
+
+from casexml.apps.case.mock import CaseBlock
+
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.form_processor.models import CommCareCaseSQL
+from corehq.form_processor.submission_batch import process_submission_batch
+from corehq.form_processor.tests.utils import FormProcessorTestUtils, use_sql_backend
+from corehq.form_processor.utils.xform import FormSubmissionBuilder, TestFormMetadata
+
+DOMAIN = 'submission-batch-test'
+OTHER_DOMAIN = 'submission-batch-test-other'
+
+
+@use_sql_backend
+class SubmissionBatchTest(TestCase):
+
+    def tearDown(self):
+        for domain in [DOMAIN, OTHER_DOMAIN]:
+            FormProcessorTestUtils.delete_all_sql_forms(domain)
+            FormProcessorTestUtils.delete_all_sql_cases(domain)
+        super(SubmissionBatchTest, self).tearDown()
+
+    def _get_form_xml(self, case_id, form_id=None, domain=DOMAIN, **case_kwargs):
+        return FormSubmissionBuilder(
+            form_id=form_id or uuid.uuid4().hex,
+            metadata=TestFormMetadata(domain=domain),
+            case_blocks=[CaseBlock(case_id, **case_kwargs)],
+        ).as_xml_string()
+
+    def test_forms_are_processed_in_order(self):
+        case_id = uuid.uuid4().hex
+        results = process_submission_batch(DOMAIN, [
+            self._get_form_xml(case_id, create=True, update={'count': '1'}),
+            self._get_form_xml(case_id, update={'count': '2'}),
+            self._get_form_xml(case_id, update={'count': '3'}),
+        ])
+
+        self.assertEqual([result.submission_type for result in results], ['normal'] * 3)
+        case = CaseAccessors(DOMAIN).get_case(case_id)
+        self.assertEqual(case.get_case_property('count'), '3')
+        self.assertEqual(case.xform_ids, [result.xform.form_id for result in results])
+
+    @patch('corehq.form_processor.submission_batch.FORMS_PER_LOCK', 2)
+    def test_cases_are_locked_for_each_window(self):
+        case_id = uuid.uuid4().hex
+        with patch('corehq.form_processor.backends.sql.casedb.CommCareCaseSQL.get_obj_lock_by_id',
+                   wraps=CommCareCaseSQL.get_obj_lock_by_id) as get_obj_lock_by_id:
+            results = process_submission_batch(DOMAIN, [
+                self._get_form_xml(case_id, create=True, update={'count': '1'}),
+                self._get_form_xml(case_id, update={'count': '2'}),
+                self._get_form_xml(case_id, update={'count': '3'}),
+            ])
+
+        self.assertEqual([result.submission_type for result in results], ['normal'] * 3)
+        self.assertEqual(get_obj_lock_by_id.call_count, 2)
+        case = CaseAccessors(DOMAIN).get_case(case_id)
+        self.assertEqual(case.get_case_property('count'), '3')
+        self.assertEqual(len(case.xform_ids), 3)
+
+    def test_duplicate_form(self):
+        case_id = uuid.uuid4().hex
+        form_xml = self._get_form_xml(case_id, create=True, update={'count': '1'})
+        results = process_submission_batch(DOMAIN, [
+            form_xml,
+            form_xml,
+            self._get_form_xml(case_id, update={'count': '2'}),
+        ])
+
+        self.assertEqual([result.submission_type for result in results], ['normal', 'duplicate', 'normal'])
+        case = CaseAccessors(DOMAIN).get_case(case_id)
+        self.assertEqual(case.get_case_property('count'), '2')
+        self.assertEqual(len(case.xform_ids), 2)
+
+    def test_error_does_not_stop_batch(self):
+        other_case_id = uuid.uuid4().hex
+        process_submission_batch(OTHER_DOMAIN, [
+            self._get_form_xml(other_case_id, domain=OTHER_DOMAIN, create=True),
+        ])
+        case_id = uuid.uuid4().hex
+        results = process_submission_batch(DOMAIN, [
+            self._get_form_xml(other_case_id, update={'count': '1'}),
+            self._get_form_xml(case_id, create=True, update={'count': '1'}),
+        ])
+
+        self.assertEqual([result.submission_type for result in results], ['error', 'normal'])
+        self.assertTrue(results[0].xform.is_error)
+        self.assertEqual(CaseAccessors(DOMAIN).get_case(case_id).get_case_property('count'), '1')
+        other_case = CaseAccessors(OTHER_DOMAIN).get_case(other_case_id)
+        self.assertIsNone(other_case.get_case_property('count'))
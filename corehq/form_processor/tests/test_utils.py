@@ -1,9 +1,18 @@
 from collections import OrderedDict
+from types import SimpleNamespace
 
 from django.test import SimpleTestCase
 
+from casexml.apps.case.xform import extract_case_blocks
 from corehq.form_processor.exceptions import XFormQuestionValueNotFound
-from corehq.form_processor.utils.xform import build_form_xml_from_property_dict, get_node, RE_DATETIME_MATCH
+from corehq.form_processor.utils.xform import (
+    RE_DATETIME_MATCH,
+    build_form_xml_from_property_dict,
+    convert_xform_to_json,
+    get_node,
+    parse_xform,
+)
+from couchforms import XMLSyntaxError
 from lxml import etree
 
 
@@ -97,3 +106,63 @@ class TestDateTimeRegexMatch(SimpleTestCase):
         ]
         for candidate, expected in cases:
             self.assertEqual(bool(RE_DATETIME_MATCH.match(candidate)), expected, candidate)
+
+
+PARSE_XFORM_XML = b"""<?xml version='1.0' ?>
+<data xmlns="http://openrosa.org/formdesigner/parse-test" xmlns:jrm="http://dev.commcarehq.org/jr/xforms">
+    <visit>
+        <case xmlns="http://commcarehq.org/case/transaction/v2" case_id="a" date_modified="2020-01-01">
+            <update><status>one</status></update>
+        </case>
+    </visit>
+    <other>text</other>
+    <visit>
+        <case xmlns="http://commcarehq.org/case/transaction/v2" case_id="b" date_modified="2020-01-01">
+            <update><status>two</status></update>
+        </case>
+        <case xmlns="http://commcarehq.org/case/transaction/v2" case_id="a" date_modified="2020-01-01">
+            <update><status>three</status></update>
+        </case>
+    </visit>
+    <case xmlns="http://commcarehq.org/case/transaction/v2" case_id="c" date_modified="2020-01-01"/>
+    <case xmlns="http://commcarehq.org/case/transaction/v2"/>
+    <log_subreport xmlns="http://code.javarosa.org/devicereport">
+        <case case_id="d"/>
+    </log_subreport>
+    <balance xmlns="http://commcarehq.org/ledger/v1" entity-id="a" section-id="stock" date="2020-01-01">
+        <entry id="p1" quantity="5"/>
+    </balance>
+    <item>
+        <transfer xmlns="http://commcarehq.org/ledger/v1" src="a" dest="b" section-id="stock">
+            <entry id="p2" quantity="1"/>
+        </transfer>
+    </item>
+    <n1:meta xmlns:n1="http://openrosa.org/jr/xforms">
+        <n1:instanceID>parse-test</n1:instanceID>
+        <n2:appVersion xmlns:n2="http://commcarehq.org/xforms">2.0</n2:appVersion>
+    </n1:meta>
+</data>"""
+
+
+class ParseXFormTest(SimpleTestCase):
+
+    def test_form_json(self):
+        self.assertEqual(parse_xform(PARSE_XFORM_XML).form_json, convert_xform_to_json(PARSE_XFORM_XML))
+
+    def test_case_blocks(self):
+        parsed_xform = parse_xform(PARSE_XFORM_XML)
+        form = SimpleNamespace(form_data=parsed_xform.form_json, parsed_xform=parsed_xform)
+        expected = extract_case_blocks(convert_xform_to_json(PARSE_XFORM_XML), include_path=True)
+        self.assertEqual(extract_case_blocks(form, include_path=True), expected)
+        self.assertEqual([block['@case_id'] for block in expected], ['a', 'b', 'a', 'c'])
+
+    def test_ledger_elements(self):
+        parsed_xform = parse_xform(PARSE_XFORM_XML)
+        self.assertEqual(
+            [etree.QName(element).localname for element in parsed_xform.ledger_elements],
+            ['balance', 'transfer']
+        )
+
+    def test_invalid_xml(self):
+        with self.assertRaises(XMLSyntaxError):
+            parse_xform(b'<data><unclosed></data>')
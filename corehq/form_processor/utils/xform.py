@@ -1,4 +1,5 @@
 from datetime import datetime
+from io import BytesIO
 from lxml import etree
 import re
 
@@ -6,10 +7,14 @@ import iso8601
 import pytz
 
 import xml2json
+from xml2json.lib import convert_xml_to_json
 from corehq.apps.tzmigration.api import phone_timezones_should_be_processed
 from corehq.form_processor.interfaces.processor import XFormQuestionValueIterator
 from corehq.form_processor.models import Attachment
 from corehq.form_processor.exceptions import XFormQuestionValueNotFound
+from casexml.apps.case.const import CASE_TAG
+from casexml.apps.stock.const import COMMTRACK_REPORT_XMLNS
+from couchforms.const import DEVICE_LOG_XMLNS
 from dimagi.ext import jsonobject
 from dimagi.utils.parsing import json_format_datetime
 
@@ -197,6 +202,113 @@ def convert_xform_to_json(xml_string):
     return json_form
 
 
+LEDGER_TAGS = ('{%s}balance' % COMMTRACK_REPORT_XMLNS, '{%s}transfer' % COMMTRACK_REPORT_XMLNS)
+
+
+class ParsedXForm(object):
+    """
+    The result of ``parse_xform``
+
+    :attr form_json: The form json, as returned by ``convert_xform_to_json``.
+    :attr ledger_elements: The form's ledger blocks (balance and transfer
+    elements), in document order.
+    """
+
+    def __init__(self, form_json, ledger_elements, case_locations):
+        self.form_json = form_json
+        self.ledger_elements = ledger_elements
+        self._case_locations = case_locations
+
+    def iter_case_values(self, form_json):
+        """
+        Yield ``(path, value)`` for each "case" key in ``form_json``
+        outside of device reports, in the order they are found by walking
+        the json, where ``value`` is a case block or a list of case blocks.
+
+        :param form_json: The form json that the form was parsed to. It
+        may have been changed in place since (e.g. by ``adjust_datetimes``).
+        """
+        for steps in self._case_locations:
+            node = form_json
+            for name, index in steps:
+                node = node[name]
+                if isinstance(node, list):
+                    node = node[index]
+            yield [name for name, index in steps], node[CASE_TAG]
+
+    def __reduce__(self):
+        # lxml elements can't be pickled, so pickled forms lose their parsed xml
+        return (type(None), ())
+
+
+def parse_xform(xml_bytes):
+    """
+    Parse a form submission with one walk over its XML
+
+    Returns the form json, as ``convert_xform_to_json`` does, along with
+    the form's ledger elements and the locations of its case blocks in the
+    form json, so that they don't need to be found by parsing the XML
+    again or walking the form json.
+
+    :returns: ParsedXForm
+    """
+    class Frame(object):
+        def __init__(self, steps, sort_key, search_cases):
+            self.steps = steps
+            self.sort_key = sort_key
+            self.search_cases = search_cases
+            self.child_counts = {}
+            self.child_key_order = {}
+
+    ledger_elements = []
+    case_locations = {}
+    stack = []
+    root = None
+    in_ledger = 0
+    try:
+        for event, element in etree.iterparse(BytesIO(xml_bytes), events=('start', 'end')):
+            if event == 'end':
+                if element.tag in LEDGER_TAGS and len(stack) > 1:
+                    in_ledger -= 1
+                stack.pop()
+                continue
+
+            qname = etree.QName(element)
+            search_cases = qname.namespace != DEVICE_LOG_XMLNS
+            if not stack:
+                root = element
+                stack.append(Frame([], (), search_cases))
+                continue
+
+            parent = stack[-1]
+            name = qname.localname
+            index = parent.child_counts.get(name, 0)
+            parent.child_counts[name] = index + 1
+            # json keys are in the order they first appear in the XML
+            key_order = parent.child_key_order.setdefault(name, len(parent.child_key_order))
+            steps = parent.steps + [(name, index)]
+            sort_key = parent.sort_key + ((key_order, index),)
+            search_cases = search_cases and parent.search_cases
+            if name == CASE_TAG and search_cases:
+                # repeated case blocks share a json key, which is walked once
+                case_locations.setdefault(tuple(parent.steps), parent.sort_key + ((key_order, -1),))
+                search_cases = False
+            stack.append(Frame(steps, sort_key, search_cases))
+
+            if element.tag in LEDGER_TAGS:
+                if not in_ledger:
+                    ledger_elements.append(element)
+                in_ledger += 1
+    except etree.XMLSyntaxError as e:
+        from couchforms import XMLSyntaxError
+        raise XMLSyntaxError('Invalid XML: %s' % e)
+
+    name, form_json = convert_xml_to_json(root)
+    form_json['#type'] = name
+    locations = sorted(case_locations, key=case_locations.get)
+    return ParsedXForm(form_json, ledger_elements, locations)
+
+
 def adjust_text_to_datetime(text, process_timezones=None):
     matching_datetime = iso8601.parse_date(text)
     if process_timezones or phone_timezones_should_be_processed():
@@ -14,6 +14,9 @@ from corehq.apps.case_search.const import (
 )
 from corehq.apps.case_search.exceptions import CaseSearchNotEnabledException
 from corehq.apps.case_search.models import case_search_enabled_domains
+from corehq.apps.case_search.result_cache import (
+    invalidate_search_results_for_changes,
+)
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
@@ -45,7 +48,7 @@ from pillowtop.checkpoints.manager import (
 from pillowtop.es_utils import initialize_index_and_mapping
 from pillowtop.feed.interface import Change
 from pillowtop.pillow.interface import ConstructedPillow
-from pillowtop.processors.elastic import ElasticProcessor
+from pillowtop.processors.elastic import BulkElasticProcessor
 from pillowtop.reindexer.change_providers.case import (
     get_domain_case_change_provider,
 )
@@ -97,10 +100,24 @@ def _get_case_properties(doc_dict):
     return base_case_properties + dynamic_mapping
 
 
-class CaseSearchPillowProcessor(ElasticProcessor):
+class CaseSearchPillowProcessor(BulkElasticProcessor):
 
     def process_change(self, change):
         assert isinstance(change, Change)
+        if self._needs_search_index(change):
+            super(CaseSearchPillowProcessor, self).process_change(change)
+            invalidate_search_results_for_changes([change])
+
+    def process_changes_chunk(self, changes_chunk):
+        changes_chunk = [change for change in changes_chunk if self._needs_search_index(change)]
+        if not changes_chunk:
+            return [], []
+        result = super(CaseSearchPillowProcessor, self).process_changes_chunk(changes_chunk)
+        invalidate_search_results_for_changes(changes_chunk)
+        return result
+
+    @staticmethod
+    def _needs_search_index(change):
         if change.metadata is not None:
             # Comes from KafkaChangeFeed (i.e. running pillowtop)
             domain = change.metadata.domain
@@ -108,8 +125,7 @@ class CaseSearchPillowProcessor(ElasticProcessor):
             # comes from ChangeProvider (i.e reindexing)
             domain = change.get_document()['domain']
 
-        if domain and domain_needs_search_index(domain):
-            super(CaseSearchPillowProcessor, self).process_change(change)
+        return domain and domain_needs_search_index(domain)
 
 
 def get_case_search_processor():
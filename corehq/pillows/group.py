@@ -7,7 +7,7 @@ from corehq.util.doc_processor.couch import CouchDocumentProvider
 from .mappings.group_mapping import GROUP_INDEX_INFO
 from pillowtop.checkpoints.manager import get_checkpoint_for_elasticsearch_pillow
 from pillowtop.pillow.interface import ConstructedPillow
-from pillowtop.processors import ElasticProcessor
+from pillowtop.processors.elastic import BulkElasticProcessor
 from pillowtop.reindexer.reindexer import ResumableBulkElasticPillowReindexer, ReindexerFactory
 
 
@@ -21,7 +21,7 @@ def get_group_to_elasticsearch_processor():
     Writes to:
       - GroupES index
     """
-    return ElasticProcessor(
+    return BulkElasticProcessor(
         elasticsearch=get_es_new(),
         index_info=GROUP_INDEX_INFO,
     )
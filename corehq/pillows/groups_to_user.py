@@ -7,6 +7,7 @@ from corehq.apps.es import UserES
 from corehq.pillows.mappings.user_mapping import USER_INDEX, USER_INDEX_INFO
 from corehq.pillows.group import get_group_to_elasticsearch_processor
 from pillowtop.checkpoints.manager import KafkaPillowCheckpoint, get_checkpoint_for_elasticsearch_pillow
+from pillowtop.const import DEFAULT_PROCESSOR_CHUNK_SIZE
 from pillowtop.pillow.interface import ConstructedPillow
 from pillowtop.processors import PillowProcessor
 from pillowtop.reindexer.change_providers.couch import CouchViewChangeProvider
@@ -55,7 +56,8 @@ def get_group_to_user_pillow(pillow_id='GroupToUserPillow', num_processes=1, pro
     )
 
 
-def get_group_pillow(pillow_id='group-pillow', num_processes=1, process_num=0, **kwargs):
+def get_group_pillow(pillow_id='group-pillow', num_processes=1, process_num=0,
+                     processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE, **kwargs):
     """Group pillow
 
     Processors:
@@ -79,6 +81,7 @@ def get_group_pillow(pillow_id='group-pillow', num_processes=1, process_num=0, *
         change_processed_event_handler=KafkaCheckpointEventHandler(
             checkpoint=checkpoint, checkpoint_frequency=10, change_feed=change_feed
         ),
+        processor_chunk_size=processor_chunk_size,
     )
 
 
@@ -9,6 +9,7 @@ from corehq.pillows.mappings.reportcase_mapping import REPORT_CASE_INDEX_INFO
 from pillowtop.checkpoints.manager import get_checkpoint_for_elasticsearch_pillow
 from pillowtop.pillow.interface import ConstructedPillow
 from pillowtop.processors import ElasticProcessor
+from pillowtop.processors.elastic import BulkElasticProcessor
 from pillowtop.reindexer.change_providers.case import get_domain_case_change_provider
 from pillowtop.reindexer.reindexer import ElasticPillowReindexer, ReindexerFactory
 from .base import convert_property_dict
@@ -33,7 +34,7 @@ def transform_case_to_report_es(doc_dict):
 
 
 def get_case_to_report_es_processor():
-    return ElasticProcessor(
+    return BulkElasticProcessor(
         elasticsearch=get_es_new(),
         index_info=REPORT_CASE_INDEX_INFO,
         doc_prep_fn=transform_case_to_report_es,
@@ -107,6 +107,11 @@ class PlProxyConfig(object):
         db_shards = self._get_django_shards()
         return {shard.shard_id: shard for shard in db_shards}
 
+    @memoized
+    def get_django_dbnames_by_shard(self):
+        """Returns a tuple of the Django DB alias of each shard, indexed by shard ID"""
+        return tuple(shard.django_dbname for shard in self._get_django_shards())
+
     @classmethod
     def from_settings(cls):
         assert settings.USE_PARTITIONED_DATABASE
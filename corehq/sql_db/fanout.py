@@ -0,0 +1,105 @@
+"""
+Concurrent queries across partitioned databases
+
+Queries that touch several shards are normally made through PL/Proxy or on
+one shard database after another, so they take the sum of the shards'
+query times. The functions here run the per-database queries on a bounded
+thread pool instead, so they take about as long as the slowest shard.
+
+Django connections are per thread. The thread pool is shared by all the
+queries made by a process, so that its threads keep their connections
+open from one query to the next. Queries read from the shards' standbys
+when the calling thread reads from PL/Proxy standbys (see
+``read_from_plproxy_standbys``). Queries are run sequentially in the
+calling thread when it is inside a transaction on one of the databases,
+so that they see the transaction's changes (and so that tests, which run
+in transactions, see their data).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from corehq.sql_db.routers import allow_read_from_plproxy_standby
+from corehq.sql_db.util import get_db_aliases_for_partitioned_query, select_plproxy_db_for_read
+
+MAX_WORKERS = 8
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def fan_out_by_db_partition(doc_ids, query_fn, doc_id_attr=None, max_workers=MAX_WORKERS):
+    """Query the database of each doc id, querying databases concurrently
+
+    :param doc_ids: List of partition values (e.g. case ids).
+    :param query_fn: Called with `(db_alias, doc_ids)` for each
+    database with the doc ids that are stored in it. Returns an
+    iterable of results.
+    :param doc_id_attr: Name of the doc id attribute of the results.
+    If given, results are returned in the order of `doc_ids`.
+    Otherwise they are grouped by database.
+    :returns: List of results.
+    """
+    jobs = [(db_alias, (db_doc_ids,)) for db_alias, db_doc_ids in _get_docs_by_database(doc_ids)]
+    results = _run_queries(query_fn, jobs, max_workers)
+    if doc_id_attr is not None:
+        positions = {}
+        for position, doc_id in enumerate(doc_ids):
+            positions.setdefault(doc_id, position)
+        results.sort(key=lambda result: positions.get(getattr(result, doc_id_attr), len(positions)))
+    return results
+
+
+def fan_out_to_all_db_partitions(query_fn, *args, max_workers=MAX_WORKERS):
+    """Run the same query on all partitioned databases concurrently
+
+    :param query_fn: Called with `(db_alias, *args)` for each database.
+    Returns an iterable of results.
+    :returns: List of results, grouped by database.
+    """
+    jobs = [(db_alias, args) for db_alias in get_db_aliases_for_partitioned_query()]
+    return _run_queries(query_fn, jobs, max_workers)
+
+
+def _get_docs_by_database(doc_ids):
+    if not doc_ids:
+        return []
+    if settings.USE_PARTITIONED_DATABASE:
+        from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
+        return list(ShardAccessor.get_docs_by_database(doc_ids).items())
+    return [(DEFAULT_DB_ALIAS, list(doc_ids))]
+
+
+def _run_queries(query_fn, jobs, max_workers):
+    if any(connections[db].in_atomic_block for db, args in jobs):
+        return [result for db, args in jobs for result in query_fn(db, *args)]
+
+    if allow_read_from_plproxy_standby():
+        jobs = [(select_plproxy_db_for_read(db), args) for db, args in jobs]
+    if len(jobs) < 2 or max_workers < 2:
+        return [result for db, args in jobs for result in query_fn(db, *args)]
+
+    executor = _get_executor(max_workers)
+    futures = [executor.submit(_run_query_in_thread, query_fn, db, args) for db, args in jobs]
+    return [result for future in futures for result in future.result()]
+
+
+def _get_executor(max_workers):
+    # threads don't survive a fork, so forked processes get pools of their own
+    key = (os.getpid(), max_workers)
+    with _executors_lock:
+        if key not in _executors:
+            _executors[key] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='shard-fan-out')
+        return _executors[key]
+
+
+def _run_query_in_thread(query_fn, db, args):
+    try:
+        return list(query_fn(db, *args))
+    except Exception:
+        # don't reuse a connection that may be broken for the next query on this thread
+        connections[db].close()
+        raise
@@ -0,0 +1,45 @@
+import timeit
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dimagi.utils.chunked import chunked
+
+from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
+from corehq.sql_db.config import plproxy_config
+
+
+def _get_docs_by_database_per_id(doc_ids):
+    # shard routing as it was done before ShardAccessor.hash_doc_id_list_python
+    databases = {}
+    shard_map = plproxy_config.get_django_shard_map()
+    part_mask = len(shard_map) - 1
+    for chunk in chunked(doc_ids, 100):
+        hashes = ShardAccessor.hash_doc_ids_python(chunk)
+        for doc_id, hash_ in hashes.items():
+            dbname = shard_map[hash_ & part_mask].django_dbname
+            databases.setdefault(dbname, []).append(doc_id)
+    return databases
+
+
+class Command(BaseCommand):
+    help = "Compare the speed of routing doc ids to shards one id at a time and in a batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, default=50000, help="Number of doc ids to route")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, ids, repeat, **options):
+        if not settings.USE_PARTITIONED_DATABASE:
+            raise CommandError("Shard routing requires a partitioned database")
+
+        doc_ids = [uuid.uuid4().hex for i in range(ids)]
+        if _get_docs_by_database_per_id(doc_ids) != ShardAccessor.get_docs_by_database(doc_ids):
+            raise CommandError("Batched routing does not match per-id routing")
+
+        per_id = min(timeit.repeat(lambda: _get_docs_by_database_per_id(doc_ids), number=1, repeat=repeat))
+        batched = min(timeit.repeat(lambda: ShardAccessor.get_docs_by_database(doc_ids), number=1, repeat=repeat))
+        print("Routing {} doc ids (best of {}):".format(ids, repeat))
+        print("  per id:  {:.3f}s".format(per_id))
+        print("  batched: {:.3f}s ({:.1f}x)".format(batched, per_id / batched))
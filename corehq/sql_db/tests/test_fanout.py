@@ -0,0 +1,86 @@
+import threading
+import uuid
+from collections import namedtuple
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from mock import patch
+
+from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
+from corehq.sql_db.config import PlProxyConfig
+from corehq.sql_db.fanout import (
+    MAX_WORKERS,
+    fan_out_by_db_partition,
+    fan_out_to_all_db_partitions,
+)
+
+from .test_partition_config import TEST_DATABASES, TEST_PARTITION_CONFIG
+
+Result = namedtuple('Result', 'doc_id db thread')
+
+DOC_IDS = [uuid.uuid4().hex for i in range(50)]
+
+
+@override_settings(DATABASES=TEST_DATABASES, USE_PARTITIONED_DATABASE=True)
+class TestFanOut(SimpleTestCase):
+
+    def setUp(self):
+        config = PlProxyConfig.from_dict(TEST_PARTITION_CONFIG)
+        for patcher in [
+            patch('corehq.form_processor.backends.sql.dbaccessors.plproxy_config', config),
+            patch('corehq.sql_db.fanout.get_db_aliases_for_partitioned_query', return_value=['db1', 'db2']),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        connections_patcher = patch('corehq.sql_db.fanout.connections')
+        self.connections = connections_patcher.start()
+        self.addCleanup(connections_patcher.stop)
+        self.connections.__getitem__.return_value.in_atomic_block = False
+
+    @staticmethod
+    def query(db, doc_ids):
+        return [Result(doc_id, db, threading.get_ident()) for doc_id in reversed(doc_ids)]
+
+    def test_results_in_requested_order(self):
+        results = fan_out_by_db_partition(DOC_IDS, self.query, doc_id_attr='doc_id')
+        self.assertEqual([result.doc_id for result in results], DOC_IDS)
+        for result in results:
+            self.assertEqual(result.db, ShardAccessor.get_database_for_doc(result.doc_id))
+
+    def test_results_grouped_by_database(self):
+        results = fan_out_by_db_partition(DOC_IDS, self.query)
+        self.assertEqual(sorted(result.doc_id for result in results), sorted(DOC_IDS))
+        self.assertEqual([result.db for result in results], sorted(result.db for result in results))
+
+    def test_queries_run_concurrently(self):
+        results = fan_out_by_db_partition(DOC_IDS, self.query)
+        self.assertNotIn(threading.get_ident(), {result.thread for result in results})
+        self.connections.close_all.assert_not_called()
+
+    def test_threads_reused(self):
+        threads = {result.thread for result in fan_out_by_db_partition(DOC_IDS, self.query)}
+        for i in range(5):
+            threads.update(result.thread for result in fan_out_by_db_partition(DOC_IDS, self.query))
+        self.assertLessEqual(len(threads), MAX_WORKERS)
+
+    def test_queries_read_from_standbys(self):
+        with patch('corehq.sql_db.fanout.allow_read_from_plproxy_standby', return_value=True), \
+                patch('corehq.sql_db.fanout.select_plproxy_db_for_read', side_effect=lambda db: db + '_standby'):
+            results = fan_out_by_db_partition(DOC_IDS, self.query)
+        self.assertEqual({result.db for result in results}, {'db1_standby', 'db2_standby'})
+
+    def test_queries_run_in_transaction(self):
+        self.connections.__getitem__.return_value.in_atomic_block = True
+        results = fan_out_by_db_partition(DOC_IDS, self.query)
+        self.assertEqual({result.thread for result in results}, {threading.get_ident()})
+        self.connections.close_all.assert_not_called()
+
+    def test_no_doc_ids(self):
+        self.assertEqual(fan_out_by_db_partition([], self.query), [])
+
+    def test_fan_out_to_all_db_partitions(self):
+        results = fan_out_to_all_db_partitions(self.query, ['a', 'b'])
+        self.assertEqual([(result.doc_id, result.db) for result in results], [
+            ('b', 'db1'), ('a', 'db1'), ('b', 'db2'), ('a', 'db2'),
+        ])
@@ -0,0 +1,44 @@
+import uuid
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from mock import patch
+
+from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
+from corehq.sql_db.config import PlProxyConfig
+
+from .test_partition_config import TEST_DATABASES, TEST_PARTITION_CONFIG
+
+DOC_IDS = [uuid.uuid4().hex for i in range(500)] + ['', 'ünïcødé', uuid.uuid4()]
+
+
+@override_settings(DATABASES=TEST_DATABASES, USE_PARTITIONED_DATABASE=True)
+class TestShardRouting(SimpleTestCase):
+
+    def setUp(self):
+        config = PlProxyConfig.from_dict(TEST_PARTITION_CONFIG)
+        patcher = patch('corehq.form_processor.backends.sql.dbaccessors.plproxy_config', config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hash_doc_id_list(self):
+        self.assertEqual(
+            ShardAccessor.hash_doc_id_list_python(DOC_IDS),
+            [ShardAccessor.hash_doc_id_python(doc_id) for doc_id in DOC_IDS],
+        )
+
+    def test_get_database_for_docs(self):
+        self.assertEqual(
+            ShardAccessor.get_database_for_docs(DOC_IDS),
+            {doc_id: ShardAccessor.get_database_for_doc(doc_id) for doc_id in DOC_IDS},
+        )
+
+    def test_get_docs_by_database(self):
+        docs_by_database = ShardAccessor.get_docs_by_database(DOC_IDS + DOC_IDS[:10])
+        self.assertEqual(set(docs_by_database), {'db1', 'db2'})
+        for dbname, doc_ids in docs_by_database.items():
+            self.assertEqual(doc_ids, [
+                doc_id for doc_id in DOC_IDS
+                if ShardAccessor.get_database_for_doc(doc_id) == dbname
+            ])
@@ -688,6 +688,39 @@ UCR_SUM_WHEN_TEMPLATES = StaticToggle(
     help_link='https://commcare-hq.readthedocs.io/ucr.html#sumwhencolumn-and-sumwhentemplatecolumn',
 )
 
+COMPILED_UCR_EXPRESSIONS = StaticToggle(
+    'compiled_ucr_expressions',
+    'Evaluate UCR data source filters and indicators with compiled expressions',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Data sources are compiled to closures once per process instead of "
+        "walking the expression tree for every document. Results are the same."
+    ),
+)
+
+BATCH_UCR_EVALUATION = StaticToggle(
+    'batch_ucr_evaluation',
+    'Evaluate UCR indicators for a whole pillow chunk one column at a time',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "The UCR pillow evaluates each data source's indicators for all documents "
+        "in a chunk together and saves the resulting columns in one statement."
+    ),
+)
+
+UCR_PREFETCH_RELATED_DOCS = StaticToggle(
+    'ucr_prefetch_related_docs',
+    'Fetch the related docs used by all UCR data sources in bulk for each pillow chunk',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "The UCR pillow looks up the related_doc expressions of every data source in "
+        "the domain and fetches the documents they reference once per chunk."
+    ),
+)
+
 ASYNC_RESTORE = StaticToggle(
     'async_restore',
     'Generate restore response in an asynchronous task to prevent timeouts',
@@ -724,6 +757,91 @@ HIERARCHICAL_LOCATION_FIXTURE = StaticToggle(
     ),
 )
 
+LOCATION_CLOSURE_TABLE = StaticToggle(
+    'location_closure_table',
+    'Query the location hierarchy using the location closure table',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Answers location ancestor and descendant queries from a table of "
+        "ancestor/descendant pairs rather than with recursive queries. Run "
+        "the backfill_location_closure management command for the domain "
+        "before enabling."
+    ),
+)
+
+LOCATION_FIXTURE_CACHE = StaticToggle(
+    'location_fixture_cache',
+    'Share serialized location fixtures between users with the same assigned locations',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Caches location fixtures by the user's assigned locations. Cached "
+        "fixtures are discarded whenever a location or organization level "
+        "in the project changes."
+    ),
+)
+
+FIXTURE_ITEM_SET_CACHE = StaticToggle(
+    'fixture_item_set_cache',
+    'Share serialized lookup tables between users that own the same lookup table rows',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Caches the lookup tables that are not global by the set of rows a "
+        "user owns through their user, groups and locations. Cached tables "
+        "are discarded when a lookup table is uploaded or edited."
+    ),
+)
+
+CASE_SHARD_FAN_OUT = StaticToggle(
+    'case_shard_fan_out',
+    'Query case shards concurrently for bulk case reads',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Bulk case reads made during restores (cases by id, related indices "
+        "and modified cases) query each shard database on its own "
+        "connection, concurrently, rather than through PL/Proxy."
+    ),
+)
+
+UCR_COPY_ROWS = StaticToggle(
+    'ucr_copy_rows',
+    'Save large batches of UCR rows with COPY',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Batches of data source rows that are large enough are streamed into "
+        "a temporary table with COPY and merged into the data source table, "
+        "rather than saved with INSERT statements."
+    ),
+)
+
+SINGLE_PASS_FORM_PARSING = StaticToggle(
+    'single_pass_form_parsing',
+    'Parse submitted forms in a single pass over their XML',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Submitted forms are converted to json while their case and ledger "
+        "blocks are located, so the form XML is not parsed again to find "
+        "ledger blocks and the form json is not walked to find case blocks."
+    ),
+)
+
+BATCH_FORM_SUBMISSIONS = StaticToggle(
+    'batch_form_submissions',
+    'Accept batches of form submissions in one request',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Enables the receiver's batch endpoint, which processes several forms "
+        "in order with their cases locked and loaded together, and returns "
+        "the OpenRosa response of each form."
+    ),
+)
+
 EXTENSION_CASES_SYNC_ENABLED = StaticToggle(
     'extension_sync',
     'Enable extension syncing',
@@ -769,6 +887,32 @@ SYNC_SEARCH_CASE_CLAIM = StaticToggle(
 )
 
 
+CASE_SEARCH_SQL_RELATED_LOOKUPS = StaticToggle(
+    'case_search_sql_related_lookups',
+    'Case search: look up related cases in the case index table',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Case search filters on ancestor case properties (e.g. parent/parent/name = 'x') find the "
+        "cases at each level between the ancestor and the searched cases with one query on the "
+        "case index table, instead of scrolling through the matching cases in Elasticsearch."
+    ),
+)
+
+
+CASE_SEARCH_RESULT_CACHE = StaticToggle(
+    'case_search_result_cache',
+    'Case search: cache search results for a few minutes',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Repeated mobile case searches with the same criteria are served from a cache "
+        "for up to five minutes. The case search pillow invalidates the cached results "
+        "for a case type when it indexes changes to cases of that type."
+    ),
+)
+
+
 CASE_CLAIM_AUTOLAUNCH = StaticToggle(
     'case_claim_autolaunch',
     '''
@@ -850,6 +994,29 @@ LIVEQUERY_SYNC = StaticToggle(
     namespaces=[NAMESPACE_DOMAIN],
 )
 
+RESTORE_CASE_FRAGMENT_CACHE = StaticToggle(
+    'restore_case_fragment_cache',
+    'Cache serialized case blocks between livequery restores',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description="""
+    Serialized case blocks are cached by case id and server modified date
+    so restores only re-serialize cases that have changed.
+    """
+)
+
+LIVEQUERY_PREFETCH_CASES = StaticToggle(
+    'livequery_prefetch_cases',
+    'Fetch the next batch of cases in the background while serializing livequery restores',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description="""
+    Cases, indices and ledgers for the next batch are loaded on a worker
+    thread while the current batch is written to the restore payload.
+    Uses an extra database connection per restore.
+    """
+)
+
 HIPAA_COMPLIANCE_CHECKBOX = StaticToggle(
     'hipaa_compliance_checkbox',
     'Show HIPAA compliance checkbox',
@@ -1608,6 +1775,30 @@ EXPORT_OWNERSHIP = StaticToggle(
 )
 
 
+EXPORT_ROW_PLAN = StaticToggle(
+    'export_row_plan',
+    'Generate export rows for all tables in one pass over each document',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Exports build a trie of their tables' and columns' paths once and walk it "
+        "for each document instead of looking up every column separately. Rows are the same."
+    ),
+)
+
+
+PARQUET_EXPORTS = StaticToggle(
+    'parquet_exports',
+    'Allow exports to be downloaded as Parquet files',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Adds a Parquet (zip file) option to the export file types. Each table is "
+        "written as a Parquet file with dictionary-encoded string columns."
+    ),
+)
+
+
 APP_TRANSLATIONS_WITH_TRANSIFEX = StaticToggle(
     'app_trans_with_transifex',
     'Translate Application Content With Transifex',
@@ -1776,6 +1967,18 @@ DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+CASE_UPDATE_RULE_SQL_PREFILTER = StaticToggle(
+    'case_update_rule_sql_prefilter',
+    'Only load cases that could match a case update rule',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Case property criteria of case update rules are also checked in the query for cases, "
+        "so cases that can't match any rule are not loaded. Rules that act on cases that don't "
+        "match them load all cases as before."
+    ),
+)
+
 DO_NOT_RATE_LIMIT_SUBMISSIONS = StaticToggle(
     'do_not_rate_limit_submissions',
     'Do not rate limit submissions for this project, on a temporary basis.',
@@ -96,7 +96,8 @@ class AbstractElasticsearchInterface(metaclass=abc.ABCMeta):
 
     def bulk_ops(self, actions, stats_only=False, **kwargs):
         for action in actions:
-            if '_source' in action:
+            # sources may already be serialized
+            if isinstance(action.get('_source'), dict):
                 action['_source'] = self._without_id_field(action['_source'])
         ret = bulk(self.es, actions, stats_only=stats_only, **kwargs)
         return ret
@@ -1009,6 +1009,9 @@ AUTHPROXY_CERT = None
 # ideally # of documents it takes to process in ~30 min
 ASYNC_INDICATORS_TO_QUEUE = 10000
 ASYNC_INDICATOR_QUEUE_TIMES = None
+# number of tasks that claim and process AsyncIndicators concurrently.
+# If 0, AsyncIndicators are queued for processing in chunks instead.
+ASYNC_INDICATOR_WORKERS = 0
 DAYS_TO_KEEP_DEVICE_LOGS = 60
 NO_DEVICE_LOG_ENVS = list(ICDS_ENVS) + ['production']
 